@@ -0,0 +1,43 @@
+"""Measures the instructions per second of the interpreter and of the block
+translation engine running Pong, which is assembled from
+../../06/pong/Pong.asm.
+
+    $ python benchmarks/bench_ips.py --cycles 5000000
+"""
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import emulator  # noqa: E402
+from blocks import BlockComputer  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(ROOT_DIR / "06" / "hack_assembler"))
+import assembler  # noqa: E402
+
+
+def pong_rom():
+    with open(ROOT_DIR / "06" / "pong" / "Pong.asm") as source:
+        return [int(code, 2) for code in assembler.assemble(source)]
+
+
+@click.command()
+@click.option("--cycles", default=5_000_000, help="number of instructions to run")
+def bench(cycles):
+    rom = pong_rom()
+    for engine in (emulator.HackComputer, BlockComputer):
+        computer = engine(rom)
+        start = time.perf_counter()
+        computer.run(cycles)
+        elapsed = time.perf_counter() - start
+        click.echo(
+            f"{engine.__name__}: {computer.cycles} instructions of Pong in "
+            f"{elapsed:.2f}s, {computer.cycles / elapsed / 1e6:.2f} million per second"
+        )
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,149 @@
+"""Execution of the Hack programs by translation into Python functions.
+
+The first time the computer reaches an address, the instructions that follow
+it are translated into the source of a Python function, up to a jump to a
+computed address, an instruction already in the block or `MAX_BLOCK`
+instructions; a jump to a constant address is followed. A and D are local
+variables of the function, the address of an a-instruction is inlined into
+the instructions that use it, and a conditional jump that is taken returns
+from the middle of the block. The compiled blocks are cached by address until the
+ROM is replaced.
+"""
+from emulator import COMPUTATIONS, HackComputer, alu
+
+__all__ = ["BlockComputer", "translate_block"]
+
+MAX_BLOCK = 64
+
+
+def wrapped(expression):
+    return f"(({expression}) + 32768 & 65535) - 32768"
+
+
+# the documented computations as expressions of D and y (A or M)
+EXPRESSIONS = {
+    0b101010: "0",
+    0b111111: "1",
+    0b111010: "-1",
+    0b001100: "D",
+    0b110000: "{y}",
+    0b001101: "~D",
+    0b110001: "~{y}",
+    0b001111: wrapped("-D"),
+    0b110011: wrapped("-{y}"),
+    0b011111: wrapped("D + 1"),
+    0b110111: wrapped("{y} + 1"),
+    0b001110: wrapped("D - 1"),
+    0b110010: wrapped("{y} - 1"),
+    0b000010: wrapped("D + {y}"),
+    0b010011: wrapped("D - {y}"),
+    0b000111: wrapped("{y} - D"),
+    0b000000: "D & {y}",
+    0b010101: "D | {y}",
+}
+assert EXPRESSIONS.keys() == COMPUTATIONS.keys()
+
+ALU = {comp: alu(comp) for comp in range(64) if comp not in EXPRESSIONS}
+
+CONDITIONS = (None, "> 0", "== 0", ">= 0", "< 0", "!= 0", "<= 0", None)
+
+
+def translate_block(rom, entry):
+    """Returns the addresses of the instructions of the block and the source
+    of the function `block(ram, A, D)` that runs them from `entry`, which
+    returns the new A, D, pc and the number of executed instructions."""
+    lines = ["def block(ram, A, D):"]
+    a = None  # the value of A when known at translation time, kept out of A
+
+    def register():
+        return "A" if a is None else str(a)
+
+    pc = entry
+    count = 0  # executed instructions
+    visited = set()
+    while pc < len(rom) and count < MAX_BLOCK and pc not in visited:
+        visited.add(pc)
+        instruction = rom[pc]
+        pc += 1
+        count += 1
+        if not instruction & 0x8000:
+            a = instruction
+            continue
+        address = register()
+        comp = instruction >> 6 & 0b111111
+        y = f"ram[{address}]" if instruction & 0x1000 else address
+        if comp in EXPRESSIONS:
+            expression = EXPRESSIONS[comp].format(y=y)
+        else:
+            expression = f"ALU[{comp}](D, {y})"
+        dest = instruction >> 3 & 0b111
+        jump = instruction & 0b111
+        targets = {0b001: f"ram[{address}]", 0b010: "D", 0b100: "A"}
+        if dest in targets and not jump:
+            lines.append(f"    {targets[dest]} = {expression}")
+        else:
+            if dest or jump != 0b111:
+                lines.append(f"    out = {expression}")
+            if jump:
+                # the jump goes to the value of A before the instruction
+                target = "A & 32767" if a is None else str(a & 0x7FFF)
+                if a is None and dest & 0b100:
+                    lines.append(f"    target = {target}")
+                    target = "target"
+            for bit, name in targets.items():
+                if dest & bit:
+                    lines.append(f"    {name} = out")
+        if dest & 0b100:
+            a = None
+        if jump == 0b111:
+            if not target.isdigit():
+                lines.append(f"    return {register()}, D, {target}, {count}")
+                break
+            pc = int(target)  # the block goes on at the known target
+        elif jump:
+            lines.append(f"    if out {CONDITIONS[jump]}:")
+            lines.append(f"        return {register()}, D, {target}, {count}")
+    else:
+        lines.append(f"    return {register()}, D, {pc}, {count}")
+    return visited, "\n".join(lines)
+
+
+class BlockComputer(HackComputer):
+    """A `HackComputer` that runs its program by translated blocks.
+
+    It produces the same states as the interpreter. Near the end of the
+    cycle budget, for the block that contains `until` and with a profile,
+    it falls back to the interpreter.
+    """
+
+    def load(self, rom):
+        super().load(rom)
+        self.blocks = {}  # address -> (function, addresses of the block)
+
+    def block(self, pc):
+        block = self.blocks.get(pc)
+        if block is None:
+            addresses, source = translate_block(self.rom, pc)
+            namespace = {"ALU": ALU}
+            exec(source, namespace)
+            block = self.blocks[pc] = namespace["block"], addresses
+        return block
+
+    def run(self, cycles, until=None):
+        if self.profile is not None:
+            return super().run(cycles, until)
+        ram = self.ram
+        size = len(self.rom)
+        n = 0
+        while cycles - n >= MAX_BLOCK:
+            pc = self.pc
+            if pc >= size or pc == until:
+                return n
+            function, addresses = self.block(pc)
+            if until in addresses:
+                n += super().run(1)
+                continue
+            self.A, self.D, self.pc, executed = function(ram, self.A, self.D)
+            self.cycles += executed
+            n += executed
+        return n + super().run(cycles - n, until)
@@ -0,0 +1,204 @@
+"""Emulator of the Hack computer.
+
+The ROM is decoded once: an a-instruction becomes its value and a
+c-instruction a tuple of the function that computes its result, whether it
+reads M, its destination and its jump condition, so that running a program
+needs no bit twiddling. The RAM is an `array('h')` of signed 16-bit words in
+which the screen and the keyboard are mapped as on the Hack platform.
+"""
+from array import array
+
+__all__ = ["HackComputer", "decode", "load_rom", "SCREEN", "KBD"]
+
+RAM_SIZE = 0x8000
+SCREEN = 0x4000
+SCREEN_SIZE = 0x2000  # 256 rows of 32 words
+KBD = 0x6000
+
+
+def to_word(value):
+    """Wraps the integer around to the signed 16-bit range."""
+    return (value + 0x8000) % 0x10000 - 0x8000
+
+
+def alu(comp):
+    """Returns the function of x (D) and y (A or M) computed by the ALU for
+    the 6 control bits zx nx zy ny f no."""
+    zx, nx, zy, ny, f, no = (comp >> shift & 1 for shift in range(5, -1, -1))
+
+    def compute(x, y):
+        if zx:
+            x = 0
+        if nx:
+            x = ~x
+        if zy:
+            y = 0
+        if ny:
+            y = ~y
+        result = to_word(x + y) if f else x & y
+        return ~result if no else result
+
+    return compute
+
+
+# the documented computations, written directly for speed
+COMPUTATIONS = {
+    0b101010: lambda x, y: 0,
+    0b111111: lambda x, y: 1,
+    0b111010: lambda x, y: -1,
+    0b001100: lambda x, y: x,
+    0b110000: lambda x, y: y,
+    0b001101: lambda x, y: ~x,
+    0b110001: lambda x, y: ~y,
+    0b001111: lambda x, y: to_word(-x),
+    0b110011: lambda x, y: to_word(-y),
+    0b011111: lambda x, y: to_word(x + 1),
+    0b110111: lambda x, y: to_word(y + 1),
+    0b001110: lambda x, y: to_word(x - 1),
+    0b110010: lambda x, y: to_word(y - 1),
+    0b000010: lambda x, y: to_word(x + y),
+    0b010011: lambda x, y: to_word(x - y),
+    0b000111: lambda x, y: to_word(y - x),
+    0b000000: lambda x, y: x & y,
+    0b010101: lambda x, y: x | y,
+}
+
+# jump bits -> condition on the result, None for no jump
+JUMPS = (
+    None,
+    lambda out: out > 0,
+    lambda out: out == 0,
+    lambda out: out >= 0,
+    lambda out: out < 0,
+    lambda out: out != 0,
+    lambda out: out <= 0,
+    lambda out: True,
+)
+
+# marks the instruction before which `run` stops
+STOP = object()
+
+# destination bits
+DEST_M = 1
+DEST_D = 2
+DEST_A = 4
+
+
+def decode(instruction):
+    """Returns the predecoded form of the 16-bit instruction."""
+    if not instruction & 0x8000:
+        return instruction
+    comp = instruction >> 6 & 0b111111
+    compute = COMPUTATIONS.get(comp) or alu(comp)
+    reads_m = bool(instruction & 0x1000)
+    return compute, reads_m, instruction >> 3 & 0b111, JUMPS[instruction & 0b111]
+
+
+def load_rom(fname):
+    """Returns the instructions of a .hack file."""
+    with open(fname) as stream:
+        return [int(line, 2) for line in map(str.strip, stream) if line]
+
+
+class HackComputer:
+    """The Hack computer running the program of its ROM.
+
+    `run` executes a number of cycles and can be called again to continue.
+    Jumping past the end of the ROM halts the computer.
+
+    With a `profile` (see `hotspots`), the cycles of every address are
+    counted in `profile.counts` and `profile.jump` is called after every
+    jump.
+    """
+
+    profile = None
+
+    def __init__(self, rom):
+        self.ram = array("h", bytes(2 * RAM_SIZE))
+        self.load(rom)
+
+    def load(self, rom):
+        """Replaces the program of the ROM and resets the computer."""
+        self.rom = list(rom)
+        self.code = [decode(instruction) for instruction in self.rom]
+        self.reset()
+
+    def reset(self):
+        self.A = self.D = self.pc = 0
+        self.cycles = 0
+
+    @property
+    def halted(self):
+        return not 0 <= self.pc < len(self.code)
+
+    @property
+    def screen(self):
+        """The memory map of the screen, one bit per pixel."""
+        return memoryview(self.ram)[SCREEN : SCREEN + SCREEN_SIZE]
+
+    @property
+    def keyboard(self):
+        return self.ram[KBD]
+
+    @keyboard.setter
+    def keyboard(self, key):
+        self.ram[KBD] = key
+
+    def run(self, cycles, until=None):
+        """Executes up to `cycles` instructions, stopping before the one at
+        address `until` if given. Returns the number of executed cycles."""
+        code = self.code
+        if until is not None and 0 <= until < len(code):
+            saved = code[until]
+            code[until] = STOP
+        try:
+            return self._run(cycles)
+        finally:
+            if until is not None and 0 <= until < len(code):
+                code[until] = saved
+
+    def _run(self, cycles):
+        code = self.code
+        ram = self.ram
+        A, D, pc = self.A, self.D, self.pc
+        profile = self.profile
+        counts = None if profile is None else profile.counts
+        n = 0
+        try:
+            while n < cycles:
+                instruction = code[pc]
+                if instruction.__class__ is int:
+                    if counts is not None:
+                        counts[pc] += 1
+                    A = instruction
+                    pc += 1
+                    n += 1
+                    continue
+                if instruction is STOP:
+                    break
+                if counts is not None:
+                    counts[pc] += 1
+                n += 1
+                compute, reads_m, dest, jump = instruction
+                # a negative A indexes from the end of the RAM, as A & 0x7FFF
+                out = compute(D, ram[A] if reads_m else A)
+                if jump is None:
+                    pc += 1
+                elif jump(out):
+                    pc = A & 0x7FFF
+                    if profile is not None:
+                        profile.jump(pc, self.cycles + n)
+                else:
+                    pc += 1
+                if dest:
+                    if dest & DEST_M:
+                        ram[A] = out
+                    if dest & DEST_D:
+                        D = out
+                    if dest & DEST_A:
+                        A = out
+        except IndexError:  # past the end of the ROM
+            pass
+        self.A, self.D, self.pc = A, D, pc
+        self.cycles += n
+        return n
@@ -0,0 +1,75 @@
+import click
+import emulator
+from blocks import BlockComputer
+from hotspots import Profile
+from pathlib import Path
+
+ENGINES = {"interpreter": emulator.HackComputer, "blocks": BlockComputer}
+
+
+def parse_range(text):
+    """'16-20' -> range(16, 21), '256' -> range(256, 257)"""
+    first, _, last = text.partition("-")
+    return range(int(first), int(last or first) + 1)
+
+
+@click.command()
+@click.argument("rom", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--cycles", "-n", default=1_000_000, help="Number of instructions to run."
+)
+@click.option(
+    "--engine",
+    default="blocks",
+    type=click.Choice(sorted(ENGINES)),
+    help="Interpret the instructions one by one or translate them by blocks.",
+)
+@click.option("--key", default=0, help="Code of the key held on the keyboard.")
+@click.option(
+    "--set",
+    "assignments",
+    multiple=True,
+    help="Initial value of a RAM address, e.g. 0=3.",
+)
+@click.option(
+    "--dump",
+    multiple=True,
+    help="RAM addresses to print at the end, e.g. 0-15 or 256.",
+)
+@click.option(
+    "--profile",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Assembly source of the ROM, to print the cycles by function and "
+    "label at the end.",
+)
+@click.option(
+    "--collapsed",
+    type=click.Path(dir_okay=False),
+    help="With --profile, write the cycles by stack of calls to this file, "
+    "for flamegraph.pl.",
+)
+def hack_emulate(rom, cycles, engine, key, assignments, dump, profile, collapsed):
+    """emulator"""
+    computer = ENGINES[engine](emulator.load_rom(rom))
+    computer.keyboard = key
+    for assignment in assignments:
+        address, _, value = assignment.partition("=")
+        computer.ram[int(address)] = int(value)
+    hot_spots = Profile(computer, Path(profile).read_text()) if profile else None
+    computer.run(cycles)
+    state = "halted" if computer.halted else "running"
+    click.echo(
+        f"{computer.cycles} cycles, {state}: "
+        f"A={computer.A} D={computer.D} PC={computer.pc}"
+    )
+    for text in dump:
+        for address in parse_range(text):
+            click.echo(f"RAM[{address}] = {computer.ram[address]}")
+    if hot_spots:
+        click.echo(hot_spots.report())
+        if collapsed:
+            Path(collapsed).write_text(hot_spots.collapsed())
+
+
+if __name__ == "__main__":
+    hack_emulate()
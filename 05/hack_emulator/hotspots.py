@@ -0,0 +1,206 @@
+"""Hot spots of a program running in the emulator: the cycles spent at every
+address of the ROM, by label of the assembly program and by stack of calls,
+with the calls between the functions.
+
+    profile = Profile(computer, Path("Pong.asm").read_text())
+    computer.run(1_000_000)
+    print(profile.report())
+    Path("pong.folded").write_text(profile.collapsed())
+
+The labels are those of the vm translator of ../../08: a label `Class.name`
+starts a function and `$NAME` a subroutine shared by the functions, as
+`$CALL`; the labels of the vm code (`Class.name$LABEL`) start the regions
+of `labels`, except for the return addresses. The addresses before the
+first function belong to `$START`, the bootstrap.
+
+The stack of calls is read from the frames in the RAM, as written by the
+vm translator: when LCL changes at a jump, a function was called or
+returned, and the callers are those of the return addresses of the chain
+of frames.
+The cycles of the shared subroutines go to the function that jumped to
+them, those of a call to the caller and those of a return to the callee.
+
+`collapsed` writes the stacks in the format of flamegraph.pl, one line of
+the functions of a stack, separated by ';', and its cycles.
+
+`CallStacks` does the accounting of the stacks and is shared with the
+profiler of the vm emulator of ../../08.
+"""
+import re
+from collections import Counter
+
+__all__ = ["CallStacks", "Profile", "START", "function_table", "table"]
+
+START = "$START"
+LCL = 1
+# deeper chains of frames are taken for garbage in the RAM
+MAX_DEPTH = 1000
+FUNCTION = re.compile(r"[^$]+\.[^$]+|\$[A-Z]+")
+
+
+class CallStacks:
+    """The cost of a program by stack of calls, and the number of calls
+    between every two functions. The cost is a running total, such as the
+    cycles of the computer, which the current stack is charged with from
+    one change of stack to the next."""
+
+    def __init__(self, stack, cost=0):
+        self.stack = tuple(stack)
+        self.mark = cost
+        self.costs = Counter()  # stack -> cost in its last function
+        self.edges = Counter()  # (caller, callee) -> calls
+
+    def switch(self, stack, cost):
+        """Charges the current stack up to `cost` and makes `stack` current."""
+        self.costs[self.stack] += cost - self.mark
+        self.mark = cost
+        self.stack = stack
+
+    def call(self, callee, cost):
+        self.edges[self.stack[-1], callee] += 1
+        self.switch(self.stack + (callee,), cost)
+
+    def ret(self, cost):
+        self.switch(self.stack[:-1] or self.stack, cost)
+
+    def functions(self):
+        """Returns the calls, the exclusive cost (in the function itself)
+        and the inclusive cost (with its callees) of every function."""
+        result = {}
+
+        def entry(name):
+            return result.setdefault(name, {"calls": 0, "exclusive": 0, "inclusive": 0})
+
+        for (_, callee), calls in self.edges.items():
+            entry(callee)["calls"] += calls
+        for stack, cost in self.costs.items():
+            entry(stack[-1])["exclusive"] += cost
+            for name in set(stack):  # a recursive function is counted once
+                entry(name)["inclusive"] += cost
+        return result
+
+    def collapsed(self):
+        """The stacks and their costs in the format of flamegraph.pl."""
+        return "".join(
+            f"{';'.join(stack)} {cost}\n"
+            for stack, cost in sorted(self.costs.items())
+            if cost
+        )
+
+
+def table(title, rows, top):
+    """The text of the `top` rows, (cost, name) pairs, the costliest first."""
+    rows = sorted(rows, key=lambda row: (-row[0], row[1]))[:top]
+    return [title] + [f"{cost:12} {name}" for cost, name in rows]
+
+
+def function_table(functions, top):
+    """The text of the `top` functions of the most inclusive cost."""
+    rows = sorted(functions.items(), key=lambda item: (-item[1]["inclusive"], item[0]))
+    return ["   inclusive    exclusive        calls function"] + [
+        f"{f['inclusive']:12} {f['exclusive']:12} {f['calls']:12} {name}"
+        for name, f in rows[:top]
+    ]
+
+
+def asm_labels(source_code):
+    """Returns the address of every label of the assembly program, in the
+    order of the program."""
+    labels = []
+    address = 0
+    for line in source_code.splitlines():
+        text = line.partition("//")[0].strip()
+        if text.startswith("("):
+            labels.append((text[1:-1], address))
+        elif text:
+            address += 1
+    return labels
+
+
+class Profile:
+    """Profiles the program of a `HackComputer` from its assembly source,
+    the cycles run before being left out."""
+
+    def __init__(self, computer, source_code):
+        self.computer = computer
+        size = len(computer.code)
+        self.owners = [START] * size  # address -> function
+        self.regions = [START] * size  # address -> function or label
+        function = region = START
+        labels = asm_labels(source_code)
+        for (label, address), (_, end) in zip(labels, labels[1:] + [("", size)]):
+            if FUNCTION.fullmatch(label):
+                function = region = label
+            elif label.startswith(f"{function}$") and "$ret." not in label:
+                region = label
+            self.owners[address:end] = [function] * (end - address)
+            self.regions[address:end] = [region] * (end - address)
+        self.counts = [0] * size
+        self.lcl = computer.ram[LCL]
+        self.stacks = CallStacks(
+            self.callers() + (self.function(computer.pc),), computer.cycles
+        )
+        computer.profile = self
+
+    def callers(self):
+        """The functions of the frames in the RAM, the first one first: the
+        functions of the calls of the return addresses."""
+        ram = self.computer.ram
+        owners = self.owners
+        stack = []
+        frame = ram[LCL]
+        while frame >= 5 and len(stack) < MAX_DEPTH:
+            address = ram[frame - 5]
+            if not 0 < address <= len(owners):
+                break
+            stack.append(owners[address - 1])
+            frame = ram[frame - 4]
+        return tuple(reversed(stack))
+
+    def function(self, pc):
+        return self.owners[pc] if 0 <= pc < len(self.owners) else START
+
+    def jump(self, pc, cycles):
+        """Called by the computer at each jump to `pc`, `cycles` counting
+        the jump."""
+        if self.computer.ram[LCL] == self.lcl:
+            return
+        self.lcl = self.computer.ram[LCL]
+        stacks = self.stacks
+        callers = self.callers()
+        if callers == stacks.stack:  # the frame of a call to pc
+            stacks.call(self.function(pc), cycles)
+        else:  # a return to the instruction after the call
+            stacks.switch(callers + (self.function(pc - 1),), cycles)
+
+    def flush(self):
+        """Charges the current stack with the cycles run since the last jump."""
+        self.stacks.switch(self.stacks.stack, self.computer.cycles)
+
+    def functions(self):
+        """The calls and the exclusive and inclusive cycles of every function."""
+        self.flush()
+        return self.stacks.functions()
+
+    def labels(self):
+        """The cycles of every label region."""
+        result = Counter()
+        for region, count in zip(self.regions, self.counts):
+            if count:
+                result[region] += count
+        return result
+
+    def collapsed(self):
+        self.flush()
+        return self.stacks.collapsed()
+
+    def report(self, top=20):
+        """The text of the costliest functions and labels."""
+        lines = function_table(self.functions(), top)
+        lines.append("")
+        lines += table(
+            "      cycles label",
+            [(count, name) for name, count in self.labels().items()],
+            top,
+        )
+        return "\n".join(lines)
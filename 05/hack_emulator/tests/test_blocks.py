@@ -0,0 +1,71 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+import emulator
+from blocks import MAX_BLOCK, BlockComputer, translate_block
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 05/
+sys.path.insert(0, str(PROJECT_DIR.parent / "06" / "hack_assembler"))
+import assembler  # noqa: E402
+
+
+def pong_rom():
+    with open(PROJECT_DIR.parent / "06" / "pong" / "Pong.asm") as source:
+        return [int(code, 2) for code in assembler.assemble(source)]
+
+
+def assert_same_state(interpreter, blocks):
+    assert (interpreter.A, interpreter.D, interpreter.pc, interpreter.cycles) == (
+        blocks.A,
+        blocks.D,
+        blocks.pc,
+        blocks.cycles,
+    )
+    assert interpreter.ram == blocks.ram
+
+
+def test_same_trace_as_the_interpreter():
+    rom = pong_rom()
+    interpreter, blocks = emulator.HackComputer(rom), BlockComputer(rom)
+    steps = random.Random(0)
+    for _ in range(100):
+        cycles = steps.choice([1, 7, MAX_BLOCK - 1, MAX_BLOCK, MAX_BLOCK + 1, 5000])
+        assert interpreter.run(cycles) == blocks.run(cycles)
+        assert_same_state(interpreter, blocks)
+
+
+@pytest.mark.parametrize("until", [3, 10, 14])
+def test_run_until(until):
+    rom = emulator.load_rom(PROJECT_DIR / "Max.hack")
+    interpreter, blocks = emulator.HackComputer(rom), BlockComputer(rom)
+    for computer in (interpreter, blocks):
+        computer.ram[0], computer.ram[1] = 5, 3
+        computer.run(1000, until=until)
+    assert blocks.pc == until
+    assert_same_state(interpreter, blocks)
+
+
+def test_halts_at_the_end_of_the_rom():
+    blocks = BlockComputer(emulator.load_rom(PROJECT_DIR / "Add.hack"))
+    assert blocks.run(1000) == 6
+    assert blocks.halted and blocks.ram[0] == 5
+
+
+def test_load_invalidates_the_blocks():
+    blocks = BlockComputer([7, 0b1110110000010000])  # @7, D=A
+    blocks.run(100)
+    assert blocks.D == 7 and blocks.blocks
+    blocks.load([9, 0b1110110000010000])  # @9, D=A
+    assert not blocks.blocks
+    blocks.run(100)
+    assert blocks.D == 9
+
+
+def test_constant_jumps_are_followed():
+    rom = [4, 0b1110101010000111, 1, 0b1110110000010000, 2, 0b1110110000010000]
+    addresses, source = translate_block(rom, 0)  # @4, 0;JMP, ..., @2, D=A
+    assert addresses == {0, 1, 4, 5}
+    assert "return 2, D, 6, 4" in source
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+import emulator
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 05/
+
+
+def computer(name):
+    return emulator.HackComputer(emulator.load_rom(PROJECT_DIR / name))
+
+
+@pytest.mark.parametrize("x, y", [(3, 5), (23456, 12345), (-1, -7)])
+def test_max(x, y):
+    hack = computer("Max.hack")
+    hack.ram[0], hack.ram[1] = x, y
+    hack.run(20)
+    assert hack.ram[2] == max(x, y)
+
+
+def test_add_halts_at_the_end_of_the_rom():
+    hack = computer("Add.hack")
+    assert hack.run(100) == 6
+    assert hack.halted
+    assert hack.ram[0] == 5
+
+
+def test_rect_draws_on_the_screen():
+    hack = computer("Rect.hack")
+    hack.ram[0] = 4  # rows
+    hack.run(1000)
+    assert list(hack.screen[0:97:32]) == [-1, -1, -1, -1]
+    assert hack.screen[128] == 0
+    assert hack.screen[1] == 0
+
+
+def test_run_until_and_continue():
+    hack = computer("Max.hack")
+    hack.ram[0], hack.ram[1] = 3, 5
+    assert hack.run(100, until=4) == 4
+    assert (hack.pc, hack.D) == (4, -2)
+    hack.run(100, until=14)
+    assert hack.ram[2] == 5
+
+
+@pytest.mark.parametrize("comp", sorted(emulator.COMPUTATIONS))
+def test_computations_match_the_alu(comp):
+    values = [0, 1, -1, 2, 32767, -32768, 12345, -4321]
+    for x in values:
+        for y in values:
+            assert emulator.COMPUTATIONS[comp](x, y) == emulator.alu(comp)(x, y)
+
+
+def test_keyboard_is_memory_mapped():
+    hack = emulator.HackComputer([0x6000, 0b1111110000010000])  # @KBD, D=M
+    hack.keyboard = 75
+    hack.run(2)
+    assert hack.D == 75
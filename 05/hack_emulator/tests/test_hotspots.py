@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+import emulator
+from blocks import BlockComputer
+from hotspots import CallStacks, Profile
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 05/
+sys.path.insert(0, str(PROJECT_DIR.parent / "06" / "hack_assembler"))
+sys.path.insert(0, str(PROJECT_DIR.parent / "08" / "vm_translator"))
+import assembler  # noqa: E402
+from translator import VMTranslator  # noqa: E402
+
+FIBONACCI = PROJECT_DIR.parent / "08" / "FunctionCalls" / "FibonacciElement"
+
+
+def fibonacci(n, shared):
+    """The assembly source and the ROM of fibonacci(n) in the vm code of
+    the project 08."""
+    files = [
+        (path.stem, path.read_text().replace("push constant 4", f"push constant {n}"))
+        for path in sorted(FIBONACCI.glob("*.vm"))
+    ]
+    source_code = "\n".join(VMTranslator(shared).translate(files))
+    rom = [int(code, 2) for code in assembler.assemble(source_code.splitlines())]
+    return source_code, rom
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_calls_and_costs(shared):
+    source_code, rom = fibonacci(10, shared)
+    computer = BlockComputer(rom)
+    profile = Profile(computer, source_code)
+    computer.run(100_000)
+    assert computer.ram[261] == 55
+    functions = profile.functions()
+    assert functions["Main.fibonacci"]["calls"] == 2 * 89 - 1
+    assert functions["Sys.init"]["calls"] == 1
+    assert functions["$START"]["inclusive"] == computer.cycles
+    assert sum(f["exclusive"] for f in functions.values()) == computer.cycles
+    assert profile.stacks.edges["Main.fibonacci", "Main.fibonacci"] == 2 * 89 - 2
+    assert sum(profile.labels().values()) == sum(profile.counts) == computer.cycles
+    assert "Main.fibonacci$IF_TRUE" in profile.labels()
+    if shared:
+        assert "$CALL" in profile.labels()
+    lines = profile.collapsed().splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == computer.cycles
+    # fibonacci(10) down to fibonacci(1) are on the stack at once
+    deepest = max(lines, key=lambda line: line.count(";"))
+    assert deepest.split(" ")[0] == ";".join(
+        ["$START", "Sys.init"] + ["Main.fibonacci"] * 10
+    )
+
+
+def test_profile_keeps_the_states_of_the_interpreter():
+    source_code, rom = fibonacci(8, True)
+    computer = emulator.HackComputer(rom)
+    profiled = BlockComputer(rom)
+    Profile(profiled, source_code)
+    assert computer.run(5000) == profiled.run(5000)
+    assert (computer.A, computer.D, computer.pc) == (
+        profiled.A,
+        profiled.D,
+        profiled.pc,
+    )
+    assert computer.ram == profiled.ram
+
+
+def test_call_stacks():
+    stacks = CallStacks(["main"])
+    stacks.call("f", 3)
+    stacks.call("g", 5)
+    stacks.ret(6)
+    stacks.ret(10)
+    stacks.switch(stacks.stack, 12)
+    assert stacks.collapsed() == "main 5\nmain;f 6\nmain;f;g 1\n"
+    assert stacks.functions() == {
+        "main": {"calls": 0, "exclusive": 5, "inclusive": 12},
+        "f": {"calls": 1, "exclusive": 6, "inclusive": 7},
+        "g": {"calls": 1, "exclusive": 1, "inclusive": 1},
+    }
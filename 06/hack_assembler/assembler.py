@@ -0,0 +1,172 @@
+"""Two-pass assembler of the Hack assembly language.
+
+The first pass reads the source once to record the address of every label,
+the second pass reads it again and yields the binary instructions one at a
+time, so that no more than the symbol table is kept in memory.
+"""
+import re
+from itertools import permutations
+
+__all__ = ["assemble", "symbol_table", "translate", "PREDEFINED_SYMBOLS"]
+
+PREDEFINED_SYMBOLS = {
+    "SP": 0,
+    "LCL": 1,
+    "ARG": 2,
+    "THIS": 3,
+    "THAT": 4,
+    **{f"R{i}": i for i in range(16)},
+    "SCREEN": 0x4000,
+    "KBD": 0x6000,
+}
+
+# the first variable is allocated right after R15, the last one right
+# before the screen memory map
+VARIABLE_BASE = 16
+MAX_VARIABLE = PREDEFINED_SYMBOLS["SCREEN"] - 1
+
+# letters, digits, underscore, dot, dollar sign and colon, not starting with
+# a digit
+SYMBOL = re.compile(r"[A-Za-z_.$:][\w.$:]*", re.ASCII)
+
+COMP = {
+    "0": "0101010",
+    "1": "0111111",
+    "-1": "0111010",
+    "D": "0001100",
+    "A": "0110000",
+    "!D": "0001101",
+    "!A": "0110001",
+    "-D": "0001111",
+    "-A": "0110011",
+    "D+1": "0011111",
+    "A+1": "0110111",
+    "D-1": "0001110",
+    "A-1": "0110010",
+    "D+A": "0000010",
+    "D-A": "0010011",
+    "A-D": "0000111",
+    "D&A": "0000000",
+    "D|A": "0010101",
+}
+# the same computations on M set the a-bit
+COMP.update(
+    {
+        comp.replace("A", "M"): "1" + bits[1:]
+        for comp, bits in COMP.items()
+        if "A" in comp
+    }
+)
+# the commutative operations can be written both ways
+COMP.update(
+    {
+        f"{comp[2]}{comp[1]}{comp[0]}": bits
+        for comp, bits in list(COMP.items())
+        if len(comp) == 3 and comp[1] in "+&|"
+    }
+)
+
+DEST = {"": "000"}
+# the registers can be given in any order, e.g. MD or DM
+for registers in ("M", "D", "A", "MD", "AM", "AD", "AMD"):
+    bits = "".join("1" if r in registers else "0" for r in "ADM")
+    DEST.update({"".join(p): bits for p in permutations(registers)})
+
+JUMP = {
+    "": "000",
+    "JGT": "001",
+    "JEQ": "010",
+    "JGE": "011",
+    "JLT": "100",
+    "JNE": "101",
+    "JLE": "110",
+    "JMP": "111",
+}
+
+MAX_ADDRESS = 0x7FFF
+
+
+def instructions(lines):
+    """Yields the line number and the text of every instruction or label
+    declaration, without comments and whitespace."""
+    for number, line in enumerate(lines, 1):
+        text = line.partition("//")[0].strip()
+        if text:
+            if " " in text or "\t" in text:
+                text = "".join(text.split())
+            yield number, text
+
+
+def symbol_table(lines):
+    """First pass: returns the predefined symbols and the labels."""
+    symbols = dict(PREDEFINED_SYMBOLS)
+    address = 0
+    for number, text in instructions(lines):
+        if text[0] == "(":
+            if text[-1] != ")" or len(text) < 3:
+                raise SyntaxError(f"line {number}: invalid label {text!r}")
+            label = text[1:-1]
+            if not SYMBOL.fullmatch(label):
+                raise SyntaxError(f"line {number}: invalid label {text!r}")
+            if label in symbols:
+                raise SyntaxError(f"line {number}: duplicate symbol {label!r}")
+            symbols[label] = address
+        else:
+            address += 1
+    return symbols
+
+
+def compute(text, number):
+    """Returns the binary code of the c-instruction dest=comp;jump."""
+    dest, _, rest = text.rpartition("=")
+    comp, _, jump = rest.partition(";")
+    try:
+        return f"111{COMP[comp]}{DEST[dest]}{JUMP[jump]}"
+    except KeyError:
+        raise SyntaxError(f"line {number}: invalid instruction {text!r}") from None
+
+
+def translate(lines, symbols):
+    """Second pass: yields the binary code of every instruction. The
+    variables are added to `symbols` as they are met."""
+    next_variable = VARIABLE_BASE
+    # a program repeats the same few c-instructions over and over
+    c_instructions = {}
+    for number, text in instructions(lines):
+        first = text[0]
+        if first == "@":
+            value = text[1:]
+            if value.isdigit():
+                address = int(value)
+                if address > MAX_ADDRESS:
+                    raise SyntaxError(f"line {number}: address out of range {text!r}")
+            else:
+                address = symbols.get(value)
+                if address is None:
+                    if not SYMBOL.fullmatch(value):
+                        raise SyntaxError(f"line {number}: invalid symbol {text!r}")
+                    if next_variable > MAX_VARIABLE:
+                        raise SyntaxError(
+                            f"line {number}: too many variables, no address left "
+                            f"for {value!r} below SCREEN"
+                        )
+                    address = symbols[value] = next_variable
+                    next_variable += 1
+            yield f"{address:016b}"
+        elif first != "(":
+            code = c_instructions.get(text)
+            if code is None:
+                code = c_instructions[text] = compute(text, number)
+            yield code
+
+
+def assemble(source):
+    """Yields the binary code of the source program.
+
+    `source` is read twice: it is either a list of lines or a seekable text
+    stream, e.g. an open file.
+    """
+    symbols = symbol_table(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return translate(source, symbols)
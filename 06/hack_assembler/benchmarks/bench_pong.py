@@ -0,0 +1,36 @@
+"""Times the assembly of Pong.asm, the largest program of project 06, and
+fails if the best run takes longer than `--limit` seconds.
+
+    $ python benchmarks/bench_pong.py --repeat 5
+"""
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import assembler  # noqa: E402
+
+PONG = Path(__file__).resolve().parents[2] / "pong" / "Pong.asm"
+
+
+@click.command()
+@click.option("--repeat", default=5, help="number of runs")
+@click.option("--limit", default=1.0, help="maximum time of the best run")
+def bench(repeat, limit):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open(PONG) as source:
+            count = sum(1 for _ in assembler.assemble(source))
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    click.echo(f"Pong.asm: {count} instructions in {best:.3f}s (best of {repeat})")
+    if best > limit:
+        click.echo(f"slower than the limit of {limit}s", err=True)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    bench()
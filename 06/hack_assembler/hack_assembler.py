@@ -0,0 +1,54 @@
+import click
+import assembler
+import os
+from pathlib import Path
+
+
+def files_to_process(path: Path):
+    """Returns the path of the asm files in the given path if dir."""
+    if path.is_dir():
+        return sorted(d for d in path.iterdir() if d.suffix == ".asm")
+    else:
+        return [path] if path.suffix == ".asm" else []
+
+
+def assemble_file(fname: Path):
+    """Assembles the asm file into the .hack file next to it.
+
+    The code is streamed to a temporary file that replaces the .hack file
+    once the whole program is assembled, so that an error never leaves a
+    truncated program that looks valid."""
+    result_fname = fname.with_suffix(".hack")
+    tmp_fname = result_fname.with_name(result_fname.name + ".tmp")
+    try:
+        with open(fname) as source, open(tmp_fname, "w") as result:
+            for code in assembler.assemble(source):
+                result.write(code)
+                result.write("\n")
+        os.replace(tmp_fname, result_fname)
+    except BaseException:
+        tmp_fname.unlink(missing_ok=True)
+        raise
+
+
+@click.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+def hack_assemble(paths):
+    """assembler"""
+    filenames = [fname for path in paths for fname in files_to_process(Path(path))]
+    if not filenames:
+        click.echo(f"Unable to detect asm files in the given paths: {' '.join(paths)}")
+        return
+    failed = False
+    for fname in filenames:
+        try:
+            assemble_file(fname)
+        except (OSError, SyntaxError) as error:
+            click.echo(f"Unable to assemble {fname}: {error}", err=True)
+            failed = True
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    hack_assemble()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the modules of the assembler are imported by their bare names
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,99 @@
+import io
+from pathlib import Path
+
+import pytest
+
+import assembler
+import hack_assembler
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 06/
+
+ADD_HACK = [
+    "0000000000000010",
+    "1110110000010000",
+    "0000000000000011",
+    "1110000010010000",
+    "0000000000000000",
+    "1110001100001000",
+]
+
+
+def assemble(text):
+    return list(assembler.assemble(io.StringIO(text)))
+
+
+def test_add():
+    with open(PROJECT_DIR / "add" / "Add.asm") as source:
+        assert list(assembler.assemble(source)) == ADD_HACK
+
+
+@pytest.mark.parametrize("program", ["max/Max", "rect/Rect", "pong/Pong"])
+def test_symbols_match_symbol_less_version(program):
+    with open(PROJECT_DIR / f"{program}.asm") as source:
+        with_symbols = list(assembler.assemble(source))
+    with open(PROJECT_DIR / f"{program}L.asm") as source:
+        assert list(assembler.assemble(source)) == with_symbols
+
+
+def test_labels_and_variables():
+    source = """
+        @i      // variable, 16
+        M=1
+    (LOOP)
+        @j      // variable, 17
+        D = M   // spaces are ignored
+        @LOOP
+        D;JGT
+        @i
+        MD=M+D
+    """
+    assert assemble(source) == [
+        "0000000000010000",
+        "1110111111001000",
+        "0000000000010001",
+        "1111110000010000",
+        "0000000000000010",
+        "1110001100000001",
+        "0000000000010000",
+        "1111000010011000",
+    ]
+    # a list of lines is as good as a stream
+    assert list(assembler.assemble(source.splitlines())) == assemble(source)
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["D=X", "@32768", "(LOOP", "(A)\n(A)", "@1x", "D;JXX", "@-1", "@a+b", "(-1)"],
+)
+def test_errors(source):
+    with pytest.raises(SyntaxError):
+        assemble(source)
+
+
+def test_too_many_variables():
+    variables = assembler.MAX_VARIABLE - assembler.VARIABLE_BASE + 1
+    source = "".join(f"@v{i}\n" for i in range(variables))
+    assert assemble(source)[-1] == f"{assembler.MAX_VARIABLE:016b}"
+    with pytest.raises(SyntaxError, match="too many variables"):
+        assemble(source + "@v\n")
+
+
+def test_many_files(tmp_path):
+    for program in ("max/Max", "max/MaxL", "add/Add"):
+        (tmp_path / Path(program).name).with_suffix(".asm").write_text(
+            (PROJECT_DIR / f"{program}.asm").read_text()
+        )
+    filenames = hack_assembler.files_to_process(tmp_path)
+    assert [f.name for f in filenames] == ["Add.asm", "Max.asm", "MaxL.asm"]
+    for fname in filenames:
+        hack_assembler.assemble_file(fname)
+    assert (tmp_path / "Add.hack").read_text().splitlines() == ADD_HACK
+    assert (tmp_path / "Max.hack").read_text() == (tmp_path / "MaxL.hack").read_text()
+
+
+def test_failed_file_leaves_no_program(tmp_path):
+    fname = tmp_path / "Bad.asm"
+    fname.write_text("@1\nD=A\nD=QQ\n")
+    with pytest.raises(SyntaxError):
+        hack_assembler.assemble_file(fname)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Bad.asm"]
@@ -0,0 +1,55 @@
+"""Compares the time the vm emulator takes to run a program whose
+multiplications go to the native Math.multiply and to a Jack one, the shift
+and add loop of the book.
+
+The OS classes of ../../12 are still to be written, so the Jack version is
+the one of the tests.
+
+    $ python benchmarks/bench_os.py --n 100
+"""
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from jack_os import NativeOS  # noqa: E402
+from machine import VirtualMachine  # noqa: E402
+from test_jack_os import MATH, compile_classes  # noqa: E402
+
+MAIN = """
+class Main {
+    function void main() {
+        var int i, j, sum;
+        while (i < %d) {
+            let j = 0;
+            while (j < 100) {
+                let sum = sum + (i * j);
+                let j = j + 1;
+            }
+            let i = i + 1;
+        }
+        do Output.printInt(sum);
+        return;
+    }
+}
+"""
+
+
+@click.command()
+@click.option("--n", default=100, help="the number of rows of 100 products")
+def bench(n):
+    files = compile_classes(("Main", MAIN.replace("%d", str(n))), ("Math", MATH))
+    for label, exclude in (("native", ()), ("jack", ("Math.multiply",))):
+        jack_os = NativeOS()
+        vm = VirtualMachine(files, jack_os.functions(exclude))
+        start = time.perf_counter()
+        vm.run(100_000_000)
+        elapsed = time.perf_counter() - start
+        click.echo(f"{label}: {jack_os.text}, {vm.steps} commands in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    bench()
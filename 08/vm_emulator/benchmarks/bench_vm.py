@@ -0,0 +1,99 @@
+"""Compares the time the vm emulator and the Hack emulator of ../../05 take
+to run the same compiled Jack program, a recursive Fibonacci computation.
+
+For the Hack emulator the program goes through the vm translator of
+../vm_translator and the assembler of ../../06.
+
+    $ python benchmarks/bench_vm.py --n 18
+"""
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import machine  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+for directory in (
+    "05/hack_emulator",
+    "06/hack_assembler",
+    "08/vm_translator",
+    "11/jack_compiler",
+):
+    sys.path.append(str(ROOT_DIR / directory))
+
+import assembler  # noqa: E402
+from blocks import BlockComputer  # noqa: E402
+from emulator import HackComputer  # noqa: E402
+from compiler import JackCompiler  # noqa: E402
+from translator import VMTranslator  # noqa: E402
+
+SOURCES = {
+    "Sys": """
+class Sys {
+    function void init() {
+        do Main.main();
+        while (true) {}
+        return;
+    }
+}
+""",
+    "Main": """
+class Main {
+    static int result;
+
+    function void main() {
+        let result = Main.fibonacci(%d);
+        return;
+    }
+
+    function int fibonacci(int n) {
+        if (n < 2) { return n; }
+        return Main.fibonacci(n - 2) + Main.fibonacci(n - 1);
+    }
+}
+""",
+}
+CHUNK = 10_000
+STATIC_ADDRESS = 16
+
+
+def program(n):
+    return [
+        (name, "\n".join(JackCompiler(source.replace("%d", str(n))).compile()))
+        for name, source in SOURCES.items()
+    ]
+
+
+def run(computer, address):
+    """Runs the computer until the result is stored at the address."""
+    start = time.perf_counter()
+    while not computer.ram[address]:
+        computer.run(CHUNK)
+    return computer.ram[address], time.perf_counter() - start
+
+
+@click.command()
+@click.option("--n", default=18, help="the Fibonacci number to compute")
+def bench(n):
+    files = program(n)
+    vm = machine.VirtualMachine(files)
+    result, elapsed = run(vm, STATIC_ADDRESS)
+    click.echo(f"vm: fibonacci({n}) = {result}, {vm.steps} commands in {elapsed:.2f}s")
+
+    lines = VMTranslator().translate(files)
+    rom = [int(code, 2) for code in assembler.assemble(lines)]
+    address = STATIC_ADDRESS  # Main.0, the only static variable
+    for engine in (BlockComputer, HackComputer):
+        hack = engine(rom)
+        result, elapsed = run(hack, address)
+        click.echo(
+            f"{engine.__name__}: fibonacci({n}) = {result}, "
+            f"{hack.cycles} instructions in {elapsed:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    bench()
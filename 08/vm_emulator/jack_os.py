@@ -0,0 +1,491 @@
+"""Native implementations of the functions of the Jack OS of ../../12.
+
+Every native is called with the RAM of the vm emulator and the arguments of
+the call, and returns the value of the call, None for a void function. The
+objects keep the layout the compiled programs expect where they can see it
+(an `Array` is its words, the screen and the keyboard are memory mapped),
+while the bookkeeping that the programs never read is kept in Python: the
+free blocks of the heap, the cursor of `Output` and the color of `Screen`.
+
+A `String` is a block of the heap of maxLength + 2 words, the maximum
+length, the length and the characters.
+
+The natives of `Memory`, `Array`, `String` and `Keyboard.readLine` share the
+heap of the instance, so `Memory.alloc` and `Memory.deAlloc` should be
+native, or not, together with them.
+"""
+import re
+from array import array
+from collections import deque
+from math import isqrt
+from pathlib import Path
+
+from machine import Halt, Wait, to_word
+
+__all__ = ["NativeOS", "SYS_INIT"]
+
+HEAP_BASE = 2048
+HEAP_END = 0x4000
+SCREEN = 0x4000
+KBD = 0x6000
+WIDTH, HEIGHT = 512, 256
+ROWS, COLUMNS = 23, 64
+
+NEW_LINE, BACKSPACE, DOUBLE_QUOTE = 128, 129, 34
+
+FONT_FILE = Path(__file__).resolve().parents[2] / "12" / "Output.jack"
+
+# the Sys.init of the course, for the programs without a Sys class
+SYS_INIT = (
+    "Sys",
+    """
+function Sys.init 0
+call Memory.init 0
+pop temp 0
+call Math.init 0
+pop temp 0
+call Screen.init 0
+pop temp 0
+call Output.init 0
+pop temp 0
+call Keyboard.init 0
+pop temp 0
+call Main.main 0
+pop temp 0
+call Sys.halt 0
+pop temp 0
+push constant 0
+return
+""",
+)
+
+
+def load_font(path=FONT_FILE):
+    """Returns the 11 rows of the bitmap of every character created by the
+    `initMap` of Output.jack, the characters it leaves out are blank."""
+    font = {}
+    if path.exists():
+        for numbers in re.findall(r"Output\.create\(([\d,\s]+)\)", path.read_text()):
+            index, *rows = map(int, numbers.split(","))
+            font[index] = rows
+    return font
+
+
+def os_error(code):
+    """The Halt raised by Sys.error."""
+    return Halt(f"ERR{code}")
+
+
+class NativeOS:
+    """The Jack OS written in Python.
+
+    `functions` returns the natives by the name of their Jack function. The
+    text printed by `Output` is kept in `text` besides being drawn on the
+    screen, and `Keyboard` reads the characters queued by `type`: reading
+    more characters than queued raises Wait, so that the emulator stops
+    before the call until more input is given. A key returned by
+    `Keyboard.keyPressed` is taken off the queue, and is released (0) on the
+    next call, as when a key is pressed once; `RAM[KBD]` set by hand is
+    held down until cleared.
+    """
+
+    def __init__(self):
+        self.font = load_font()
+        self.keys = deque()
+        self.key_down = False  # whether keyPressed just returned a key
+        self.text = ""
+        self.init_memory()
+        self.init_output()
+        self.init_screen()
+
+    def functions(self, exclude=()):
+        natives = {
+            f"{class_name}.{name}": getattr(self, method)
+            for class_name, names in NATIVES.items()
+            for name, method in names.items()
+        }
+        for name in exclude:
+            natives.pop(name, None)
+        return natives
+
+    def type(self, text):
+        """Queues keys for the keyboard, a newline is the newline key."""
+        self.keys.extend(NEW_LINE if c == "\n" else ord(c) for c in text)
+
+    # Math
+
+    def init_math(self, ram):
+        pass
+
+    def abs(self, ram, x):
+        return to_word(abs(x))
+
+    def multiply(self, ram, x, y):
+        return to_word(x * y)
+
+    def divide(self, ram, x, y):
+        if y == 0:
+            raise os_error(3)
+        quotient = abs(x) // abs(y)
+        return to_word(quotient if (x < 0) == (y < 0) else -quotient)
+
+    def sqrt(self, ram, x):
+        if x < 0:
+            raise os_error(4)
+        return isqrt(x)
+
+    def max(self, ram, a, b):
+        return max(a, b)
+
+    def min(self, ram, a, b):
+        return min(a, b)
+
+    # Memory, first fit on a list of the free (address, size) blocks
+
+    def init_memory(self, ram=None):
+        self.free = [(HEAP_BASE, HEAP_END - HEAP_BASE)]
+        self.sizes = {}  # allocated address -> size
+
+    def peek(self, ram, address):
+        return ram[address & 0x7FFF]
+
+    def poke(self, ram, address, value):
+        ram[address & 0x7FFF] = value
+
+    def alloc(self, ram, size):
+        if size <= 0:
+            raise os_error(5)
+        for i, (address, length) in enumerate(self.free):
+            if length >= size:
+                if length == size:
+                    del self.free[i]
+                else:
+                    self.free[i] = (address + size, length - size)
+                self.sizes[address] = size
+                return address
+        raise os_error(6)
+
+    def de_alloc(self, ram, address):
+        size = self.sizes.pop(address, None)
+        if size is None:
+            return
+        free = self.free
+        i = 0
+        while i < len(free) and free[i][0] < address:
+            i += 1
+        free.insert(i, (address, size))
+        # merges with the next block, then with the previous one
+        if i + 1 < len(free) and address + size == free[i + 1][0]:
+            free[i] = (address, size + free.pop(i + 1)[1])
+        if i > 0 and free[i - 1][0] + free[i - 1][1] == address:
+            free[i - 1] = (free[i - 1][0], free[i - 1][1] + free.pop(i)[1])
+
+    # Array
+
+    def new_array(self, ram, size):
+        if size <= 0:
+            raise os_error(2)
+        return self.alloc(ram, size)
+
+    # String
+
+    def new_string(self, ram, max_length):
+        if max_length < 0:
+            raise os_error(14)
+        this = self.alloc(ram, max_length + 2)
+        ram[this] = max_length
+        ram[this + 1] = 0
+        return this
+
+    def string(self, ram, this):
+        """The Python string of a String."""
+        return "".join(map(chr, ram[this + 2 : this + 2 + ram[this + 1]]))
+
+    def length(self, ram, this):
+        return ram[this + 1]
+
+    def char_at(self, ram, this, j):
+        if not 0 <= j < ram[this + 1]:
+            raise os_error(15)
+        return ram[this + 2 + j]
+
+    def set_char_at(self, ram, this, j, c):
+        if not 0 <= j < ram[this + 1]:
+            raise os_error(16)
+        ram[this + 2 + j] = c
+
+    def append_char(self, ram, this, c):
+        length = ram[this + 1]
+        if length >= ram[this]:
+            raise os_error(17)
+        ram[this + 2 + length] = c
+        ram[this + 1] = length + 1
+        return this
+
+    def erase_last_char(self, ram, this):
+        if ram[this + 1] == 0:
+            raise os_error(18)
+        ram[this + 1] -= 1
+
+    def int_value(self, ram, this):
+        match = re.match(r"-?\d*", self.string(ram, this))
+        digits = match.group()
+        return to_word(int(digits)) if digits.strip("-") else 0
+
+    def set_int(self, ram, this, value):
+        digits = str(value)
+        if len(digits) > ram[this]:
+            raise os_error(19)
+        ram[this + 2 : this + 2 + len(digits)] = array("h", map(ord, digits))
+        ram[this + 1] = len(digits)
+
+    def new_line(self, ram):
+        return NEW_LINE
+
+    def backspace_char(self, ram):
+        return BACKSPACE
+
+    def double_quote(self, ram):
+        return DOUBLE_QUOTE
+
+    # Output, 23 rows of 64 characters of 8 x 11 pixels
+
+    def init_output(self, ram=None):
+        self.row = self.column = 0
+
+    def draw_char(self, ram, c):
+        bitmap = self.font.get(c if 32 <= c <= 126 else 0, [0] * 11)
+        address = SCREEN + self.row * 11 * 32 + self.column // 2
+        shift, keep = (8, 0x00FF) if self.column % 2 else (0, 0xFF00)
+        for line in bitmap:
+            ram[address] = to_word(ram[address] & keep | line << shift)
+            address += 32
+
+    def move_cursor(self, ram, i, j):
+        if not (0 <= i < ROWS and 0 <= j < COLUMNS):
+            raise os_error(20)
+        self.row, self.column = i, j
+        self.draw_char(ram, 32)
+
+    def print_char(self, ram, c):
+        if c == NEW_LINE:
+            return self.println(ram)
+        if c == BACKSPACE:
+            return self.backspace(ram)
+        self.draw_char(ram, c)
+        self.text += chr(c) if 32 <= c <= 126 else "?"
+        self.column += 1
+        if self.column == COLUMNS:
+            self.println(ram)
+
+    def print_string(self, ram, s):
+        for c in ram[s + 2 : s + 2 + ram[s + 1]]:
+            self.print_char(ram, c)
+
+    def print_int(self, ram, i):
+        for c in str(i):
+            self.print_char(ram, ord(c))
+
+    def println(self, ram):
+        self.text += "\n"
+        self.column = 0
+        self.row = (self.row + 1) % ROWS
+
+    def backspace(self, ram):
+        if self.column:
+            self.column -= 1
+        elif self.row:
+            self.row -= 1
+            self.column = COLUMNS - 1
+        self.text = self.text[:-1]
+
+    # Screen
+
+    def init_screen(self, ram=None):
+        self.color = True
+
+    def clear_screen(self, ram):
+        ram[SCREEN:KBD] = array("h", bytes(2 * (KBD - SCREEN)))
+
+    def set_color(self, ram, b):
+        self.color = bool(b)
+
+    def draw_pixel(self, ram, x, y):
+        if not (0 <= x < WIDTH and 0 <= y < HEIGHT):
+            raise os_error(7)
+        self.draw_bits(ram, SCREEN + y * 32 + x // 16, 1 << (x & 15))
+
+    def draw_bits(self, ram, address, mask):
+        value = ram[address] & 0xFFFF
+        value = value | mask if self.color else value & ~mask
+        ram[address] = to_word(value)
+
+    def draw_row(self, ram, y, x1, x2):
+        """Draws the pixels x1 to x2 of the row y, a word at a time."""
+        row = SCREEN + y * 32
+        for word in range(x1 // 16, x2 // 16 + 1):
+            low = max(x1 - word * 16, 0)
+            high = min(x2 - word * 16, 15)
+            self.draw_bits(ram, row + word, (2 << high) - (1 << low))
+
+    def draw_line(self, ram, x1, y1, x2, y2):
+        if not all(0 <= x < WIDTH for x in (x1, x2)) or not all(
+            0 <= y < HEIGHT for y in (y1, y2)
+        ):
+            raise os_error(8)
+        if y1 == y2:
+            self.draw_row(ram, y1, min(x1, x2), max(x1, x2))
+            return
+        # the algorithm of the book, a step right or down at a time
+        dx, dy = abs(x2 - x1), abs(y2 - y1)
+        sx = 1 if x2 >= x1 else -1
+        sy = 1 if y2 >= y1 else -1
+        a = b = diff = 0
+        while a <= dx and b <= dy:
+            x = x1 + sx * a
+            y = y1 + sy * b
+            self.draw_bits(ram, SCREEN + y * 32 + x // 16, 1 << (x & 15))
+            if diff < 0:
+                a += 1
+                diff += dy
+            else:
+                b += 1
+                diff -= dx
+
+    def draw_rectangle(self, ram, x1, y1, x2, y2):
+        if not (0 <= x1 <= x2 < WIDTH and 0 <= y1 <= y2 < HEIGHT):
+            raise os_error(9)
+        for y in range(y1, y2 + 1):
+            self.draw_row(ram, y, x1, x2)
+
+    def draw_circle(self, ram, x, y, r):
+        if not (0 <= x < WIDTH and 0 <= y < HEIGHT):
+            raise os_error(12)
+        if not 0 <= r <= 181:
+            raise os_error(13)
+        for dy in range(max(-r, -y), min(r, HEIGHT - 1 - y) + 1):
+            dx = isqrt(r * r - dy * dy)
+            left, right = max(x - dx, 0), min(x + dx, WIDTH - 1)
+            if left <= right:
+                self.draw_row(ram, y + dy, left, right)
+
+    # Keyboard
+
+    def init_keyboard(self, ram):
+        pass
+
+    def key_pressed(self, ram):
+        if ram[KBD]:
+            return ram[KBD]
+        if self.key_down:  # released after one read
+            self.key_down = False
+            return 0
+        if not self.keys:
+            return 0
+        self.key_down = True
+        return self.keys.popleft()
+
+    def read_char(self, ram):
+        if not self.keys:
+            raise Wait("Keyboard.readChar")
+        c = self.keys.popleft()
+        self.print_char(ram, c)
+        return c
+
+    def read_line(self, ram, message):
+        if NEW_LINE not in self.keys:
+            raise Wait("Keyboard.readLine")
+        self.print_string(ram, message)
+        line = []
+        while (c := self.keys.popleft()) != NEW_LINE:
+            self.print_char(ram, c)
+            if c == BACKSPACE:
+                line = line[:-1]
+            else:
+                line.append(c)
+        self.println(ram)
+        s = self.new_string(ram, len(line))
+        ram[s + 2 : s + 2 + len(line)] = array("h", line)
+        ram[s + 1] = len(line)
+        return s
+
+    def read_int(self, ram, message):
+        s = self.read_line(ram, message)
+        value = self.int_value(ram, s)
+        self.de_alloc(ram, s)
+        return value
+
+    # Sys
+
+    def halt(self, ram):
+        raise Halt()
+
+    def wait(self, ram, duration):
+        if duration < 0:
+            raise os_error(1)
+
+    def error(self, ram, code):
+        self.text += f"ERR{code}"
+        raise os_error(code)
+
+
+# Jack class -> Jack function -> method of NativeOS
+NATIVES = {
+    "Math": {
+        "init": "init_math",
+        "abs": "abs",
+        "multiply": "multiply",
+        "divide": "divide",
+        "sqrt": "sqrt",
+        "max": "max",
+        "min": "min",
+    },
+    "Memory": {
+        "init": "init_memory",
+        "peek": "peek",
+        "poke": "poke",
+        "alloc": "alloc",
+        "deAlloc": "de_alloc",
+    },
+    "Array": {"new": "new_array", "dispose": "de_alloc"},
+    "String": {
+        "new": "new_string",
+        "dispose": "de_alloc",
+        "length": "length",
+        "charAt": "char_at",
+        "setCharAt": "set_char_at",
+        "appendChar": "append_char",
+        "eraseLastChar": "erase_last_char",
+        "intValue": "int_value",
+        "setInt": "set_int",
+        "newLine": "new_line",
+        "backSpace": "backspace_char",
+        "doubleQuote": "double_quote",
+    },
+    "Output": {
+        "init": "init_output",
+        "moveCursor": "move_cursor",
+        "printChar": "print_char",
+        "printString": "print_string",
+        "printInt": "print_int",
+        "println": "println",
+        "backSpace": "backspace",
+    },
+    "Screen": {
+        "init": "init_screen",
+        "clearScreen": "clear_screen",
+        "setColor": "set_color",
+        "drawPixel": "draw_pixel",
+        "drawLine": "draw_line",
+        "drawRectangle": "draw_rectangle",
+        "drawCircle": "draw_circle",
+    },
+    "Keyboard": {
+        "init": "init_keyboard",
+        "keyPressed": "key_pressed",
+        "readChar": "read_char",
+        "readLine": "read_line",
+        "readInt": "read_int",
+    },
+    "Sys": {"halt": "halt", "wait": "wait", "error": "error"},
+}
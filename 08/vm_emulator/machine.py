@@ -0,0 +1,477 @@
+"""Emulator of the vm language.
+
+The vm files are loaded into one program in which every command is a small
+integer with its arguments already resolved: labels and functions become
+indexes in the program, and the static, temp and pointer entries become RAM
+addresses. The RAM has the layout of the Hack platform (SP, LCL, ARG, THIS,
+THAT, temp at 5, the statics from 16, the stack from 256), so that programs
+and memory dumps look as on the real computer.
+
+As the vm emulator of the course, the program starts at `Sys.init`, if there
+is one, with the stack pointer and the segments set in the RAM, without the
+bootstrap of the vm translator.
+
+Functions can be given native implementations in Python, see `jack_os` for
+the Jack OS. A call of a native function runs it in one step instead of
+running its vm code, which it replaces. In differential mode the vm code of
+the functions that have both runs as usual and every call also runs the
+native on a copy of the RAM, the return value and the heap and screen
+(RAM[2048:]) must be the same on return. The stack, the temp segment and the
+static variables are left out of the comparison, as a Jack implementation
+keeps its state there.
+"""
+from array import array
+
+__all__ = ["VirtualMachine", "VMError", "Halt", "Wait", "parse_program"]
+
+RAM_SIZE = 0x8000
+SP, LCL, ARG, THIS, THAT = range(5)
+TEMP = 5
+STATIC = 16
+STACK = 256
+HEAP = 2048
+
+# the initial value of the local variables
+ZEROS = array("h", bytes(2 * 0x8000))
+
+(
+    PUSH_CONSTANT,
+    PUSH_LOCAL,
+    PUSH_ARGUMENT,
+    PUSH_ADDRESS,  # static, temp and pointer
+    PUSH_THIS,
+    PUSH_THAT,
+    POP_ADDRESS,
+    POP_LOCAL,
+    POP_ARGUMENT,
+    POP_THIS,
+    POP_THAT,
+    ADD,
+    SUB,
+    NEG,
+    EQ,
+    GT,
+    LT,
+    AND,
+    OR,
+    NOT,
+    GOTO,
+    IF_GOTO,
+    CALL,
+    NATIVE,
+    CHECKED_CALL,  # call of a function checked against its native
+    FUNCTION,
+    RETURN,
+    MISSING,  # call of a function that is not in the program
+    HALT,  # after the last command
+) = range(29)
+
+ARITHMETIC = {
+    "add": ADD,
+    "sub": SUB,
+    "neg": NEG,
+    "eq": EQ,
+    "gt": GT,
+    "lt": LT,
+    "and": AND,
+    "or": OR,
+    "not": NOT,
+}
+PUSH_SEGMENTS = {
+    "local": PUSH_LOCAL,
+    "argument": PUSH_ARGUMENT,
+    "this": PUSH_THIS,
+    "that": PUSH_THAT,
+}
+POP_SEGMENTS = {
+    "local": POP_LOCAL,
+    "argument": POP_ARGUMENT,
+    "this": POP_THIS,
+    "that": POP_THAT,
+}
+
+
+class VMError(Exception):
+    pass
+
+
+class Halt(Exception):
+    """Raised by a native to halt the machine, with an error message or
+    without as Sys.halt."""
+
+    def __init__(self, error=None):
+        super().__init__(error)
+        self.error = error
+
+
+class Wait(Exception):
+    """Raised by a native that cannot run yet, as Keyboard.readChar without
+    input: the machine stops before the call, which runs again on the next
+    `run`."""
+
+
+def to_word(value):
+    """Wraps the integer around to the signed 16-bit range."""
+    return (value + 0x8000) % 0x10000 - 0x8000
+
+
+def parse(source_code):
+    """Yields the words of every vm command of the source code."""
+    for line in source_code.splitlines():
+        words = line.partition("//")[0].split()
+        if words:
+            yield words
+
+
+def parse_program(files, natives=None, differential=False):
+    """Returns the commands of the program made of the given (file name,
+    source code) pairs as three lists, the operation codes and the two
+    arguments of each command, and the index of every function.
+
+    The calls of the functions that have a native become NATIVE, or
+    CHECKED_CALL in differential mode if the program has the function."""
+    commands = []
+    statics = STATIC
+    for file_name, source_code in files:
+        file_statics = {}
+        function_name = ""
+        for words in parse(source_code):
+            command = words[0]
+            if command in ("push", "pop"):
+                segment, index = words[1], int(words[2])
+                if segment in ("static", "temp", "pointer"):
+                    if segment == "static":
+                        if index not in file_statics:
+                            file_statics[index] = statics
+                            statics += 1
+                        address = file_statics[index]
+                    else:
+                        address = (TEMP if segment == "temp" else THIS) + index
+                    words = [command, "address", address]
+                else:
+                    words = [command, segment, index]
+            elif command in ("label", "goto", "if-goto"):
+                words = [command, f"{function_name}${words[1]}"]
+            elif command == "function":
+                function_name = words[1]
+            commands.append((file_name, words))
+    if statics > STACK:
+        raise VMError(f"too many static variables: {statics - STATIC}")
+    # a label is not a command, it is the index of the next command
+    labels = {}
+    functions = {}
+    index = 0
+    for file_name, words in commands:
+        if words[0] == "label":
+            labels[words[1]] = index
+            continue
+        if words[0] == "function":
+            functions[words[1]] = index
+        index += 1
+    commands = [command for command in commands if command[1][0] != "label"]
+    opcodes, first, second = [], [], []
+    for file_name, words in commands:
+        opcode, x, y = resolve(words, labels, functions, file_name)
+        if natives and opcode in (CALL, MISSING) and words[1] in natives:
+            native = natives[words[1]]
+            if opcode == CALL and differential:
+                opcode, x = CHECKED_CALL, (x, words[1], native)
+            else:
+                opcode, x = NATIVE, native
+        opcodes.append(opcode)
+        first.append(x)
+        second.append(y)
+    if len(opcodes) > 0x7FFF:  # the return addresses are kept in the RAM
+        raise VMError(f"too many commands: {len(opcodes)}")
+    opcodes.append(HALT)
+    first.append(0)
+    second.append(0)
+    return opcodes, first, second, functions
+
+
+def resolve(words, labels, functions, file_name):
+    """Returns the operation code and the arguments of the command."""
+    command = words[0]
+    try:
+        if command in ARITHMETIC:
+            return ARITHMETIC[command], 0, 0
+        if command == "push":
+            segment, index = words[1], int(words[2])
+            if segment == "constant":
+                return PUSH_CONSTANT, to_word(index), 0
+            if segment == "address":
+                return PUSH_ADDRESS, index, 0
+            return PUSH_SEGMENTS[segment], index, 0
+        if command == "pop":
+            segment, index = words[1], int(words[2])
+            if segment == "address":
+                return POP_ADDRESS, index, 0
+            return POP_SEGMENTS[segment], index, 0
+        if command == "goto":
+            return GOTO, labels[words[1]], 0
+        if command == "if-goto":
+            return IF_GOTO, labels[words[1]], 0
+        if command == "function":
+            return FUNCTION, int(words[2]), 0
+        if command == "call":
+            if words[1] not in functions:
+                return MISSING, words[1], int(words[2])
+            return CALL, functions[words[1]], int(words[2])
+        if command == "return":
+            return RETURN, 0, 0
+    except (KeyError, IndexError, ValueError):
+        pass
+    raise VMError(f"{file_name}: invalid command {' '.join(map(str, words))!r}")
+
+
+class VirtualMachine:
+    """Runs a vm program on a Hack-like RAM.
+
+    `run` executes a number of vm commands and can be called again to
+    continue. The machine halts after the last command, on a return to an
+    address outside of the program and before the call of a function that
+    is not in the program, which sets `error`.
+
+    `natives` maps the names of functions to their native, a function of
+    the RAM and of the arguments of the call. A native halts the machine by
+    raising Halt, which sets `error` if it has one; the calls whose native
+    differs from the vm code in differential mode are listed in
+    `mismatches`.
+
+    SP, LCL and ARG are kept in local variables while running and written
+    back to the RAM when `run` returns.
+
+    With a `profile` (see `profiler`), the executions of every command are
+    counted in `profile.counts`, and the profile is told of the calls and
+    returns with the number of steps at which they happen.
+    """
+
+    profile = None
+
+    def __init__(self, files, natives=None, differential=False):
+        self.opcodes, self.first, self.second, self.functions = parse_program(
+            files, natives, differential
+        )
+        self.ram = array("h", bytes(2 * RAM_SIZE))
+        self.ram[SP] = STACK
+        self.ip = self.functions.get("Sys.init", 0)
+        self.steps = 0
+        self.error = None
+        self.checks = []  # (frame, name, arguments, native result, native RAM)
+        self.mismatches = []
+
+    @property
+    def halted(self):
+        return self.error is not None or not 0 <= self.ip < len(self.opcodes) - 1
+
+    def run(self, steps):
+        """Executes up to `steps` commands, returns the number executed.
+
+        Raises VMError, and sets `error`, when the stack grows past the end
+        of the RAM."""
+        if self.halted:
+            return 0
+        opcodes, first, second = self.opcodes, self.first, self.second
+        ram = self.ram
+        checks = self.checks
+        ip = self.ip
+        sp, lcl, arg = ram[SP], ram[LCL], ram[ARG]
+        profile = self.profile
+        counts = None if profile is None else profile.counts
+        n = 0
+        try:
+            while n < steps:
+                opcode = opcodes[ip]
+                x = first[ip]
+                if counts is not None:
+                    counts[ip] += 1
+                n += 1
+                ip += 1
+                # the operation codes are tested by group to keep the chain short
+                if opcode < POP_ADDRESS:
+                    if opcode == PUSH_CONSTANT:
+                        ram[sp] = x
+                    elif opcode == PUSH_LOCAL:
+                        ram[sp] = ram[lcl + x]
+                    elif opcode == PUSH_ARGUMENT:
+                        ram[sp] = ram[arg + x]
+                    elif opcode == PUSH_ADDRESS:
+                        ram[sp] = ram[x]
+                    elif opcode == PUSH_THIS:
+                        ram[sp] = ram[ram[THIS] + x]
+                    else:
+                        ram[sp] = ram[ram[THAT] + x]
+                    sp += 1
+                elif opcode < ADD:
+                    sp -= 1
+                    if opcode == POP_LOCAL:
+                        ram[lcl + x] = ram[sp]
+                    elif opcode == POP_ADDRESS:
+                        ram[x] = ram[sp]
+                    elif opcode == POP_ARGUMENT:
+                        ram[arg + x] = ram[sp]
+                    elif opcode == POP_THIS:
+                        ram[ram[THIS] + x] = ram[sp]
+                    else:
+                        ram[ram[THAT] + x] = ram[sp]
+                elif opcode < GOTO:
+                    if opcode == NOT:
+                        ram[sp - 1] = ~ram[sp - 1]
+                        continue
+                    if opcode == NEG:
+                        ram[sp - 1] = (32768 - ram[sp - 1] & 65535) - 32768
+                        continue
+                    sp -= 1
+                    if opcode == ADD:
+                        ram[sp - 1] = (ram[sp - 1] + ram[sp] + 32768 & 65535) - 32768
+                    elif opcode == SUB:
+                        ram[sp - 1] = (ram[sp - 1] - ram[sp] + 32768 & 65535) - 32768
+                    elif opcode == EQ:
+                        ram[sp - 1] = -(ram[sp - 1] == ram[sp])
+                    elif opcode == LT:
+                        ram[sp - 1] = -(ram[sp - 1] < ram[sp])
+                    elif opcode == GT:
+                        ram[sp - 1] = -(ram[sp - 1] > ram[sp])
+                    elif opcode == AND:
+                        ram[sp - 1] &= ram[sp]
+                    else:
+                        ram[sp - 1] |= ram[sp]
+                elif opcode == IF_GOTO:
+                    sp -= 1
+                    if ram[sp]:
+                        ip = x
+                elif opcode == GOTO:
+                    ip = x
+                elif opcode == CALL:
+                    ram[sp] = ip  # return address
+                    ram[sp + 1] = lcl
+                    ram[sp + 2] = arg
+                    ram[sp + 3] = ram[THIS]
+                    ram[sp + 4] = ram[THAT]
+                    arg = sp - second[ip - 1]  # the number of arguments
+                    sp += 5
+                    lcl = sp
+                    if profile is not None:
+                        profile.call(ip - 1, self.steps + n)
+                    ip = x
+                elif opcode == NATIVE:
+                    count = second[ip - 1]
+                    try:
+                        value = x(ram, *ram[sp - count : sp])
+                    except Wait:
+                        ip -= 1
+                        n -= 1
+                        if counts is not None:
+                            counts[ip] -= 1
+                        break
+                    except Halt as halt:
+                        if halt.error is None:
+                            ip = len(opcodes) - 1
+                        else:
+                            ip -= 1
+                            n -= 1
+                            if counts is not None:
+                                counts[ip] -= 1
+                            self.error = halt.error
+                        break
+                    sp -= count
+                    ram[sp] = (value + 32768 & 65535) - 32768 if value else 0
+                    sp += 1
+                    if profile is not None:
+                        profile.native(ip - 1, self.steps + n)
+                elif opcode == FUNCTION:
+                    if x:
+                        if sp + x > RAM_SIZE:  # the slice would grow the RAM
+                            raise IndexError
+                        ram[sp : sp + x] = ZEROS[:x]
+                        sp += x
+                elif opcode == RETURN:
+                    frame = lcl
+                    ip = ram[frame - 5]
+                    ram[arg] = ram[sp - 1]
+                    sp = arg + 1
+                    ram[THAT] = ram[frame - 1]
+                    ram[THIS] = ram[frame - 2]
+                    arg = ram[frame - 3]
+                    lcl = ram[frame - 4]
+                    if checks and checks[-1][0] == frame:
+                        self.check(ram[sp - 1])
+                    if profile is not None:
+                        profile.ret(self.steps + n)
+                    if not 0 <= ip < len(opcodes) - 1:
+                        break
+                elif opcode == CHECKED_CALL:
+                    x, name, native = x
+                    count = second[ip - 1]
+                    arguments = ram[sp - count : sp]
+                    expected = ram[:]
+                    try:
+                        value = native(expected, *arguments)
+                    except (Wait, Halt):
+                        pass  # only the vm code runs
+                    else:
+                        value = (value + 32768 & 65535) - 32768 if value else 0
+                        checks.append(
+                            (sp + 5, name, arguments.tolist(), value, expected)
+                        )
+                    ram[sp] = ip
+                    ram[sp + 1] = lcl
+                    ram[sp + 2] = arg
+                    ram[sp + 3] = ram[THIS]
+                    ram[sp + 4] = ram[THAT]
+                    arg = sp - count
+                    sp += 5
+                    lcl = sp
+                    if profile is not None:
+                        profile.call(ip - 1, self.steps + n)
+                    ip = x
+                else:  # HALT or MISSING
+                    ip -= 1
+                    n -= 1
+                    if counts is not None:
+                        counts[ip] -= 1
+                    if opcode == MISSING:
+                        self.error = f"call of the missing function {x}"
+                    break
+        except IndexError:
+            # the command at ip - 1 reached past the end of the RAM
+            ip -= 1
+            n -= 1
+            if counts is not None:
+                counts[ip] -= 1
+            self.error = (
+                f"{self.function_at(ip)}: RAM address out of range at command "
+                f"{ip}, stack overflow with SP = {sp}"
+            )
+            self.ip = ip
+            ram[SP], ram[LCL], ram[ARG] = to_word(sp), lcl, arg
+            self.steps += n
+            raise VMError(self.error) from None
+        self.ip = ip
+        ram[SP], ram[LCL], ram[ARG] = sp, lcl, arg
+        self.steps += n
+        return n
+
+    def function_at(self, command):
+        """The name of the function of the command."""
+        starts = [
+            (start, name) for name, start in self.functions.items() if start <= command
+        ]
+        return max(starts)[1] if starts else "(no function)"
+
+    def check(self, value):
+        """Compares the return of the vm code of a function with its native."""
+        frame, name, arguments, expected, expected_ram = self.checks.pop()
+        call = f"{name}({', '.join(map(str, arguments))})"
+        if value != expected:
+            self.mismatches.append(f"{call} returned {value}, native {expected}")
+        elif self.ram[HEAP:] != expected_ram[HEAP:]:
+            address = next(
+                address
+                for address in range(HEAP, RAM_SIZE)
+                if self.ram[address] != expected_ram[address]
+            )
+            self.mismatches.append(
+                f"{call} set RAM[{address}] to {self.ram[address]}, "
+                f"native {expected_ram[address]}"
+            )
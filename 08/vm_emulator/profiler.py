@@ -0,0 +1,129 @@
+"""Hot spots of a vm program running in the emulator: the executions of
+every command by function, by label and by line of the jack source, and by
+stack of calls, with the calls between the functions.
+
+    profile = Profile(vm, files, source_maps)
+    vm.run(1_000_000)
+    print(profile.report())
+    Path("pong.folded").write_text(profile.collapsed())
+
+The commands of a function after one of its labels belong to the label, as
+`PongGame.run$WHILE_EXP0`, those before its first label to the function. A
+call of a native function is one command, charged to the native in the
+stacks. The source maps are those the jack compiler writes with
+`--source-map`, which give the line of the jack statement of every line of
+the vm code of a class.
+
+The stacks are kept by `CallStacks` of the Hack emulator of ../../05, a call
+being charged to the caller and a return to the callee, and `collapsed`
+writes them in the format of flamegraph.pl.
+"""
+import sys
+from collections import Counter
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT_DIR / "05" / "hack_emulator"))
+
+from hotspots import CallStacks, function_table, table  # noqa: E402
+from machine import VMError  # noqa: E402
+
+__all__ = ["Profile"]
+
+
+class Profile:
+    """Profiles a `VirtualMachine` loaded from the given (file name, source
+    code) pairs, the steps run before being left out. `source_maps` maps
+    the file names to their source map."""
+
+    def __init__(self, vm, files, source_maps=None):
+        self.vm = vm
+        self.origins = []  # command -> (function, label, file name, vm line)
+        self.callees = {}  # command of a call -> called function
+        for file_name, source_code in files:
+            function = region = ""
+            for number, line in enumerate(source_code.splitlines(), 1):
+                words = line.partition("//")[0].split()
+                if not words:
+                    continue
+                if words[0] == "label":  # not a command
+                    region = f"{function}${words[1]}"
+                    continue
+                if words[0] == "function":
+                    function = region = words[1]
+                elif words[0] == "call":
+                    self.callees[len(self.origins)] = words[1]
+                self.origins.append((function, region, file_name, number))
+        if len(self.origins) != len(vm.opcodes) - 1:
+            raise VMError("the files are not those of the program of the vm")
+        self.source_maps = source_maps or {}
+        self.counts = [0] * len(vm.opcodes)
+        self.stacks = CallStacks((self.function(vm.ip),), vm.steps)
+        vm.profile = self
+
+    def function(self, command):
+        return self.origins[command][0] if command < len(self.origins) else ""
+
+    def call(self, command, steps):
+        self.stacks.call(self.callees[command], steps)
+
+    def native(self, command, steps):
+        self.stacks.call(self.callees[command], steps - 1)
+        self.stacks.ret(steps)
+
+    def ret(self, steps):
+        self.stacks.ret(steps)
+
+    def flush(self):
+        """Charges the current stack with the steps run since the last call
+        or return."""
+        self.stacks.switch(self.stacks.stack, self.vm.steps)
+
+    def functions(self):
+        """The calls and the exclusive and inclusive steps of every function."""
+        self.flush()
+        return self.stacks.functions()
+
+    def labels(self):
+        """The commands executed in every label, or function before its
+        first label."""
+        result = Counter()
+        for (_, region, _, _), count in zip(self.origins, self.counts):
+            if count:
+                result[region] += count
+        return result
+
+    def source_lines(self):
+        """The commands executed for every line of jack source, as
+        'Main.jack:12', of the files that have a source map."""
+        result = Counter()
+        for (_, _, file_name, number), count in zip(self.origins, self.counts):
+            source_map = self.source_maps.get(file_name)
+            if count and source_map:
+                line = source_map["lines"][number - 1]
+                if line is not None:
+                    result[f"{source_map['source']}:{line}"] += count
+        return result
+
+    def collapsed(self):
+        self.flush()
+        return self.stacks.collapsed()
+
+    def report(self, top=20):
+        """The text of the costliest functions, labels and jack lines."""
+        lines = function_table(self.functions(), top)
+        lines.append("")
+        lines += table(
+            "    commands label",
+            [(count, name) for name, count in self.labels().items()],
+            top,
+        )
+        source_lines = self.source_lines()
+        if source_lines:
+            lines.append("")
+            lines += table(
+                "    commands jack line",
+                [(count, name) for name, count in source_lines.items()],
+                top,
+            )
+        return "\n".join(lines)
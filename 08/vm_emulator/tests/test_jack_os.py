@@ -0,0 +1,205 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from jack_os import KBD, SYS_INIT, NativeOS
+from machine import VirtualMachine
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(ROOT_DIR / "11" / "jack_compiler"))
+
+from compiler import JackCompiler  # noqa: E402
+
+# a Jack implementation of some of the functions of Math
+MATH = """
+class Math {
+    function void init() { return; }
+
+    function int abs(int x) {
+        if (x < 0) { return -x; }
+        return x;
+    }
+
+    function int multiply(int x, int y) {
+        var int sum, shifted, bit;
+        let shifted = x;
+        let bit = 1;
+        while (~(bit = 0)) {
+            if (~((y & bit) = 0)) { let sum = sum + shifted; }
+            let shifted = shifted + shifted;
+            let bit = bit + bit;
+        }
+        return sum;
+    }
+
+    function int max(int a, int b) {
+        if (a > b) { return a; }
+        return b;
+    }
+
+    function int min(int a, int b) {
+        if (a < b) { return a; }
+        return b;
+    }
+}
+"""
+
+
+def compile_classes(*sources):
+    return [
+        (name, "\n".join(JackCompiler(source).compile())) for name, source in sources
+    ] + [SYS_INIT]
+
+
+def os_test(name):
+    """The classes of the test of the OS class of ../../12 and its expected
+    output."""
+    directory = ROOT_DIR / "12" / f"{name}Test"
+    cmp = (directory / f"{name}Test.cmp").read_text().splitlines()
+    expected = {
+        int(address): int(value)
+        for address, value in zip(
+            cmp[0].strip("|").replace("RAM[", "").replace("]", "").split("|"),
+            cmp[1].strip("|").split("|"),
+        )
+    }
+    return ("Main", (directory / "Main.jack").read_text()), expected
+
+
+def run(files, natives, differential=False):
+    vm = VirtualMachine(files, natives, differential)
+    vm.run(1_000_000)
+    assert vm.halted and vm.error is None
+    return vm
+
+
+@pytest.mark.parametrize("name", ["Math", "Memory", "Array"])
+def test_os_tests(name):
+    main, expected = os_test(name)
+    vm = run(compile_classes(main), NativeOS().functions())
+    assert {address: vm.ram[address] for address in expected} == expected
+
+
+def test_program_functions_are_replaced_by_natives():
+    main, expected = os_test("Math")
+    files = compile_classes(main, ("Math", MATH))
+    native = run(files, NativeOS().functions())
+    jack = run(files, NativeOS().functions(exclude=["Math.multiply"]))
+    assert jack.steps > native.steps
+    assert {address: jack.ram[address] for address in expected} == expected
+
+
+def test_differential_mode():
+    main, expected = os_test("Math")
+    vm = run(compile_classes(main, ("Math", MATH)), NativeOS().functions(), True)
+    assert vm.mismatches == []
+    assert {address: vm.ram[address] for address in expected} == expected
+
+
+def test_differential_mode_reports_the_return_values_that_differ():
+    main, _ = os_test("Math")
+    natives = NativeOS().functions()
+    natives["Math.max"] = lambda ram, a, b: b
+    vm = run(compile_classes(main, ("Math", MATH)), natives, True)
+    assert vm.mismatches == ["Math.max(123, -345) returned 123, native -345"]
+
+
+def test_differential_mode_reports_the_memory_effects_that_differ():
+    memory = """
+class Memory {
+    function void poke(int address, int value) {
+        var Array memory;
+        let memory[address + 1] = value;
+        return;
+    }
+}
+"""
+    main = "class Main { function void main() { do Memory.poke(8000, 7); return; } }"
+    files = compile_classes(("Main", main), ("Memory", memory))
+    vm = run(files, NativeOS().functions(), True)
+    assert vm.mismatches == ["Memory.poke(8000, 7) set RAM[8000] to 0, native 7"]
+
+
+def test_error_halts():
+    main = "class Main { function void main() { do Math.divide(1, 0); return; } }"
+    jack_os = NativeOS()
+    vm = VirtualMachine(compile_classes(("Main", main)), jack_os.functions())
+    vm.run(1000)
+    assert vm.halted and vm.error == "ERR3"
+
+
+def test_keyboard_waits_for_input():
+    main = """
+class Main {
+    function void main() {
+        do Output.printInt(Keyboard.readInt("n? ") * 2);
+        return;
+    }
+}
+"""
+    jack_os = NativeOS()
+    vm = VirtualMachine(compile_classes(("Main", main)), jack_os.functions())
+    vm.run(1000)
+    assert not vm.halted
+    jack_os.type("21\n")
+    vm.run(1000)
+    assert vm.halted and vm.error is None
+    assert jack_os.text == "n? 21\n42"
+
+
+def test_key_pressed_releases_the_key():
+    jack_os = NativeOS()
+    ram = VirtualMachine([]).ram
+    jack_os.type("ab")
+    pressed = [jack_os.key_pressed(ram) for _ in range(5)]
+    assert pressed == [ord("a"), 0, ord("b"), 0, 0]
+    ram[KBD] = 140
+    assert [jack_os.key_pressed(ram) for _ in range(2)] == [140, 140]
+
+
+def test_read_char_polling_key_pressed():
+    # readChar as in the Jack OS of ../../12, from keyPressed
+    main = """
+class Main {
+    function void main() {
+        var char c;
+        while (c = 0) { let c = Keyboard.keyPressed(); }
+        while (~(Keyboard.keyPressed() = 0)) {}
+        do Output.printChar(c);
+        let c = 0;
+        while (c = 0) { let c = Keyboard.keyPressed(); }
+        do Output.printChar(c);
+        return;
+    }
+}
+"""
+    jack_os = NativeOS()
+    jack_os.type("xy")
+    vm = VirtualMachine(compile_classes(("Main", main)), jack_os.functions())
+    vm.run(1000)
+    assert vm.halted and vm.error is None
+    assert jack_os.text == "xy"
+
+
+def test_output_draws_the_characters():
+    jack_os = NativeOS()
+    ram = VirtualMachine([]).ram
+    jack_os.print_char(ram, ord("B"))
+    jack_os.print_char(ram, ord("C"))
+    rows = [ram[0x4000 + 32 * row] for row in range(11)]
+    assert [row & 0xFF for row in rows] == jack_os.font[ord("B")]
+    assert [row >> 8 & 0xFF for row in rows] == jack_os.font[ord("C")]
+
+
+def test_screen():
+    jack_os = NativeOS()
+    ram = VirtualMachine([]).ram
+    jack_os.draw_rectangle(ram, 8, 1, 23, 2)
+    assert ram[0x4000 + 32] == -256 and ram[0x4000 + 33] == 0xFF
+    jack_os.set_color(ram, False)
+    jack_os.draw_pixel(ram, 15, 1)
+    assert ram[0x4000 + 32] == 0x7F00
+    jack_os.set_color(ram, True)
+    jack_os.draw_line(ram, 0, 4, 3, 7)  # a step down, then a step right
+    assert [ram[0x4000 + 32 * y] for y in range(4, 8)] == [1, 3, 6, 12]
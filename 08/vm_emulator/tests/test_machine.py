@@ -0,0 +1,95 @@
+import re
+from pathlib import Path
+
+import click
+import pytest
+
+import vm_emulator
+from machine import VirtualMachine, VMError
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+SEGMENTS = {"sp": 0, "local": 1, "argument": 2, "this": 3, "that": 4}
+TESTS = sorted(ROOT_DIR.glob("0[78]/*/*/*VME.tst"))
+
+
+def load(directory):
+    files = vm_emulator.files_to_process(directory)
+    return VirtualMachine((f.stem, f.read_text()) for f in files)
+
+
+@pytest.mark.parametrize("tst", TESTS, ids=lambda tst: tst.parent.name)
+def test_vm_emulator_scripts(tst):
+    """Runs the set, repeat and output-list statements of the script."""
+    script = tst.read_text()
+    vm = load(tst.parent)
+    for name, index, value in re.findall(r"set (\w+)(?:\[(\d+)\])? (-?\d+)", script):
+        if name == "RAM":
+            vm.ram[int(index)] = int(value)
+        elif index:
+            vm.ram[vm.ram[SEGMENTS[name]] + int(index)] = int(value)
+        else:
+            vm.ram[SEGMENTS[name]] = int(value)
+    steps = int(re.search(r"repeat (\d+)", script).group(1))
+    assert vm.run(steps) == steps
+    addresses = re.findall(r"RAM\[(\d+)\]%", script)
+    cmp = tst.with_name(tst.name.replace("VME.tst", ".cmp")).read_text()
+    expected = [
+        int(value)
+        for line in cmp.splitlines()[1::2]
+        for value in line.strip("|").split("|")
+    ]
+    assert [vm.ram[int(address)] for address in addresses] == expected
+
+
+def test_set_option():
+    assignments = ["0=261", "1=40000", "2=65535", "3=-1"]
+    assert vm_emulator.parse_assignments(None, None, assignments) == [
+        (0, 261),
+        (1, -25536),
+        (2, -1),
+        (3, -1),
+    ]
+    for assignment in ("foo", "1=x", "=1", "32768=1", "0=70000", "0=-32769"):
+        with pytest.raises(click.BadParameter):
+            vm_emulator.parse_assignments(None, None, [assignment])
+
+
+def test_vm_tests_are_found():
+    assert len(TESTS) == 11
+
+
+def test_missing_function_halts_before_the_call():
+    vm = VirtualMachine([("Main", "function Main.main 0\ncall Output.printInt 1")])
+    assert vm.run(10) == 1
+    assert vm.halted and vm.ip == 1
+    assert vm.error == "call of the missing function Output.printInt"
+
+
+@pytest.mark.parametrize(
+    "source, command",
+    [
+        ("function Main.main 0\ncall Main.main 0", 1),  # the frame of a call
+        ("function Main.main 0\ncall Main.f 0\nfunction Main.f 40000", 2),
+        ("function Main.main 0\nlabel L\npush constant 1\ngoto L", 1),
+    ],
+)
+def test_stack_overflow(source, command):
+    vm = VirtualMachine([("Main", source)])
+    with pytest.raises(VMError, match=f"at command {command}, stack overflow"):
+        vm.run(100_000)
+    assert vm.halted and vm.ip == command
+    assert vm.error.startswith(f"Main.{'f' if command == 2 else 'main'}: ")
+    assert len(vm.ram) == 0x8000
+
+
+def test_arithmetic_wraps_around():
+    source = "push constant 32767\npush constant 1\nadd\npush constant 0\nneg"
+    vm = VirtualMachine([("Main", source)])
+    vm.run(5)
+    assert list(vm.ram[256:258]) == [-32768, 0]
+    assert vm.halted
+
+
+def test_invalid_command():
+    with pytest.raises(VMError):
+        VirtualMachine([("Main", "goto NOWHERE")])
@@ -0,0 +1,100 @@
+import pytest
+
+from jack_os import NativeOS
+from machine import VirtualMachine, VMError
+from profiler import Profile
+from test_jack_os import MATH, compile_classes
+
+from compiler import JackCompiler
+
+MAIN = """
+class Main {
+    function void main() {
+        var int i, sum;
+        while (i < 10) {
+            let sum = sum + Math.max(i, 5);
+            let i = i + 1;
+        }
+        do Output.printInt(sum);
+        return;
+    }
+}
+"""
+
+
+def profile_run(files, source_maps=None):
+    vm = VirtualMachine(files, NativeOS().functions(exclude=["Math.max"]))
+    profile = Profile(vm, files, source_maps)
+    vm.run(100_000)
+    assert vm.halted and vm.error is None
+    return vm, profile
+
+
+def test_functions_and_stacks():
+    vm, profile = profile_run(compile_classes(("Main", MAIN), ("Math", MATH)))
+    functions = profile.functions()
+    assert functions["Sys.init"]["inclusive"] == vm.steps
+    assert functions["Math.max"]["calls"] == 10
+    assert functions["Output.printInt"] == {"calls": 1, "exclusive": 1, "inclusive": 1}
+    main = functions["Main.main"]
+    assert (
+        main["inclusive"] == main["exclusive"] + functions["Math.max"]["inclusive"] + 1
+    )
+    assert profile.stacks.edges["Main.main", "Math.max"] == 10
+    stacks = dict(line.rsplit(" ", 1) for line in profile.collapsed().splitlines())
+    assert (
+        int(stacks["Sys.init;Main.main;Math.max"]) == functions["Math.max"]["exclusive"]
+    )
+    assert sum(map(int, stacks.values())) == vm.steps
+
+
+def test_labels_count_every_command():
+    vm, profile = profile_run(compile_classes(("Main", MAIN), ("Math", MATH)))
+    labels = profile.labels()
+    assert sum(labels.values()) == sum(profile.counts) == vm.steps
+    # the 11 tests of the condition of the loop and its 10 iterations
+    assert labels["Main.main$WHILE0"] == 11 * 5 + 10 * 11
+    assert "Main.main$WHILE0" in profile.report()
+
+
+def test_source_lines():
+    jack = JackCompiler(MAIN, source_map=True)
+    files = [("Main", "\n".join(jack.compile()))] + compile_classes(("Math", MATH))
+    source_maps = {"Main": {"source": "Main.jack", "lines": jack.lines}}
+    vm, profile = profile_run(files, source_maps)
+    lines = profile.source_lines()
+    assert set(lines) == {f"Main.jack:{line}" for line in (3, 5, 6, 7, 9, 10)}
+    assert lines["Main.jack:7"] == 10 * 4  # push local 0, push constant 1, add, pop
+    functions = profile.functions()
+    # the call of the native is in Main.main, its step in the stacks is not
+    assert sum(lines.values()) == functions["Main.main"]["exclusive"] + 1
+    assert "Main.jack:7" in profile.report()
+
+
+def test_waiting_native_is_counted_once():
+    main = """
+class Main {
+    function void main() {
+        do Output.printInt(Keyboard.readInt("n? "));
+        return;
+    }
+}
+"""
+    jack_os = NativeOS()
+    files = compile_classes(("Main", main))
+    vm = VirtualMachine(files, jack_os.functions())
+    profile = Profile(vm, files)
+    vm.run(1000)
+    vm.run(1000)
+    jack_os.type("21\n")
+    vm.run(1000)
+    assert vm.halted
+    assert sum(profile.counts) == vm.steps
+    assert profile.functions()["Keyboard.readInt"]["calls"] == 1
+
+
+def test_files_of_another_program():
+    files = compile_classes(("Main", MAIN), ("Math", MATH))
+    vm = VirtualMachine(files)
+    with pytest.raises(VMError):
+        Profile(vm, files[:1])
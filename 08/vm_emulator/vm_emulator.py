@@ -0,0 +1,152 @@
+import click
+import json
+from pathlib import Path
+from jack_os import SYS_INIT, NativeOS
+from machine import RAM_SIZE, VirtualMachine, VMError, to_word
+from profiler import Profile
+
+
+def files_to_process(path: Path):
+    """Returns the path of the vm files in the given path if dir."""
+    if path.is_dir():
+        return sorted(d for d in path.iterdir() if d.suffix == ".vm")
+    else:
+        return [path] if path.suffix == ".vm" else []
+
+
+def parse_range(text):
+    """'16-20' -> range(16, 21), '256' -> range(256, 257)"""
+    first, _, last = text.partition("-")
+    return range(int(first), int(last or first) + 1)
+
+
+def parse_assignments(ctx, param, assignments):
+    """Callback of --set: '0=261' -> (0, 261), the value wrapped around to
+    16 bits, as 65535 for -1 in Hack notation."""
+    result = []
+    for assignment in assignments:
+        address, _, value = assignment.partition("=")
+        try:
+            address, value = int(address), int(value)
+        except ValueError:
+            raise click.BadParameter(f"{assignment!r} is not ADDRESS=VALUE") from None
+        if not 0 <= address < RAM_SIZE:
+            raise click.BadParameter(f"{address} is not a RAM address")
+        if not -0x8000 <= value <= 0xFFFF:
+            raise click.BadParameter(f"{value} does not fit in 16 bits")
+        result.append((address, to_word(value)))
+    return result
+
+
+@click.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--steps", "-n", default=1_000_000, help="Number of commands to run.")
+@click.option(
+    "--set",
+    "assignments",
+    multiple=True,
+    callback=parse_assignments,
+    help="Initial value of a RAM address, e.g. 0=261.",
+)
+@click.option(
+    "--dump",
+    multiple=True,
+    help="RAM addresses to print at the end, e.g. 0-4 or 256.",
+)
+@click.option(
+    "--native/--no-native",
+    default=True,
+    help="Run the functions of the Jack OS in Python.",
+)
+@click.option(
+    "--jack",
+    multiple=True,
+    help="Function or class of the OS to run from its vm code, e.g. Math.multiply.",
+)
+@click.option(
+    "--differential",
+    is_flag=True,
+    help="Check the vm code of the OS functions of the program against the natives.",
+)
+@click.option("--input", "keys", default="", help="Keys typed on the keyboard.")
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print the commands run by function, label and jack line (from the "
+    ".vmmap files of the compiler) at the end.",
+)
+@click.option(
+    "--collapsed",
+    type=click.Path(dir_okay=False),
+    help="Write the commands run by stack of calls to this file, for flamegraph.pl.",
+)
+def vm_emulate(
+    paths,
+    steps,
+    assignments,
+    dump,
+    native,
+    jack,
+    differential,
+    keys,
+    profile,
+    collapsed,
+):
+    """vm emulator"""
+    filenames = [fname for path in paths for fname in files_to_process(Path(path))]
+    if not filenames:
+        click.echo(f"Unable to detect vm files in the given paths: {' '.join(paths)}")
+        return
+    files = [(fname.stem, fname.read_text()) for fname in filenames]
+    natives = None
+    if native:
+        jack_os = NativeOS()
+        jack_os.type(keys.replace("\\n", "\n"))
+        natives = {
+            name: function
+            for name, function in jack_os.functions().items()
+            if name not in jack and name.partition(".")[0] not in jack
+        }
+        stems = {fname.stem for fname in filenames}
+        if "Main" in stems and "Sys" not in stems:
+            files.append(SYS_INIT)
+    try:
+        vm = VirtualMachine(files, natives, differential)
+    except VMError as error:
+        click.echo(f"Unable to load the program: {error}", err=True)
+        raise SystemExit(1)
+    for address, value in assignments:
+        vm.ram[address] = value
+    hot_spots = None
+    if profile or collapsed:
+        source_maps = {
+            fname.stem: json.loads(fname.with_suffix(".vmmap").read_text())
+            for fname in filenames
+            if fname.with_suffix(".vmmap").exists()
+        }
+        hot_spots = Profile(vm, files, source_maps)
+    try:
+        vm.run(steps)
+    except VMError:
+        pass  # reported with vm.error below
+    state = "halted" if vm.halted else "running"
+    click.echo(f"{vm.steps} commands, {state}")
+    for text in dump:
+        for address in parse_range(text):
+            click.echo(f"RAM[{address}] = {vm.ram[address]}")
+    if native and jack_os.text:
+        click.echo(jack_os.text)
+    if profile:
+        click.echo(hot_spots.report())
+    if collapsed:
+        Path(collapsed).write_text(hot_spots.collapsed())
+    for mismatch in vm.mismatches:
+        click.echo(f"Mismatch: {mismatch}", err=True)
+    if vm.error or vm.mismatches:
+        if vm.error:
+            click.echo(vm.error, err=True)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    vm_emulate()
@@ -0,0 +1,123 @@
+"""Compares the ROM size of the programs translated with the shared call,
+return and comparison subroutines and with the inline translation, each
+with and without the top of the stack kept in D (`stack_cache`), and the
+cycles that the test programs of 07 and 08 take on the emulator of
+../../05 to end, or to reach the final loop of Sys.init.
+
+The programs of ../../11 are compiled with the jack compiler; there is no
+operating system in vm code, so their size is the size of the game classes
+and they are not run.
+
+    $ python benchmarks/bench_size.py
+"""
+import re
+import sys
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from stack_cache import StackCachingTranslator  # noqa: E402
+from translator import VMTranslator  # noqa: E402
+import vm_translator  # noqa: E402
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 08/
+ROOT_DIR = PROJECT_DIR.parent
+
+
+def vm_program(directory):
+    return [(f.stem, f.read_text()) for f in vm_translator.files_to_process(directory)]
+
+
+def jack_program(directory):
+    sys.path.insert(0, str(ROOT_DIR / "11" / "jack_compiler"))
+    from compiler import JackCompiler
+
+    return [
+        (f.stem, "\n".join(JackCompiler(f.read_text()).compile()))
+        for f in sorted(directory.glob("*.jack"))
+    ]
+
+
+def rom_size(lines):
+    return sum(1 for line in lines if not line.startswith("("))
+
+
+def cycles(lines, ram):
+    """Runs the program until it ends, or reaches the final loop of
+    Sys.init or of the shared subroutines."""
+    sys.path.insert(0, str(ROOT_DIR / "05" / "hack_emulator"))
+    sys.path.insert(0, str(ROOT_DIR / "06" / "hack_assembler"))
+    import assembler
+    import emulator
+
+    symbols = assembler.symbol_table(lines)
+    end = next(
+        (
+            symbols[label]
+            for label in ("Sys.init$WHILE", "Sys.init$LOOP", "$END")
+            if label in symbols
+        ),
+        None,
+    )
+    computer = emulator.HackComputer(int(code, 2) for code in assembler.assemble(lines))
+    for address, value in ram.items():
+        computer.ram[address] = value
+    return computer.run(10_000_000, until=end)
+
+
+def test_ram(directory):
+    """The RAM set by the test script of the program."""
+    script = (directory / f"{directory.name}.tst").read_text()
+    return {
+        int(address): int(value)
+        for address, value in re.findall(r"set RAM\[(\d+)\] (-?\d+)", script)
+    }
+
+
+TRANSLATORS = {
+    "inline": lambda: VMTranslator(shared=False),
+    "shared": lambda: VMTranslator(),
+    "inline+cache": lambda: StackCachingTranslator(shared=False),
+    "shared+cache": lambda: StackCachingTranslator(),
+}
+
+
+@click.command()
+def bench():
+    runs = {
+        name: (vm_program(directory), test_ram(directory))
+        for name, directory in [
+            ("SimpleAdd", ROOT_DIR / "07" / "StackArithmetic" / "SimpleAdd"),
+            ("StackTest", ROOT_DIR / "07" / "StackArithmetic" / "StackTest"),
+            ("BasicTest", ROOT_DIR / "07" / "MemoryAccess" / "BasicTest"),
+            ("PointerTest", ROOT_DIR / "07" / "MemoryAccess" / "PointerTest"),
+            ("StaticTest", ROOT_DIR / "07" / "MemoryAccess" / "StaticTest"),
+            ("BasicLoop", PROJECT_DIR / "ProgramFlow" / "BasicLoop"),
+            ("FibonacciSeries", PROJECT_DIR / "ProgramFlow" / "FibonacciSeries"),
+            ("FibonacciElement", PROJECT_DIR / "FunctionCalls" / "FibonacciElement"),
+            ("NestedCall", PROJECT_DIR / "FunctionCalls" / "NestedCall"),
+            ("StaticsTest", PROJECT_DIR / "FunctionCalls" / "StaticsTest"),
+        ]
+    }
+    programs = {name: files for name, (files, _) in runs.items()}
+    for directory in sorted(ROOT_DIR.glob("11/*/")):
+        if any(directory.glob("*.jack")):
+            programs[directory.name] = jack_program(directory)
+    click.echo(f"{'program':<18}" + "".join(f"{name:>14}" for name in TRANSLATORS))
+    for name, files in programs.items():
+        bootstrap = any(file_name == "Sys" for file_name, _ in files)
+        translations = [
+            translator().translate(files, bootstrap)
+            for translator in TRANSLATORS.values()
+        ]
+        sizes = "".join(f"{rom_size(lines):>14}" for lines in translations)
+        click.echo(f"{name + ' ROM':<18}{sizes}")
+        if name in runs:
+            ram = runs[name][1]
+            counts = "".join(f"{cycles(lines, ram):>14}" for lines in translations)
+            click.echo(f"{name + ' cycles':<18}{counts}")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,212 @@
+"""Translation of vm code into Hack assembly keeping the top of the stack in D.
+
+The plain translation goes through the RAM for every value: a push writes
+it above the stack and the next command reads it back. Here the top of the
+stack stays in D across the commands of a straight-line sequence, the stack
+in the RAM holding the values below it, so that
+
+    push local 2        @LCL, A=M+1, A=A+1, D=M
+    push constant 1     D=D+1
+    add
+    pop local 2         @LCL, A=M+1, A=A+1, M=D
+
+never touches the stack. The value is written to the stack (spilled)
+before a push while D holds one, and before a label, a goto, a call and a
+return, where the stack must be in the RAM since the code may be reached
+from elsewhere. Besides:
+
+- a push followed by add, sub, and or or is an operand of the D register
+  (`push constant 5, add` is `@5, D=D+A`);
+- a comparison followed by if-goto, maybe with a `not` between them, is
+  one conditional jump on x - y, and if-goto jumps on D;
+- the entries of local, argument, this and that near their base are
+  reached by incrementing A, without going through D.
+
+The comparisons whose result is a value compute it in D, they are never
+shared subroutines; call and return are translated as with `VMTranslator`.
+"""
+from translator import (
+    ARITHMETIC,
+    COMPARISONS,
+    PUSH_D,
+    SEGMENT_POINTERS,
+    VMTranslator,
+)
+
+__all__ = ["StackCachingTranslator"]
+
+# the computation of D with the top of the stack in D and the operand in A
+# or M, for `push x, op`
+OPERATIONS = {"add": "D+{}", "sub": "D-{}", "and": "D&{}", "or": "D|{}"}
+# the computation of D with x in M and y in D, for `op` alone
+BINARY = {"add": "D+M", "sub": "M-D", "and": "D&M", "or": "D|M"}
+UNARY = {"neg": "D=-D", "not": "D=!D"}
+NEGATED = {"JEQ": "JNE", "JGT": "JLE", "JLT": "JGE"}
+
+# the largest index of a segment reached by incrementing A
+MAX_INCREMENTS = 8
+
+
+def consumed(following):
+    """Whether the next commands take the top of the stack from D."""
+    if following[:1] == ["push"]:
+        return following[1:2] != [] and (
+            following[1] in OPERATIONS or following[1] in COMPARISONS
+        )
+    return following[:1] != [] and (
+        following[0] in ("pop", "if-goto")
+        or following[0] in ARITHMETIC
+        or following[0] in COMPARISONS
+    )
+
+
+class StackCachingTranslator(VMTranslator):
+    """Translates the vm files of a program into one assembly program,
+    keeping the top of the stack in D."""
+
+    def __init__(self, shared=True):
+        super().__init__(shared)
+        self.cached = False  # whether D holds the top of the stack
+
+    def write_commands(self, commands):
+        index = 0
+        while index < len(commands):
+            index += self.write_sequence(commands[index : index + 4])
+        self.spill()
+
+    def spill(self):
+        """Writes the top of the stack from D to the RAM."""
+        if self.cached:
+            self.result += PUSH_D
+            self.cached = False
+
+    def top(self):
+        """Moves the top of the stack from the RAM to D."""
+        if not self.cached:
+            self.result += ["@SP", "AM=M-1", "D=M"]
+            self.cached = True
+
+    def write_sequence(self, commands):
+        """Writes the first commands, returns how many of them."""
+        words = commands[0]
+        command = words[0]
+        following = [c[0] for c in commands[1:]]
+        if command == "push":
+            segment, index = words[1], int(words[2])
+            if following[:1] and following[0] in OPERATIONS:
+                operand = self.operand(segment, index, OPERATIONS[following[0]])
+                if operand is not None:
+                    self.top()
+                    self.result += operand
+                    return 2
+            if following[:1] and following[0] in COMPARISONS:
+                operand = self.operand(segment, index, OPERATIONS["sub"])
+                if operand is not None:
+                    self.top()
+                    self.result += operand
+                    return 2 + self.write_comparison(
+                        COMPARISONS[following[0]], commands[2:]
+                    )
+            self.spill()
+            if segment == "constant" and index <= 1 and not consumed(following):
+                # written right to the stack, with no D to spill afterwards
+                self.write_push(segment, index)
+                return 1
+            self.result += self.load(segment, index)
+            self.cached = True
+        elif command == "pop":
+            self.write_pop(words[1], int(words[2]))
+        elif command in BINARY and self.cached:
+            self.result += ["@SP", "AM=M-1", f"D={BINARY[command]}"]
+        elif command in UNARY and self.cached:
+            self.result.append(UNARY[command])
+        elif command in ARITHMETIC:
+            self.result += ARITHMETIC[command]
+        elif command in COMPARISONS:
+            self.top()
+            self.result += ["@SP", "AM=M-1", "D=M-D"]
+            return 1 + self.write_comparison(COMPARISONS[command], commands[1:])
+        elif command == "if-goto":
+            self.top()
+            self.result += [f"@{self.label(words[1])}", "D;JNE"]
+            self.cached = False
+        else:
+            self.spill()
+            self.write(words)
+        return 1
+
+    def write_comparison(self, jump, commands):
+        """With x - y in D, jumps to the label of the if-goto that follows,
+        or sets D to the result. Returns the number of commands used."""
+        following = [c[0] for c in commands]
+        if following[:1] == ["if-goto"]:
+            label, used = commands[0][1], 1
+        elif following[:2] == ["not", "if-goto"]:
+            label, used, jump = commands[1][1], 2, NEGATED[jump]
+        else:
+            true, end = self.next_label("$CMP"), self.next_label("$CMP")
+            self.result += [f"@{true}", f"D;{jump}", "D=0", f"@{end}", "0;JMP"]
+            self.result += [f"({true})", "D=-1", f"({end})"]
+            self.cached = True
+            return 0
+        self.result += [f"@{self.label(label)}", f"D;{jump}"]
+        self.cached = False
+        return used
+
+    def direct_address(self, segment, index):
+        """Returns the instructions that set A to the address of the entry
+        without changing D, or None."""
+        if segment in SEGMENT_POINTERS:
+            pointer = SEGMENT_POINTERS[segment]
+            if index == 0:
+                return [f"@{pointer}", "A=M"]
+            if index <= MAX_INCREMENTS:
+                return [f"@{pointer}", "A=M+1"] + ["A=A+1"] * (index - 1)
+            return None
+        return self.address(segment, index)
+
+    def operand(self, segment, index, computation):
+        """Returns the instructions that compute D with the entry, or None
+        if it cannot be reached without D."""
+        if segment == "constant":
+            if index == 0 and computation in ("D+{}", "D-{}", "D|{}"):
+                return []
+            if index == 1 and computation in ("D+{}", "D-{}"):
+                return [f"D={computation.format('1')}"]
+            return [f"@{index}", f"D={computation.format('A')}"]
+        address = self.direct_address(segment, index)
+        if address is None:
+            return None
+        return address + [f"D={computation.format('M')}"]
+
+    def load(self, segment, index):
+        """Returns the instructions that set D to the entry."""
+        if segment == "constant":
+            return [f"D={index}"] if index <= 1 else [f"@{index}", "D=A"]
+        address = self.direct_address(segment, index)
+        if address is None or len(address) > 4:
+            address = self.address(segment, index)
+        return address + ["D=M"]
+
+    def write_pop(self, segment, index):
+        address = self.direct_address(segment, index)
+        if address is not None:
+            self.top()
+            self.result += address + ["M=D"]
+        elif not self.cached:
+            super().write_pop(segment, index)
+        else:
+            self.result += ["@R13", "M=D"]
+            self.result += self.address(segment, index)[:-1]
+            self.result += ["D=D+M", "@R14", "M=D", "@R13", "D=M", "@R14", "A=M", "M=D"]
+        self.cached = False
+
+    def write_function(self, name, local_count):
+        self.function_name = name
+        self.result.append(f"({name})")
+        if local_count < 3:
+            self.result += ["@SP", "AM=M+1", "A=A-1", "M=0"] * local_count
+            return
+        self.result += ["@SP", "A=M"]
+        self.result += ["M=0", "A=A+1"] * (local_count - 1)
+        self.result += ["M=0", "D=A+1", "@SP", "M=D"]
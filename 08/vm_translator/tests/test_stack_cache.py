@@ -0,0 +1,182 @@
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+from stack_cache import StackCachingTranslator
+from translator import VMTranslator
+import vm_translator
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 08/
+ROOT_DIR = PROJECT_DIR.parent
+sys.path.insert(0, str(ROOT_DIR / "05" / "hack_emulator"))
+sys.path.insert(0, str(ROOT_DIR / "06" / "hack_assembler"))
+import assembler  # noqa: E402
+import emulator  # noqa: E402
+
+TESTS = [
+    ROOT_DIR / "07" / "StackArithmetic" / "SimpleAdd",
+    ROOT_DIR / "07" / "StackArithmetic" / "StackTest",
+    ROOT_DIR / "07" / "MemoryAccess" / "BasicTest",
+    ROOT_DIR / "07" / "MemoryAccess" / "PointerTest",
+    ROOT_DIR / "07" / "MemoryAccess" / "StaticTest",
+    PROJECT_DIR / "ProgramFlow" / "BasicLoop",
+    PROJECT_DIR / "ProgramFlow" / "FibonacciSeries",
+    PROJECT_DIR / "FunctionCalls" / "SimpleFunction",
+    PROJECT_DIR / "FunctionCalls" / "NestedCall",
+    PROJECT_DIR / "FunctionCalls" / "FibonacciElement",
+    PROJECT_DIR / "FunctionCalls" / "StaticsTest",
+]
+
+
+def rom_size(lines):
+    return sum(1 for line in lines if not line.startswith("("))
+
+
+def run_test(directory, translator):
+    """Runs the program of the directory as its .tst script does, returns
+    the cycles and the values of its .cmp file with those of the RAM."""
+    files = [(f.stem, f.read_text()) for f in vm_translator.files_to_process(directory)]
+    bootstrap = any(name == "Sys" for name, _ in files)
+    lines = translator.translate(files, bootstrap)
+    computer = emulator.HackComputer(int(code, 2) for code in assembler.assemble(lines))
+    script = (directory / f"{directory.name}.tst").read_text()
+    for address, value in re.findall(r"set RAM\[(\d+)\] (-?\d+)", script):
+        computer.ram[int(address)] = int(value)
+    cycles = computer.run(int(re.search(r"repeat (\d+)", script)[1]))
+    compared = (directory / f"{directory.name}.cmp").read_text().splitlines()
+    expected, actual = {}, {}
+    for header, values in zip(compared[::2], compared[1::2]):
+        for name, value in zip(header.split("|")[1:-1], values.split("|")[1:-1]):
+            address = int(re.search(r"RAM\[(\d+)", name)[1])  # may be cut
+            expected[address] = int(value)
+            actual[address] = computer.ram[address]
+    return cycles, expected, actual
+
+
+@pytest.mark.parametrize("directory", TESTS, ids=lambda d: d.name)
+@pytest.mark.parametrize("shared", [True, False])
+def test_programs(directory, shared):
+    _, expected, actual = run_test(directory, StackCachingTranslator(shared))
+    assert actual == expected
+
+
+@pytest.mark.parametrize("directory", TESTS, ids=lambda d: d.name)
+def test_smaller_and_faster(directory):
+    files = [(f.stem, f.read_text()) for f in vm_translator.files_to_process(directory)]
+    for shared in (True, False):
+        plain = VMTranslator(shared).translate(files)
+        cached = StackCachingTranslator(shared).translate(files)
+        assert rom_size(cached) < rom_size(plain)
+    plain_cycles, _, _ = run_test(directory, VMTranslator(shared=False))
+    cached_cycles, _, _ = run_test(directory, StackCachingTranslator(shared=False))
+    assert cached_cycles <= plain_cycles
+
+
+def translate(source):
+    return StackCachingTranslator().translate([("Test", source)], bootstrap=False)
+
+
+def test_top_of_stack_stays_in_d():
+    source = "push local 2\npush constant 1\nadd\npop local 2"
+    assert translate(source) == [
+        "@LCL",
+        "A=M+1",
+        "A=A+1",
+        "D=M",
+        "D=D+1",
+        "@LCL",
+        "A=M+1",
+        "A=A+1",
+        "M=D",
+    ]
+
+
+def test_comparison_and_jump_are_fused():
+    source = "function F 0\nlabel L\npush local 0\npush local 1\nlt\nnot\nif-goto L"
+    assert translate(source) == [
+        "(F)",
+        "(F$L)",
+        "@LCL",
+        "A=M",
+        "D=M",
+        "@LCL",
+        "A=M+1",
+        "D=D-M",
+        "@F$L",
+        "D;JGE",
+    ]
+
+
+def test_top_is_spilled_at_labels_and_at_the_end():
+    lines = translate("push constant 7\nlabel L\npush constant 8\nneg")
+    assert lines == [
+        "@7",
+        "D=A",
+        "@SP",
+        "AM=M+1",
+        "A=A-1",
+        "M=D",
+        "(L)",
+        "@8",
+        "D=A",
+        "D=-D",
+        "@SP",
+        "AM=M+1",
+        "A=A-1",
+        "M=D",
+    ]
+
+
+def random_program(rng, length):
+    """Straight-line vm code with forward jumps, that keeps the stack
+    between 256 and 290."""
+    segments = ["local", "argument", "this", "that", "temp", "static", "constant"]
+    lines, depth, labels = ["function Test.f 0"], 0, 0
+    for _ in range(length):
+        choices = ["push"] * 3
+        if depth >= 1:
+            choices += ["pop", "neg", "not", "if-goto"]
+        if depth >= 2:
+            choices += ["add", "sub", "and", "or", "eq", "gt", "lt"] * 2
+        if depth > 30:
+            choices = ["pop"]
+        command = rng.choice(choices)
+        if command in ("push", "pop"):
+            segment = rng.choice(segments[:-1] if command == "pop" else segments)
+            index = rng.randrange(8 if segment == "temp" else 12)
+            if segment == "constant":
+                index = rng.randrange(32768)
+            lines.append(f"{command} {segment} {index}")
+            depth += 1 if command == "push" else -1
+        elif command == "if-goto":
+            lines += [f"if-goto L{labels}", "push constant 7", "pop temp 7"]
+            lines.append(f"label L{labels}")
+            labels += 1
+            depth -= 1
+        else:
+            lines.append(command)
+            depth -= command not in ("neg", "not")
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_same_results_as_the_plain_translation(seed):
+    source_code = random_program(random.Random(seed), 200)
+    rams = []
+    for translator in (VMTranslator(shared=False), StackCachingTranslator()):
+        lines = translator.translate([("Test", source_code)], bootstrap=False)
+        computer = emulator.HackComputer(
+            int(code, 2) for code in assembler.assemble(lines)
+        )
+        for address, value in enumerate([256, 300, 400, 3000, 3010]):
+            computer.ram[address] = value
+        computer.run(100_000)
+        assert computer.halted
+        ram = computer.ram.tolist()
+        # but the scratch registers and the values left above the stack
+        del ram[ram[0] : 300], ram[13:16]
+        rams.append(ram)
+    assert rams[0] == rams[1]
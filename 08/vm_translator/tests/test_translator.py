@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pytest
+
+from translator import VMTranslator
+import vm_translator
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 08/
+
+
+def program(name):
+    directory = PROJECT_DIR / "FunctionCalls" / name
+    return [(f.stem, f.read_text()) for f in vm_translator.files_to_process(directory)]
+
+
+def rom_size(lines):
+    return sum(1 for line in lines if not line.startswith("("))
+
+
+@pytest.mark.parametrize("name", ["FibonacciElement", "StaticsTest", "NestedCall"])
+def test_shared_subroutines_are_smaller(name):
+    shared = VMTranslator().translate(program(name))
+    inline = VMTranslator(shared=False).translate(program(name))
+    assert rom_size(shared) < rom_size(inline)
+    assert shared.count("($CALL)") == shared.count("($RETURN)") == 1
+    assert "($CALL)" not in inline
+
+
+def test_labels_are_unique():
+    lines = VMTranslator().translate(program("FibonacciElement"))
+    labels = [line for line in lines if line.startswith("(")]
+    assert len(labels) == len(set(labels))
+    assert "(Main.fibonacci$IF_TRUE)" in labels
+
+
+def test_comparisons_share_one_subroutine_each():
+    source = "push constant 1\npush constant 2\nlt\npush constant 3\nlt\neq"
+    lines = VMTranslator().translate([("Test", source)], bootstrap=False)
+    assert [line for line in lines if line in ("($EQ)", "($GT)", "($LT)")] == [
+        "($EQ)",
+        "($LT)",
+    ]
+    # the program stops before the subroutines
+    assert lines[lines.index("($END)") : lines.index("($END)") + 3] == [
+        "($END)",
+        "@$END",
+        "0;JMP",
+    ]
+
+
+def test_unknown_command():
+    with pytest.raises(SyntaxError):
+        VMTranslator().translate([("Test", "push constant 1\nmul")], bootstrap=False)
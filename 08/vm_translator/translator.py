@@ -0,0 +1,262 @@
+"""Translation of vm code into Hack assembly.
+
+By default `call`, `return`, `eq`, `gt` and `lt` are translated into a jump
+to a subroutine that is written once at the end of the program, instead of
+being expanded at every use, which makes the programs much smaller for a
+few more cycles per operation. `shared=False` gives the usual translation
+with everything expanded inline.
+
+The subroutines use R13, R14 and R15 as scratch registers, as the inline
+translation does.
+"""
+__all__ = ["VMTranslator", "parse"]
+
+SEGMENT_POINTERS = {"local": "LCL", "argument": "ARG", "this": "THIS", "that": "THAT"}
+SEGMENT_BASES = {"temp": 5, "pointer": 3}
+
+ARITHMETIC = {
+    "add": ["@SP", "AM=M-1", "D=M", "A=A-1", "M=D+M"],
+    "sub": ["@SP", "AM=M-1", "D=M", "A=A-1", "M=M-D"],
+    "and": ["@SP", "AM=M-1", "D=M", "A=A-1", "M=D&M"],
+    "or": ["@SP", "AM=M-1", "D=M", "A=A-1", "M=D|M"],
+    "neg": ["@SP", "A=M-1", "M=-M"],
+    "not": ["@SP", "A=M-1", "M=!M"],
+}
+COMPARISONS = {"eq": "JEQ", "gt": "JGT", "lt": "JLT"}
+
+# pushes D
+PUSH_D = ["@SP", "AM=M+1", "A=A-1", "M=D"]
+
+
+def parse(source_code):
+    """Yields the words of every vm command of the source code."""
+    for line in source_code.splitlines():
+        words = line.partition("//")[0].split()
+        if words:
+            yield words
+
+
+def compare(jump, label):
+    """Replaces the two values on top of the stack by the comparison of
+    the first one with the second one."""
+    return [
+        "@SP",
+        "AM=M-1",
+        "D=M",
+        "A=A-1",
+        "D=M-D",
+        "M=-1",
+        f"@{label}",
+        f"D;{jump}",
+        "@SP",
+        "A=M-1",
+        "M=0",
+        f"({label})",
+    ]
+
+
+def save_frame(arg_count):
+    """Pushes the return address in D and the frame of the caller, then
+    sets ARG and LCL for the callee. `arg_count` is an instruction that sets
+    D to the number of arguments."""
+    result = list(PUSH_D)
+    for pointer in ("LCL", "ARG", "THIS", "THAT"):
+        result += [f"@{pointer}", "D=M"] + PUSH_D
+    result += ["@SP", "D=M", "@LCL", "M=D"]  # LCL = SP
+    result += arg_count + ["@5", "D=D+A", "@LCL", "D=M-D", "@ARG", "M=D"]
+    return result
+
+
+RESTORE_FRAME = [
+    "@LCL",
+    "D=M",
+    "@R13",
+    "M=D",  # frame
+    "@5",
+    "A=D-A",
+    "D=M",
+    "@R14",
+    "M=D",  # return address
+    "@SP",
+    "AM=M-1",
+    "D=M",
+    "@ARG",
+    "A=M",
+    "M=D",  # *ARG = return value
+    "@ARG",
+    "D=M+1",
+    "@SP",
+    "M=D",  # SP = ARG + 1
+    *(
+        instruction
+        for pointer in ("THAT", "THIS", "ARG", "LCL")
+        for instruction in ("@R13", "AM=M-1", "D=M", f"@{pointer}", "M=D")
+    ),
+    "@R14",
+    "A=M",
+    "0;JMP",
+]
+
+
+class VMTranslator:
+    """Translates the vm files of a program into one assembly program."""
+
+    def __init__(self, shared=True):
+        self.shared = shared
+        self.result = []
+        self.file_name = ""
+        self.function_name = ""
+        self.labels = 0
+        self.subroutines = set()  # the shared subroutines in use
+
+    def next_label(self, prefix):
+        self.labels += 1
+        return f"{prefix}.{self.labels}"
+
+    def translate(self, files, bootstrap=True):
+        """Returns the assembly lines of the program made of the given
+        (file name, source code) pairs."""
+        if bootstrap:
+            self.result += ["@256", "D=A", "@SP", "M=D"]
+            self.write_call("Sys.init", 0)
+        for file_name, source_code in files:
+            self.file_name = file_name
+            self.write_commands(list(parse(source_code)))
+        if self.subroutines:
+            # keeps the cpu from running into the subroutines
+            self.result += ["($END)", "@$END", "0;JMP"]
+            for name in sorted(self.subroutines):
+                self.result.append(f"(${name.upper()})")
+                self.result += getattr(self, f"{name}_subroutine")()
+        return self.result
+
+    def write_commands(self, commands):
+        """Writes the commands of a file."""
+        for words in commands:
+            self.write(words)
+
+    def write(self, words):
+        command = words[0]
+        if command in ARITHMETIC:
+            self.result += ARITHMETIC[command]
+        elif command in COMPARISONS:
+            if self.shared:
+                self.jump_to_subroutine(command)
+            else:
+                self.result += compare(COMPARISONS[command], self.next_label("$CMP"))
+        elif command == "push":
+            self.write_push(words[1], int(words[2]))
+        elif command == "pop":
+            self.write_pop(words[1], int(words[2]))
+        elif command == "label":
+            self.result.append(f"({self.label(words[1])})")
+        elif command == "goto":
+            self.result += [f"@{self.label(words[1])}", "0;JMP"]
+        elif command == "if-goto":
+            self.result += ["@SP", "AM=M-1", "D=M", f"@{self.label(words[1])}", "D;JNE"]
+        elif command == "function":
+            self.write_function(words[1], int(words[2]))
+        elif command == "call":
+            self.write_call(words[1], int(words[2]))
+        elif command == "return":
+            if self.shared:
+                self.subroutines.add("return")
+                self.result += ["@$RETURN", "0;JMP"]
+            else:
+                self.result += RESTORE_FRAME
+        else:
+            raise SyntaxError(f"{self.file_name}: unknown command {' '.join(words)!r}")
+
+    def label(self, name):
+        return f"{self.function_name}${name}" if self.function_name else name
+
+    def address(self, segment, index):
+        """Returns the instructions that set A to the address of the entry."""
+        if segment in SEGMENT_POINTERS:
+            pointer = SEGMENT_POINTERS[segment]
+            if index == 0:
+                return [f"@{pointer}", "A=M"]
+            return [f"@{index}", "D=A", f"@{pointer}", "A=D+M"]
+        if segment in SEGMENT_BASES:
+            return [f"@R{SEGMENT_BASES[segment] + index}"]
+        if segment == "static":
+            return [f"@{self.file_name}.{index}"]
+        raise SyntaxError(f"{self.file_name}: unknown segment {segment!r}")
+
+    def write_push(self, segment, index):
+        if segment == "constant":
+            if index <= 1:
+                self.result += ["@SP", "AM=M+1", "A=A-1", f"M={index}"]
+                return
+            self.result += [f"@{index}", "D=A"]
+        else:
+            self.result += self.address(segment, index) + ["D=M"]
+        self.result += PUSH_D
+
+    def write_pop(self, segment, index):
+        address = self.address(segment, index)
+        if len(address) == 1 or (index == 0 and segment in SEGMENT_POINTERS):
+            self.result += ["@SP", "AM=M-1", "D=M"] + address + ["M=D"]
+            return
+        self.result += address[:-1] + ["D=D+M", "@R13", "M=D"]
+        self.result += ["@SP", "AM=M-1", "D=M", "@R13", "A=M", "M=D"]
+
+    def write_function(self, name, local_count):
+        self.function_name = name
+        self.result.append(f"({name})")
+        for _ in range(local_count):
+            self.result += ["@SP", "AM=M+1", "A=A-1", "M=0"]
+
+    def write_call(self, name, arg_count):
+        return_address = self.next_label(f"{self.function_name or name}$ret")
+        if self.shared:
+            self.subroutines.add("call")
+            # R13 = callee, R14 = number of arguments, D = return address
+            self.result += [f"@{name}", "D=A", "@R13", "M=D"]
+            if arg_count <= 1:
+                self.result += ["@R14", f"M={arg_count}"]
+            else:
+                self.result += [f"@{arg_count}", "D=A", "@R14", "M=D"]
+            self.result += [f"@{return_address}", "D=A", "@$CALL", "0;JMP"]
+        else:
+            self.result += [f"@{return_address}", "D=A"]
+            self.result += save_frame([f"@{arg_count}", "D=A"])
+            self.result += [f"@{name}", "0;JMP"]
+        self.result.append(f"({return_address})")
+
+    def jump_to_subroutine(self, name):
+        """Calls the shared subroutine, with the return address in D."""
+        self.subroutines.add(name)
+        return_address = self.next_label(f"${name.upper()}$ret")
+        self.result += [f"@{return_address}", "D=A", f"@${name.upper()}", "0;JMP"]
+        self.result.append(f"({return_address})")
+
+    # the shared subroutines
+
+    def call_subroutine(self):
+        return save_frame(["@R14", "D=M"]) + ["@R13", "A=M", "0;JMP"]
+
+    def return_subroutine(self):
+        return list(RESTORE_FRAME)
+
+    def comparison_subroutine(self, name):
+        label = f"${name.upper()}$end"
+        # the return address is kept in R15 during the comparison
+        return (
+            ["@R15", "M=D"]
+            + compare(COMPARISONS[name], label)
+            + [
+                "@R15",
+                "A=M",
+                "0;JMP",
+            ]
+        )
+
+    def eq_subroutine(self):
+        return self.comparison_subroutine("eq")
+
+    def gt_subroutine(self):
+        return self.comparison_subroutine("gt")
+
+    def lt_subroutine(self):
+        return self.comparison_subroutine("lt")
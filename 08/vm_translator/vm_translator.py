@@ -0,0 +1,63 @@
+import click
+from pathlib import Path
+from stack_cache import StackCachingTranslator
+from translator import VMTranslator
+
+
+def files_to_process(path: Path):
+    """Returns the path of the vm files in the given path if dir."""
+    if path.is_dir():
+        return sorted(d for d in path.iterdir() if d.suffix == ".vm")
+    else:
+        return [path] if path.suffix == ".vm" else []
+
+
+def output_file(path: Path):
+    """Dir/Dir.asm for a directory, File.asm for a file."""
+    return path / f"{path.name}.asm" if path.is_dir() else path.with_suffix(".asm")
+
+
+@click.command()
+@click.argument("path", type=click.Path(exists=True))
+@click.option(
+    "--inline",
+    is_flag=True,
+    help="Expand call, return, eq, gt and lt at every use instead of sharing "
+    "one subroutine for each.",
+)
+@click.option(
+    "--stack-cache",
+    is_flag=True,
+    help="Keep the top of the stack in D and fuse the common sequences of "
+    "commands, for a smaller and faster program.",
+)
+@click.option(
+    "--bootstrap/--no-bootstrap",
+    default=None,
+    help="Whether to start with SP=256 and call Sys.init. By default only if "
+    "there is a Sys.vm.",
+)
+def vm_translate(path, inline=False, stack_cache=False, bootstrap=None):
+    """translator"""
+    path = Path(path)
+    filenames = files_to_process(path)
+    if not filenames:
+        click.echo(f"Unable to detect vm files in the given path: {path}")
+        return
+    if bootstrap is None:
+        bootstrap = any(fname.name == "Sys.vm" for fname in filenames)
+    files = [(fname.stem, fname.read_text()) for fname in filenames]
+    try:
+        translator = StackCachingTranslator if stack_cache else VMTranslator
+        result = translator(shared=not inline).translate(files, bootstrap)
+    except SyntaxError as error:
+        click.echo(f"Unable to translate {path}: {error}", err=True)
+        raise SystemExit(1)
+    with open(output_file(path), "w") as stream:
+        for line in result:
+            stream.write(line)
+            stream.write("\n")
+
+
+if __name__ == "__main__":
+    vm_translate()
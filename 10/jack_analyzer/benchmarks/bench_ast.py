@@ -0,0 +1,70 @@
+"""Measures the memory per node and the throughput of the syntax tree front
+end shared by the analyzer and the compiler.
+
+    $ python benchmarks/bench_ast.py --statements 2000
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3] / "11" / "jack_compiler"))
+import compiler  # noqa: E402
+import jack_ast  # noqa: E402
+import parser  # noqa: E402
+import tokenizer  # noqa: E402
+from bench_parser import synthetic_class  # noqa: E402
+
+
+def count_nodes(node):
+    """Returns the number of nodes of the tree."""
+    count = 1
+    for name in node.__slots__:
+        value = getattr(node, name)
+        children = value if isinstance(value, list) else [value]
+        for child in children:
+            if isinstance(child, jack_ast.Node):
+                count += count_nodes(child)
+    return count
+
+
+def best_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@click.command()
+@click.option("--statements", default=2000, help="statement blocks of the synthetic class")
+@click.option("--repeat", default=3, help="number of timed runs")
+def bench(statements, repeat):
+    source = synthetic_class(statements)
+    tokens = sum(1 for _ in tokenizer.scan(source))
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = jack_ast.parse(source)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    nodes = count_nodes(tree)
+    click.echo(f"tree: {tokens} tokens, {nodes} nodes, {size / nodes:.1f} bytes/node")
+
+    timings = {
+        "parse": best_time(lambda: jack_ast.parse(source), repeat),
+        "xml": best_time(lambda: parser.XmlEmitter([]).emit(tree), repeat),
+        "compile": best_time(lambda: compiler.JackCompiler(source).compile(), repeat),
+    }
+    for phase, seconds in timings.items():
+        click.echo(f"{phase}: {seconds:.3f}s, {tokens / seconds / 1000:.0f}k tokens/s")
+
+
+if __name__ == "__main__":
+    bench()
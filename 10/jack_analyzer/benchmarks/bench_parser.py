@@ -0,0 +1,70 @@
+"""Times `jack_ast.parse_class` and the xml emission on synthetic classes of
+growing size to show that parse time grows linearly with the token count.
+
+    $ python benchmarks/bench_parser.py --steps 5
+"""
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import jack_ast  # noqa: E402
+import parser  # noqa: E402
+import tokenizer  # noqa: E402
+
+STATEMENTS = """\
+        let x = x + (y * 2) - a[i];
+        let a[i] = Math.max(x, -y);
+        if (x < y) {
+            do Output.printString("less");
+        } else {
+            let y = ~y;
+        }
+        while (i > 0) {
+            let i = i - 1;
+        }
+"""
+
+
+def synthetic_class(statements):
+    """Returns a class with one function holding `statements` copies of a
+    block of statements."""
+    return (
+        "class Main {\n"
+        "    function void main() {\n"
+        "        var int x, y, i;\n"
+        "        var Array a;\n"
+        + STATEMENTS * statements
+        + "        return;\n"
+        "    }\n"
+        "}\n"
+    )
+
+
+@click.command()
+@click.option("--start", default=500, help="number of statement blocks of the first step")
+@click.option("--steps", default=5, help="number of times the size is doubled")
+@click.option("--repeat", default=3, help="number of timed runs per step")
+def bench(start, steps, repeat):
+    for step in range(steps):
+        tokens = list(tokenizer.scan(synthetic_class(start * 2 ** step)))
+        timings = []
+        for _ in range(repeat):
+            stream = tokenizer.TokenStream(tokens)
+            begin = time.perf_counter()
+            tree = jack_ast.parse_class(stream)
+            parsed = time.perf_counter()
+            parser.XmlEmitter([]).emit(tree)
+            timings.append((parsed - begin, time.perf_counter() - parsed))
+        parse_time = min(t for t, _ in timings)
+        emit_time = min(t for _, t in timings)
+        click.echo(
+            f"parse: {len(tokens):>8} tokens, best {parse_time:.3f}s, "
+            f"{parse_time / len(tokens) * 1e6:.2f} us/token, "
+            f"xml {emit_time / len(tokens) * 1e6:.2f} us/token"
+        )
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,57 @@
+"""Times `tokenizer.tokenize` on a large source built from the Jack corpus.
+
+    $ python benchmarks/bench_tokenizer.py --size 2
+"""
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import tokenizer  # noqa: E402
+
+CORPUS_DIRS = ("09", "10", "11", "12")
+
+
+def corpus_sources(root: Path):
+    """Returns the contents of every jack file under the corpus directories."""
+    return [
+        path.read_text()
+        for name in CORPUS_DIRS
+        for path in sorted((root / name).glob("**/*.jack"))
+    ]
+
+
+def large_source(sources, size):
+    """Concatenates the corpus until the result is at least `size` bytes."""
+    chunks = []
+    length = 0
+    while length < size:
+        for source in sources:
+            chunks.append(source)
+            length += len(source)
+    return "\n".join(chunks)
+
+
+@click.command()
+@click.option("--size", default=2.0, help="size of the source in MB")
+@click.option("--repeat", default=5, help="number of timed runs")
+def bench(size, repeat):
+    root = Path(__file__).resolve().parents[3]
+    source = large_source(corpus_sources(root), int(size * 1024 * 1024))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = tokenizer.tokenize(source)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    megabytes = len(source) / (1024 * 1024)
+    click.echo(
+        f"tokenize: {megabytes:.2f} MB, {len(tokens)} tokens, "
+        f"best {best:.3f}s, {megabytes / best:.2f} MB/s"
+    )
+
+
+if __name__ == "__main__":
+    bench()
@@ -1,7 +1,13 @@
 import click
+import jack_ast
+import os
+import time
 import tokenizer
 import parser
+from contextlib import contextmanager
 from pathlib import Path
+from profiling import NO_PROFILER, PhaseProfiler
+from watching import DEFAULT_INTERVAL, Watcher
 
 
 @click.group()
@@ -17,42 +23,175 @@ def files_to_process(path: Path):
         return [path] if path.suffix == ".jack" else []
 
 
-@jack_analyzer.command()
-@click.argument("path", type=click.Path(exists=True))
-def tokenize(path):
-    """tokenizer"""
-    filenames = files_to_process(Path(path))
-    if not filenames:
-        click.echo(f"Unable to detect jack files in the given path: {path}")
+def profile_options(command):
+    """Adds the --profile and --profile-stats options to the command."""
+    command = click.option(
+        "--profile-stats",
+        type=click.Path(dir_okay=False),
+        help="Write the cProfile statistics of the main phase to this file.",
+    )(command)
+    return click.option(
+        "--profile",
+        type=click.Path(dir_okay=False),
+        help="Write the time and peak memory of each phase as JSON to this file.",
+    )(command)
+
+
+def profiler_for(profile, profile_stats, hot_phase):
+    if not (profile or profile_stats):
+        return NO_PROFILER
+    return PhaseProfiler(hot_phase if profile_stats else None)
+
+
+def write_profile(profiler, profile, profile_stats):
+    if profile:
+        profiler.write(Path(profile))
+    if profile_stats:
+        profiler.dump_stats(Path(profile_stats))
+
+
+def watch_options(command):
+    """Adds the --watch and --interval options to the command."""
+    command = click.option(
+        "--interval",
+        default=DEFAULT_INTERVAL,
+        type=click.FloatRange(min=0),
+        help="Seconds between two polls of the files with --watch.",
+    )(command)
+    return click.option(
+        "--watch",
+        is_flag=True,
+        help="Keep running and process again every jack file that changes.",
+    )(command)
+
+
+def process_watched(fname, process_file):
+    """Processes the file, reporting an error instead of raising it, since
+    the next change may fix it."""
+    start = time.perf_counter()
+    try:
+        process_file(fname, NO_PROFILER)
+    except Exception as error:
+        click.echo(
+            f"Unable to process {fname}: {type(error).__name__}: {error}", err=True
+        )
         return
-    for fname in filenames:
+    click.echo(f"{fname}: {1000 * (time.perf_counter() - start):.1f} ms")
+
+
+def process_paths(paths, process_file, profiler, watch, interval):
+    """Processes the jack files of the paths and, with `watch`, those that
+    change afterwards until interrupted."""
+    if watch and profiler.enabled:
+        raise click.UsageError("--watch cannot be used with --profile")
+    # the files are polled from before the first pass, which misses none of
+    # the changes made meanwhile
+    watcher = Watcher(paths) if watch else None
+    for path in paths:
+        filenames = files_to_process(Path(path))
+        if not filenames:
+            click.echo(f"Unable to detect jack files in the given path: {path}")
+        for fname in filenames:
+            if watch:
+                process_watched(fname, process_file)
+            else:
+                process_file(fname, profiler)
+    if not watch:
+        return
+    click.echo(f"Watching {', '.join(paths)}, press Ctrl-C to stop")
+    try:
+        for changed in watcher.watch(interval):
+            for fname in changed:
+                process_watched(fname, process_file)
+    except KeyboardInterrupt:
+        pass
+
+
+class LineWriter:
+    """Writes every appended line to the stream as soon as it is appended."""
+
+    def __init__(self, stream):
+        self.write = stream.write
+
+    def append(self, line):
+        self.write(line)
+        self.write("\n")
+
+
+@contextmanager
+def replacing(path):
+    """Opens a temporary file next to the path for writing, which replaces
+    the file at the path only if the block succeeds, so that an error never
+    leaves a truncated file behind."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, "w") as stream:
+            yield stream
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def tokenize_file(fname, profiler=NO_PROFILER):
+    with profiler.phase(fname, "read"):
         with open(fname) as stream:
-            tokens_list = tokenizer.tokenize(stream.read())
-            result_string = (
-                "<tokens>\n"
-                + "\n".join(map(lambda t: f"<{t[0]}> {t[1]} </{t[0]}>", tokens_list))
-                + "\n</tokens>\n"
-            )
-            # append 'T' to the stem
-            result_fname = (fname.parent / (fname.stem + "T")).with_suffix(".xml")
-            with open(result_fname, "w") as f:
-                f.write(result_string)
+            source_code = stream.read()
+    # append 'T' to the stem
+    result_fname = (fname.parent / (fname.stem + "T")).with_suffix(".xml")
+    with replacing(result_fname) as f:
+        result = LineWriter(f)
+        lines = tokenizer.xml_lines(source_code)
+        if profiler.enabled:  # the tokens are all read, then written
+            with profiler.phase(fname, "tokenize"):
+                lines = list(lines)
+        with profiler.phase(fname, "write"):
+            for line in lines:
+                result.append(line)
+
+
+def parse_file(fname, profiler=NO_PROFILER):
+    with profiler.phase(fname, "read"):
+        with open(fname) as stream:
+            source_code = stream.read()
+    with replacing(fname.with_suffix(".xml")) as ans:
+        if not profiler.enabled:
+            parser.parse(source_code, result=LineWriter(ans))
+            return
+        # the phases, which are interleaved when streaming, one after the
+        # other
+        with profiler.phase(fname, "tokenize"):
+            tokens = list(tokenizer.scan(source_code))
+        with profiler.phase(fname, "parse"):
+            tree = jack_ast.parse_class(tokenizer.TokenStream(tokens))
+        with profiler.phase(fname, "write"):
+            parser.XmlEmitter(LineWriter(ans)).emit(tree)
 
 
 @jack_analyzer.command()
-@click.argument("path", type=click.Path(exists=True))
-def parse(path):
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@profile_options
+@watch_options
+def tokenize(
+    paths, profile=None, profile_stats=None, watch=False, interval=DEFAULT_INTERVAL
+):
+    """tokenizer"""
+    profiler = profiler_for(profile, profile_stats, "tokenize")
+    process_paths(paths, tokenize_file, profiler, watch, interval)
+    write_profile(profiler, profile, profile_stats)
+
+
+@jack_analyzer.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@profile_options
+@watch_options
+def parse(
+    paths, profile=None, profile_stats=None, watch=False, interval=DEFAULT_INTERVAL
+):
     """parser"""
-    filenames = files_to_process(Path(path))
-    if not filenames:
-        click.echo(f"Unable to detect jack files in the given path: {path}")
-        return
-    for fname in filenames:
-        with open(fname) as stream:
-            result = parser.parse(stream.read())
-            result_string = "\n".join(result) + "\n"
-            with open(fname.with_suffix(".xml"), "w") as ans:
-                ans.write(result_string)
+    profiler = profiler_for(profile, profile_stats, "parse")
+    process_paths(paths, parse_file, profiler, watch, interval)
+    write_profile(profiler, profile, profile_stats)
 
 
 if __name__ == "__main__":
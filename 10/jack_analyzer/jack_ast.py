@@ -0,0 +1,551 @@
+"""Typed syntax tree of a Jack class, shared by the analyzer (xml output) and
+the compiler (vm output) of project 11.
+
+Every node records the source offset of its first token. Nodes use slots, so
+a tree costs little more than the tuples of its fields.
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Union
+
+from tokenizer import (
+    scan,
+    TokenStream,
+    INTEGER_CONSTANT,
+    KEYWORD,
+    STRING_CONSTANT,
+    SYMBOL,
+)
+
+__all__ = [
+    "parse",
+    "parse_class",
+    "NodeVisitor",
+    "Class",
+    "ClassVarDec",
+    "SubroutineDec",
+    "Parameter",
+    "VarDec",
+    "LetStatement",
+    "IfStatement",
+    "WhileStatement",
+    "DoStatement",
+    "ReturnStatement",
+    "IntegerConstant",
+    "StringConstant",
+    "KeywordConstant",
+    "VarName",
+    "ArrayAccess",
+    "SubroutineCall",
+    "Parenthesized",
+    "UnaryOp",
+    "BinaryOp",
+]
+
+OPS = ("+", "-", "*", "/", "&", "|", "<", ">", "=")
+UNARY_OPS = ("-", "~")
+KEYWORD_CONSTANTS = ("true", "false", "null", "this")
+
+
+class Node:
+    """Base of the syntax tree nodes, see `NodeVisitor`."""
+
+    __slots__ = ()
+    visit_name = "visit_node"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.visit_name = "visit_" + re.sub(r"(?<!^)(?=[A-Z])", "_", cls.__name__).lower()
+
+
+def node(cls):
+    return dataclass(slots=True)(cls)
+
+
+# EXPRESSIONS
+
+
+@node
+class IntegerConstant(Node):
+    value: int
+    offset: int
+
+
+@node
+class StringConstant(Node):
+    value: str
+    offset: int
+
+
+@node
+class KeywordConstant(Node):
+    value: str  # one of KEYWORD_CONSTANTS
+    offset: int
+
+
+@node
+class VarName(Node):
+    name: str
+    offset: int
+
+
+@node
+class ArrayAccess(Node):
+    name: str
+    index: "Expression"
+    offset: int
+
+
+@node
+class SubroutineCall(Node):
+    receiver: Optional[str]  # class or variable name before the '.'
+    name: str
+    arguments: List["Expression"]
+    offset: int
+
+
+@node
+class Parenthesized(Node):
+    expression: "Expression"
+    offset: int
+
+
+@node
+class UnaryOp(Node):
+    op: str
+    operand: "Term"
+    offset: int
+
+
+@node
+class BinaryOp(Node):
+    """Jack has no operator precedence: `a op b op c` is `(a op b) op c`."""
+
+    op: str
+    left: "Expression"
+    right: "Term"
+    offset: int
+
+
+Term = Union[
+    IntegerConstant,
+    StringConstant,
+    KeywordConstant,
+    VarName,
+    ArrayAccess,
+    SubroutineCall,
+    Parenthesized,
+    UnaryOp,
+]
+Expression = Union[Term, BinaryOp]
+
+
+# STATEMENTS
+
+
+@node
+class LetStatement(Node):
+    name: str
+    index: Optional[Expression]
+    value: Expression
+    offset: int
+
+
+@node
+class IfStatement(Node):
+    condition: Expression
+    statements: list
+    else_statements: Optional[list]
+    offset: int
+
+
+@node
+class WhileStatement(Node):
+    condition: Expression
+    statements: list
+    offset: int
+
+
+@node
+class DoStatement(Node):
+    call: SubroutineCall
+    offset: int
+
+
+@node
+class ReturnStatement(Node):
+    value: Optional[Expression]
+    offset: int
+
+
+# PROGRAM STRUCTURE
+
+
+@node
+class ClassVarDec(Node):
+    kind: str  # 'static' or 'field'
+    type: str
+    names: List[str]
+    offset: int
+
+
+@node
+class Parameter(Node):
+    type: str
+    name: str
+    offset: int
+
+
+@node
+class VarDec(Node):
+    type: str
+    names: List[str]
+    offset: int
+
+
+@node
+class SubroutineDec(Node):
+    kind: str  # 'constructor', 'function' or 'method'
+    type: str
+    name: str
+    parameters: List[Parameter]
+    var_decs: List[VarDec]
+    statements: list
+    offset: int
+
+
+@node
+class Class(Node):
+    name: str
+    class_var_decs: List[ClassVarDec]
+    subroutine_decs: Iterable[SubroutineDec]  # a list unless parsed lazily
+    offset: int
+
+
+class NodeVisitor:
+    """Calls the `visit_<snake_case_node_name>` method of the node."""
+
+    def visit(self, node, *args):
+        return getattr(self, node.visit_name)(node, *args)
+
+
+# PARSER
+
+
+def parse(source_code, lazy=False) -> Class:
+    return parse_class(TokenStream(scan(source_code)), lazy)
+
+
+def expect(tokens, value):
+    """Consumes the keyword or symbol `value`, which a string constant with
+    the same characters is not."""
+    token = tokens.advance()
+    if token[1] != value or token[0] == STRING_CONSTANT:
+        got = f'"{token[1]}"' if token[0] == STRING_CONSTANT else token[1]
+        raise SyntaxError(f"Expected {value!r} at offset {token[2]}, got {got!r}")
+    return token
+
+
+def peek_symbol(tokens, n=0):
+    """The n-th token after the cursor if it is a symbol, else None."""
+    kind, value, _ = tokens.peek(n)
+    return value if kind == SYMBOL else None
+
+
+def peek_keyword(tokens):
+    """The token under the cursor if it is a keyword, else None."""
+    kind, value, _ = tokens.peek()
+    return value if kind == KEYWORD else None
+
+
+def parse_class(tokens, lazy=False) -> Class:
+    """
+    <class> =>
+        'class' identifier '{' <classVarDec>* <subroutineDec>* '}'
+
+    With `lazy` the subroutines are an iterator that parses each of them
+    when it is reached, so that only one is held at a time; the rest of the
+    class is parsed at once.
+    """
+    offset = expect(tokens, "class")[2]
+    name = tokens.advance()[1]
+    expect(tokens, "{")
+    class_var_decs = []
+    while peek_keyword(tokens) in ("static", "field"):
+        class_var_decs.append(parse_class_var_dec(tokens))
+    subroutine_decs = parse_subroutine_decs(tokens)
+    if not lazy:
+        subroutine_decs = list(subroutine_decs)
+    return Class(name, class_var_decs, subroutine_decs, offset)
+
+
+def parse_subroutine_decs(tokens):
+    """Yields the subroutines of the class, then reads its closing brace."""
+    while peek_keyword(tokens) in ("constructor", "function", "method"):
+        yield parse_subroutine_dec(tokens)
+    expect(tokens, "}")
+
+
+def parse_names(tokens):
+    """identifier (',' identifier)* ';'"""
+    names = [tokens.advance()[1]]
+    while peek_symbol(tokens) == ",":
+        tokens.advance()
+        names.append(tokens.advance()[1])
+    expect(tokens, ";")
+    return names
+
+
+def parse_class_var_dec(tokens) -> ClassVarDec:
+    """
+    <classVarDec> =>
+        ('static' | 'field') ('int' | 'char' | 'boolean' | identifier) identifier (',' identifier)* ';'
+    """
+    _, kind, offset = tokens.advance()
+    type = tokens.advance()[1]
+    return ClassVarDec(kind, type, parse_names(tokens), offset)
+
+
+def parse_subroutine_dec(tokens) -> SubroutineDec:
+    """
+    <subroutineDec> =>
+        ('constructor' | 'function' | 'method')
+        ('void' | 'int' | 'char' | 'boolean' | identifier) identifier '(' <parameterList> ')'
+        <subroutineBody>
+    <subroutineBody> =>
+        '{' <varDec>* <statements> '}'
+    """
+    _, kind, offset = tokens.advance()
+    type = tokens.advance()[1]
+    name = tokens.advance()[1]
+    expect(tokens, "(")
+    parameters = parse_parameter_list(tokens)
+    expect(tokens, ")")
+    expect(tokens, "{")
+    var_decs = []
+    while peek_keyword(tokens) == "var":
+        var_decs.append(parse_var_dec(tokens))
+    statements = parse_statements(tokens)
+    expect(tokens, "}")
+    return SubroutineDec(kind, type, name, parameters, var_decs, statements, offset)
+
+
+def parse_parameter_list(tokens) -> List[Parameter]:
+    """
+    <parameterList> =>
+        (<type> identifier (',' <type> identifier)* )?
+    """
+    parameters = []
+    while peek_symbol(tokens) != ")":
+        if parameters:
+            expect(tokens, ",")
+        _, type, offset = tokens.advance()
+        parameters.append(Parameter(type, tokens.advance()[1], offset))
+    return parameters
+
+
+def parse_var_dec(tokens) -> VarDec:
+    """
+    <varDec> =>
+        'var' ('int' | 'char' | 'boolean' | identifier) identifier (',' identifier)* ';'
+    """
+    offset = tokens.advance()[2]
+    type = tokens.advance()[1]
+    return VarDec(type, parse_names(tokens), offset)
+
+
+def parse_statements(tokens) -> list:
+    """
+    <statements> =>
+        ( <letStatement>
+        | <ifStatement>
+        | <whileStatement>
+        | <doStatement>
+        | <returnStatement>
+        )*
+    """
+    statements = []
+    while True:
+        value = peek_keyword(tokens)
+        if value == "let":
+            statements.append(parse_let_statement(tokens))
+        elif value == "if":
+            statements.append(parse_if_statement(tokens))
+        elif value == "while":
+            statements.append(parse_while_statement(tokens))
+        elif value == "do":
+            statements.append(parse_do_statement(tokens))
+        elif value == "return":
+            statements.append(parse_return_statement(tokens))
+        else:
+            return statements
+
+
+def parse_block(tokens) -> list:
+    """'{' <statements> '}'"""
+    expect(tokens, "{")
+    statements = parse_statements(tokens)
+    expect(tokens, "}")
+    return statements
+
+
+def parse_let_statement(tokens) -> LetStatement:
+    """
+    <letStatement> =>
+        'let' identifier ('[' <expression> ']')? '=' <expression> ';'
+    """
+    offset = tokens.advance()[2]
+    name = tokens.advance()[1]
+    index = None
+    if peek_symbol(tokens) == "[":
+        tokens.advance()
+        index = parse_expression(tokens)
+        expect(tokens, "]")
+    expect(tokens, "=")
+    value = parse_expression(tokens)
+    expect(tokens, ";")
+    return LetStatement(name, index, value, offset)
+
+
+def parse_if_statement(tokens) -> IfStatement:
+    """
+    <ifStatement> =>
+        'if' '(' <expression> ')' '{' <statements> '}'
+        ('else' '{' <statements> '}')?
+    """
+    offset = tokens.advance()[2]
+    expect(tokens, "(")
+    condition = parse_expression(tokens)
+    expect(tokens, ")")
+    statements = parse_block(tokens)
+    else_statements = None
+    if peek_keyword(tokens) == "else":
+        tokens.advance()
+        else_statements = parse_block(tokens)
+    return IfStatement(condition, statements, else_statements, offset)
+
+
+def parse_while_statement(tokens) -> WhileStatement:
+    """
+    <whileStatement> =>
+        'while' '(' <expression> ')' '{' <statements> '}'
+    """
+    offset = tokens.advance()[2]
+    expect(tokens, "(")
+    condition = parse_expression(tokens)
+    expect(tokens, ")")
+    return WhileStatement(condition, parse_block(tokens), offset)
+
+
+def parse_do_statement(tokens) -> DoStatement:
+    """
+    <doStatement> =>
+        'do' <subroutineCall> ';'
+    """
+    offset = tokens.advance()[2]
+    call = parse_subroutine_call(tokens)
+    expect(tokens, ";")
+    return DoStatement(call, offset)
+
+
+def parse_return_statement(tokens) -> ReturnStatement:
+    """
+    <returnStatement> =>
+        'return' <expression>? ';'
+    """
+    offset = tokens.advance()[2]
+    value = None
+    if peek_symbol(tokens) != ";":
+        value = parse_expression(tokens)
+    expect(tokens, ";")
+    return ReturnStatement(value, offset)
+
+
+def parse_expression(tokens) -> Expression:
+    """
+    <expression> =>
+        <term> (('+' | '-' | '*' | '/' | '&' | '|' | '<' | '>' | '=') <term>)*
+    """
+    expression = parse_term(tokens)
+    while peek_symbol(tokens) in OPS:
+        op = tokens.advance()[1]
+        expression = BinaryOp(op, expression, parse_term(tokens), expression.offset)
+    return expression
+
+
+def parse_term(tokens) -> Term:
+    """
+    <term> =>
+        ( integerConstant
+        | stringConstant
+        | 'true'
+        | 'false'
+        | 'null'
+        | 'this'
+        | <varName>
+        | <varName> '[' <expression> ']'
+        | <subroutineCall>
+        | '(' <expression> ')'
+        | ('-' | '~') <term>
+        )
+    """
+    kind, value, offset = tokens.peek()
+    if kind == INTEGER_CONSTANT:
+        tokens.advance()
+        return IntegerConstant(int(value), offset)
+    if kind == STRING_CONSTANT:
+        tokens.advance()
+        return StringConstant(value, offset)
+    if value == "(":
+        tokens.advance()
+        expression = parse_expression(tokens)
+        expect(tokens, ")")
+        return Parenthesized(expression, offset)
+    if value in UNARY_OPS:
+        tokens.advance()
+        return UnaryOp(value, parse_term(tokens), offset)
+    if value in KEYWORD_CONSTANTS:
+        tokens.advance()
+        return KeywordConstant(value, offset)
+    next_value = peek_symbol(tokens, 1)
+    if next_value == "[":
+        tokens.advance()
+        tokens.advance()
+        index = parse_expression(tokens)
+        expect(tokens, "]")
+        return ArrayAccess(value, index, offset)
+    if next_value in ("(", "."):
+        return parse_subroutine_call(tokens)
+    tokens.advance()
+    return VarName(value, offset)
+
+
+def parse_subroutine_call(tokens) -> SubroutineCall:
+    """
+    <subroutineCall> =>
+        (identifier '.')? identifier '(' <expressionList> ')'
+    """
+    _, name, offset = tokens.advance()
+    receiver = None
+    if peek_symbol(tokens) == ".":
+        tokens.advance()
+        receiver, name = name, tokens.advance()[1]
+    expect(tokens, "(")
+    arguments = parse_expression_list(tokens)
+    expect(tokens, ")")
+    return SubroutineCall(receiver, name, arguments, offset)
+
+
+def parse_expression_list(tokens) -> List[Expression]:
+    """
+    <expressionList> =>
+        (<expression> (',' <expression>)* )?
+    """
+    expressions = []
+    kind, value, _ = tokens.peek()
+    if kind != SYMBOL or value != ")":
+        expressions.append(parse_expression(tokens))
+        while peek_symbol(tokens) == ",":
+            tokens.advance()
+            expressions.append(parse_expression(tokens))
+    return expressions
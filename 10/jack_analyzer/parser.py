@@ -1,15 +1,24 @@
-from tokenizer import tokenize
+import jack_ast
+from tokenizer import SPECIAL_SYMBOLS
 
-__all__ = ["parse"]
+__all__ = ["parse", "XmlEmitter"]
 
+TYPE_KEYWORDS = ("int", "char", "boolean", "void")
 
-def parse(source_code: str):
-    tokens = tokenize(source_code)
-    return compile_class(tokens, result=[], indent=1)
 
+def parse(source_code: str, result=None):
+    """Returns the xml lines of the parse tree of the source code.
 
-def to_xml(token, indent=0):
-    kind, value = token
+    `result` can be any object with an `append` method, e.g. a writer that
+    outputs each line as soon as it is produced. Defaults to a new list.
+    The subroutines are parsed lazily, each one written before the next is
+    parsed, so that only one of them is held in memory.
+    """
+    tree = jack_ast.parse(source_code, lazy=True)
+    return XmlEmitter([] if result is None else result).emit(tree)
+
+
+def to_xml(kind, value, indent=0):
     return "  " * indent + f"<{kind}> {value} </{kind}>"
 
 
@@ -21,289 +30,214 @@ def closing(tag, indent):
     return "  " * indent + f"</{tag}>"
 
 
-def compile_class(tokens, result, indent):
-    """
-    <class> =>
-        'class' identifier '{' <classVarDec>* <subroutineDec>* '}'
-    """
-    result.append(opening("class", indent - 1))
-    result.append(to_xml(tokens.pop(0), indent))  # class definition
-    result.append(to_xml(tokens.pop(0), indent))  # name
-    result.append(to_xml(tokens.pop(0), indent))
-    compile_class_var_dec(tokens, result, indent + 1)
-    compile_subroutine_dec(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(closing("class", indent - 1))
-    return result
-
-
-def compile_class_var_dec(tokens, result, indent):
-    """
-    <classVarDec> =>
-        ('static' | 'field') ('int' | 'char' | 'boolean' | identifier) identifier (',' identifier)* ';'
-
-    """
-    while tokens[0][1] in ("static", "field"):
-        result.append(opening("classVarDec", indent - 1))  # class var declaration
-        result.append(to_xml(tokens.pop(0), indent))  # kind
-        result.append(to_xml(tokens.pop(0), indent))  # type
-        result.append(to_xml(tokens.pop(0), indent))  # name
-        while tokens[0][1] == ",":
-            result.append(to_xml(tokens.pop(0), indent))  # take ','
-            result.append(to_xml(tokens.pop(0), indent))  # name
-        result.append(to_xml(tokens.pop(0), indent))
-        result.append(closing("classVarDec", indent - 1))
-
-
-def compile_subroutine_dec(tokens, result, indent):
-    """
-    <subroutineDec> =>
-        ('constructor' | 'function' | 'method')
-        ('void' | 'int' | 'char' | 'boolean' | identifier) identifier '(' <parameterList> ')'
-        <subroutineBody>
-    """
-    while tokens[0][1] in ("constructor", "function", "method"):
-        result.append(opening("subroutineDec", indent - 1))  # subroutine declaration
-        result.append(to_xml(tokens.pop(0), indent))
-        result.append(to_xml(tokens.pop(0), indent))  # type
-        result.append(to_xml(tokens.pop(0), indent))  # name
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_parameter_list(tokens, result, indent + 1)
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_subroutine_body(tokens, result, indent + 1)
+class XmlEmitter(jack_ast.NodeVisitor):
+    """Appends the xml lines of a syntax tree to `result`.
+
+    As in the grammar functions of the tokens-based analyzer, a node visited
+    with `indent` writes its tag at `indent - 1` and its children at `indent`.
+    """
+
+    def __init__(self, result):
+        self.result = result
+
+    def emit(self, tree):
+        self.visit(tree, 1)
+        return self.result
+
+    def keyword(self, value, indent):
+        self.result.append(to_xml("keyword", value, indent))
+
+    def symbol(self, value, indent):
+        self.result.append(to_xml("symbol", SPECIAL_SYMBOLS.get(value, value), indent))
+
+    def identifier(self, value, indent):
+        self.result.append(to_xml("identifier", value, indent))
+
+    def type(self, value, indent):
+        if value in TYPE_KEYWORDS:
+            self.keyword(value, indent)
+        else:
+            self.identifier(value, indent)
+
+    def names(self, names, indent):
+        """identifier (',' identifier)* ';'"""
+        self.identifier(names[0], indent)
+        for name in names[1:]:
+            self.symbol(",", indent)
+            self.identifier(name, indent)
+        self.symbol(";", indent)
+
+    def visit_class(self, node, indent):
+        self.result.append(opening("class", indent - 1))
+        self.keyword("class", indent)
+        self.identifier(node.name, indent)
+        self.symbol("{", indent)
+        for class_var_dec in node.class_var_decs:
+            self.visit(class_var_dec, indent + 1)
+        for subroutine_dec in node.subroutine_decs:
+            self.visit(subroutine_dec, indent + 1)
+        self.symbol("}", indent)
+        self.result.append(closing("class", indent - 1))
+
+    def visit_class_var_dec(self, node, indent):
+        self.result.append(opening("classVarDec", indent - 1))
+        self.keyword(node.kind, indent)
+        self.type(node.type, indent)
+        self.names(node.names, indent)
+        self.result.append(closing("classVarDec", indent - 1))
+
+    def visit_subroutine_dec(self, node, indent):
+        result = self.result
+        result.append(opening("subroutineDec", indent - 1))
+        self.keyword(node.kind, indent)
+        self.type(node.type, indent)
+        self.identifier(node.name, indent)
+        self.symbol("(", indent)
+        result.append(opening("parameterList", indent))
+        for i, parameter in enumerate(node.parameters):
+            if i:
+                self.symbol(",", indent + 1)
+            self.type(parameter.type, indent + 1)
+            self.identifier(parameter.name, indent + 1)
+        result.append(closing("parameterList", indent))
+        self.symbol(")", indent)
+        result.append(opening("subroutineBody", indent))
+        self.symbol("{", indent + 1)
+        for var_dec in node.var_decs:
+            self.visit(var_dec, indent + 2)
+        self.statements(node.statements, indent + 2)
+        self.symbol("}", indent + 1)
+        result.append(closing("subroutineBody", indent))
         result.append(closing("subroutineDec", indent - 1))
 
-
-def compile_parameter_list(tokens, result, indent):
-    """
-    <parameterList> =>
-        (<type> identifier (',' <type> identifier)* )?
-    """
-    result.append(opening("parameterList", indent - 1))  # parameter list
-    while tokens[0][1] != ")":
-        result.append(to_xml(tokens.pop(0), indent))  # type
-        result.append(to_xml(tokens.pop(0), indent))  # name
-        while tokens[0][1] == ",":
-            result.append(to_xml(tokens.pop(0), indent))  # take ','
-            result.append(to_xml(tokens.pop(0), indent))  # type
-            result.append(to_xml(tokens.pop(0), indent))  # name
-    result.append(closing("parameterList", indent - 1))
-
-
-def compile_subroutine_body(tokens, result, indent):
-    """
-    <subroutineBody> =>
-        '{' <varDec>* <statements> '}'
-    """
-    result.append(opening("subroutineBody", indent - 1))
-    result.append(to_xml(tokens.pop(0), indent))
-    compile_var_dec(tokens, result, indent + 1)
-    compile_statements(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(closing("subroutineBody", indent - 1))
-
-
-def compile_var_dec(tokens, result, indent):
-    """
-    <varDec> =>
-        'var' ('int' | 'char' | 'boolean' | identifier) identifier (',' identifier)* ';'
-    """
-    while tokens[0][1] == "var":
-        result.append(opening("varDec", indent - 1))
-        result.append(to_xml(tokens.pop(0), indent))  # kind = local
-        result.append(to_xml(tokens.pop(0), indent))  # type
-        result.append(to_xml(tokens.pop(0), indent))  # name
-        while tokens[0][1] == ",":
-            result.append(to_xml(tokens.pop(0), indent))  # type
-            result.append(to_xml(tokens.pop(0), indent))  # name
-        result.append(to_xml(tokens.pop(0), indent))  # take ';'
-        result.append(closing("varDec", indent - 1))
-
-
-def compile_statements(tokens, result, indent):
-    """
-    <statements> =>
-        ( <letStatement> 
-        | <ifStatement> 
-        | <whileStatement> 
-        | <doStatement> 
-        | <returnStatement>
-        )*
-    """
-    result.append(opening("statements", indent - 1))
-    while tokens[0][1] in ("let", "if", "while", "do", "return"):
-        kind, value = tokens[0]
-        if value == "let":
-            compile_let_statement(tokens, result, indent + 1)
-        elif value == "if":
-            compile_if_statement(tokens, result, indent + 1)
-        elif value == "while":
-            compile_while_statement(tokens, result, indent + 1)
-        elif value == "do":
-            compile_do_statement(tokens, result, indent + 1)
-        elif value == "return":
-            compile_return_statement(tokens, result, indent + 1)
-    result.append(closing("statements", indent - 1))
-
-
-def compile_let_statement(tokens, result, indent):
-    """
-    <letStatement> =>
-        'let' identifier ('[' <expression> ']')? '=' <expression> ';'
-    """
-    result.append(opening("letStatement", indent - 1))
-    result.append(to_xml(tokens.pop(0), indent))  # let statement
-    result.append(to_xml(tokens.pop(0), indent))  # name
-    if tokens[0][1] == "[":
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_expression(tokens, result, indent + 1)
-        result.append(to_xml(tokens.pop(0), indent))
-    result.append(to_xml(tokens.pop(0), indent))
-    compile_expression(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(closing("letStatement", indent - 1))
-
-
-def compile_if_statement(tokens, result, indent):
-    """
-    <ifStatement> =>
-        'if' '(' <expression> ')' '{' <statements> '}'
-        ('else' '{' statements> '}')?
-    """
-    result.append(opening("ifStatement", indent - 1))
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(to_xml(tokens.pop(0), indent))
-    compile_expression(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(to_xml(tokens.pop(0), indent))
-    compile_statements(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    if tokens[0][1] == "else":
-        result.append(to_xml(tokens.pop(0), indent))
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_statements(tokens, result, indent + 1)
-        result.append(to_xml(tokens.pop(0), indent))
-    result.append(closing("ifStatement", indent - 1))
-
-
-def compile_while_statement(tokens, result, indent):
-    """
-    <whileStatement> =>
-        'while' '(' <expression> ')' '{' <statements> '}'
-        ('else' '{' statements> '}')?
-    """
-    result.append(opening("whileStatement", indent - 1))
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(to_xml(tokens.pop(0), indent))
-    compile_expression(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(to_xml(tokens.pop(0), indent))
-    compile_statements(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    if tokens[0][1] == "else":
-        result.append(to_xml(tokens.pop(0), indent))
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_statements(tokens, result, indent + 1)
-        result.append(to_xml(tokens.pop(0), indent))
-    result.append(closing("whileStatement", indent - 1))
-
-
-def compile_do_statement(tokens, result, indent):
-    """
-    <doStatement> =>
-        'do' (identifier '.')? identifier '(' <expressionList> ')' ';'
-    """
-    result.append(opening("doStatement", indent - 1))
-    result.append(to_xml(tokens.pop(0), indent))
-    if tokens[1][1] == ".":
-        result.append(to_xml(tokens.pop(0), indent))
-        result.append(to_xml(tokens.pop(0), indent))
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(to_xml(tokens.pop(0), indent))
-    compile_expression_list(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(closing("doStatement", indent - 1))
-
-
-def compile_return_statement(tokens, result, indent):
-    """
-    <returnStatement> =>
-        'return' <expression>? ';'
-    """
-    result.append(opening("returnStatement", indent - 1))
-    result.append(to_xml(tokens.pop(0), indent))
-    if tokens[0][1] != ";":
-        compile_expression(tokens, result, indent + 1)
-    result.append(to_xml(tokens.pop(0), indent))
-    result.append(closing("returnStatement", indent - 1))
-
-
-def compile_expression(tokens, result, indent):
-    """
-    <expression> =>
-        <term> (('+' | '-' | '*' | '/' | '&' | '|' | '<' | '>' | '=') <term>)*
-    """
-    result.append(opening("expression", indent - 1))
-    compile_term(tokens, result, indent + 1)
-    while tokens[0][1] in ("+", "-", "*", "/", "&amp;", "|", "&lt;", "&gt;", "="):
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_term(tokens, result, indent + 1)
-    result.append(closing("expression", indent - 1))
-
-
-def compile_term(tokens, result, indent):
-    """
-    <term> =>
-        ( integerConstant 
-        | stringConstant 
-        | 'true' 
-        | 'false' 
-        | 'null' 
-        | 'this' 
-        | <varName> 
-        | <varName> '[' <expression> ']' 
-        | (identifier '.')? identifier '(' <expressionList> ')' 
-        | '(' <expression> ')' 
-        | ('-' | '~') <term> 
-        )
-    """
-    result.append(opening("term", indent - 1))
-    if tokens[0][1] == "(":
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_expression(tokens, result, indent + 1)
-        result.append(to_xml(tokens.pop(0), indent))
-    elif tokens[0][1] in ("-", "~"):
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_term(tokens, result, indent + 1)
-    elif tokens[1][1] == "[":
-        result.append(to_xml(tokens.pop(0), indent))
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_expression(tokens, result, indent + 1)
-        result.append(to_xml(tokens.pop(0), indent))
-    elif tokens[1][1] in ("(", "."):
-        if tokens[1][1] == ".":
-            result.append(to_xml(tokens.pop(0), indent))
-            result.append(to_xml(tokens.pop(0), indent))
-        result.append(to_xml(tokens.pop(0), indent))
-        result.append(to_xml(tokens.pop(0), indent))
-        compile_expression_list(tokens, result, indent + 1)
-        result.append(to_xml(tokens.pop(0), indent))
-    else:
-        result.append(to_xml(tokens.pop(0), indent))
-    result.append(closing("term", indent - 1))
-
-
-def compile_expression_list(tokens, result, indent):
-    """
-    <expressionList> =>
-        (<expression> (',' <expression>)* )?
-    """
-    result.append(opening("expressionList", indent - 1))
-    if tokens[0][1] != ")":
-        compile_expression(tokens, result, indent + 1)
-        while tokens[0][1] == ",":
-            result.append(to_xml(tokens.pop(0), indent))
-            compile_expression(tokens, result, indent + 1)
-    result.append(closing("expressionList", indent - 1))
-
+    def visit_var_dec(self, node, indent):
+        self.result.append(opening("varDec", indent - 1))
+        self.keyword("var", indent)
+        self.type(node.type, indent)
+        self.names(node.names, indent)
+        self.result.append(closing("varDec", indent - 1))
+
+    def statements(self, statements, indent):
+        self.result.append(opening("statements", indent - 1))
+        for statement in statements:
+            self.visit(statement, indent + 1)
+        self.result.append(closing("statements", indent - 1))
+
+    def block(self, statements, indent):
+        """'{' <statements> '}'"""
+        self.symbol("{", indent)
+        self.statements(statements, indent + 1)
+        self.symbol("}", indent)
+
+    def visit_let_statement(self, node, indent):
+        self.result.append(opening("letStatement", indent - 1))
+        self.keyword("let", indent)
+        self.identifier(node.name, indent)
+        if node.index is not None:
+            self.symbol("[", indent)
+            self.expression(node.index, indent + 1)
+            self.symbol("]", indent)
+        self.symbol("=", indent)
+        self.expression(node.value, indent + 1)
+        self.symbol(";", indent)
+        self.result.append(closing("letStatement", indent - 1))
+
+    def visit_if_statement(self, node, indent):
+        self.result.append(opening("ifStatement", indent - 1))
+        self.keyword("if", indent)
+        self.symbol("(", indent)
+        self.expression(node.condition, indent + 1)
+        self.symbol(")", indent)
+        self.block(node.statements, indent)
+        if node.else_statements is not None:
+            self.keyword("else", indent)
+            self.block(node.else_statements, indent)
+        self.result.append(closing("ifStatement", indent - 1))
+
+    def visit_while_statement(self, node, indent):
+        self.result.append(opening("whileStatement", indent - 1))
+        self.keyword("while", indent)
+        self.symbol("(", indent)
+        self.expression(node.condition, indent + 1)
+        self.symbol(")", indent)
+        self.block(node.statements, indent)
+        self.result.append(closing("whileStatement", indent - 1))
+
+    def visit_do_statement(self, node, indent):
+        self.result.append(opening("doStatement", indent - 1))
+        self.keyword("do", indent)
+        self.visit(node.call, indent)
+        self.symbol(";", indent)
+        self.result.append(closing("doStatement", indent - 1))
+
+    def visit_return_statement(self, node, indent):
+        self.result.append(opening("returnStatement", indent - 1))
+        self.keyword("return", indent)
+        if node.value is not None:
+            self.expression(node.value, indent + 1)
+        self.symbol(";", indent)
+        self.result.append(closing("returnStatement", indent - 1))
+
+    def expression(self, node, indent):
+        """<term> (op <term>)*, flattening the left-associative operations."""
+        operations = []
+        while isinstance(node, jack_ast.BinaryOp):
+            operations.append(node)
+            node = node.left
+        self.result.append(opening("expression", indent - 1))
+        self.term(node, indent + 1)
+        for operation in reversed(operations):
+            self.symbol(operation.op, indent)
+            self.term(operation.right, indent + 1)
+        self.result.append(closing("expression", indent - 1))
+
+    def expression_list(self, expressions, indent):
+        self.result.append(opening("expressionList", indent - 1))
+        for i, expression in enumerate(expressions):
+            if i:
+                self.symbol(",", indent)
+            self.expression(expression, indent + 1)
+        self.result.append(closing("expressionList", indent - 1))
+
+    def term(self, node, indent):
+        self.result.append(opening("term", indent - 1))
+        self.visit(node, indent)
+        self.result.append(closing("term", indent - 1))
+
+    # the term visitors only write the contents of the <term> tag
+
+    def visit_integer_constant(self, node, indent):
+        self.result.append(to_xml("integerConstant", node.value, indent))
+
+    def visit_string_constant(self, node, indent):
+        self.result.append(to_xml("stringConstant", node.value, indent))
+
+    def visit_keyword_constant(self, node, indent):
+        self.keyword(node.value, indent)
+
+    def visit_var_name(self, node, indent):
+        self.identifier(node.name, indent)
+
+    def visit_array_access(self, node, indent):
+        self.identifier(node.name, indent)
+        self.symbol("[", indent)
+        self.expression(node.index, indent + 1)
+        self.symbol("]", indent)
+
+    def visit_subroutine_call(self, node, indent):
+        if node.receiver is not None:
+            self.identifier(node.receiver, indent)
+            self.symbol(".", indent)
+        self.identifier(node.name, indent)
+        self.symbol("(", indent)
+        self.expression_list(node.arguments, indent + 1)
+        self.symbol(")", indent)
+
+    def visit_parenthesized(self, node, indent):
+        self.symbol("(", indent)
+        self.expression(node.expression, indent + 1)
+        self.symbol(")", indent)
+
+    def visit_unary_op(self, node, indent):
+        self.symbol(node.op, indent)
+        self.term(node.operand, indent + 1)
@@ -0,0 +1,108 @@
+"""Wall time and peak memory of the phases of the processing of each file,
+for the `--profile` option of the analyzer and of the compiler.
+
+    profiler = PhaseProfiler(hot_phase="parse")
+    with profiler.phase(fname, "read"):
+        source_code = ...
+    profiler.write(Path("profile.json"))
+
+The peak memory of a phase is the most memory it allocated at once above
+what was allocated when it started, as traced by `tracemalloc`, which also
+makes the phases slower. With a hot phase, cProfile runs during that phase
+only and `dump_stats` writes its statistics.
+
+Without `--profile` the tools use `NO_PROFILER`, whose phases do nothing.
+"""
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+__all__ = ["NO_PROFILER", "PhaseProfiler"]
+
+
+class PhaseProfiler:
+    enabled = True
+
+    def __init__(self, hot_phase=None):
+        self.files = {}  # file -> phase -> {"seconds": ..., "peak_bytes": ...}
+        self.hot_phase = hot_phase
+        self.cprofile = cProfile.Profile() if hot_phase else None
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, fname, name):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        hot = self.cprofile is not None and name == self.hot_phase
+        if hot:
+            self.cprofile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if hot:
+                self.cprofile.disable()
+            _, peak = tracemalloc.get_traced_memory()
+            self.add(
+                str(fname), {name: {"seconds": seconds, "peak_bytes": peak - current}}
+            )
+
+    def add(self, fname, phases):
+        """Adds the phases of a file, e.g. recorded in another process."""
+        file_phases = self.files.setdefault(str(fname), {})
+        for name, measure in phases.items():
+            if name in file_phases:  # a phase run again for the same file
+                file_phases[name] = {
+                    "seconds": file_phases[name]["seconds"] + measure["seconds"],
+                    "peak_bytes": max(
+                        file_phases[name]["peak_bytes"], measure["peak_bytes"]
+                    ),
+                }
+            else:
+                file_phases[name] = dict(measure)
+
+    def report(self):
+        """The phases of every file, and their total time and largest peak."""
+        total = {}
+        for phases in self.files.values():
+            for name, measure in phases.items():
+                phase_total = total.setdefault(name, {"seconds": 0.0, "peak_bytes": 0})
+                phase_total["seconds"] += measure["seconds"]
+                phase_total["peak_bytes"] = max(
+                    phase_total["peak_bytes"], measure["peak_bytes"]
+                )
+        return {
+            "seconds": time.perf_counter() - self.start,
+            "total": total,
+            "files": self.files,
+        }
+
+    def write(self, path):
+        path.write_text(json.dumps(self.report(), indent=2) + "\n")
+
+    def dump_stats(self, path):
+        self.cprofile.dump_stats(str(path))
+
+    def __getstate__(self):
+        # sent to the worker processes without the cProfile, which they
+        # cannot use
+        state = dict(self.__dict__)
+        state["cprofile"] = None
+        return state
+
+
+class NullProfiler:
+    enabled = False
+    files = {}
+    context = nullcontext()
+
+    def phase(self, fname, name):
+        return self.context
+
+
+NO_PROFILER = NullProfiler()
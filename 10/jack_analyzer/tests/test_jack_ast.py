@@ -0,0 +1,66 @@
+import pytest
+
+import jack_ast
+from jack_ast import BinaryOp, IntegerConstant, Parenthesized, StringConstant, VarName
+
+
+def parse_expression(source):
+    tree = jack_ast.parse(f"class A {{ function void f() {{ return {source}; }} }}")
+    return tree.subroutine_decs[0].statements[0].value
+
+
+def test_operations_are_left_associative():
+    assert parse_expression("1 + x * (2)") == BinaryOp(
+        "*",
+        BinaryOp("+", IntegerConstant(1, 37), VarName("x", 41), 37),
+        Parenthesized(IntegerConstant(2, 46), 45),
+        37,
+    )
+
+
+def test_string_constants_are_not_symbols():
+    call = parse_expression('f(")", "(")')
+    assert call.arguments == [StringConstant(")", 39), StringConstant("(", 44)]
+
+
+def test_string_constants_are_not_lookahead_symbols():
+    assert parse_expression('";"') == StringConstant(";", 37)
+    assert parse_expression('"+"') == StringConstant("+", 37)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        'return x "+" 1;',  # not an operator
+        'return f(x "," 1);',  # nor a separator
+        'let x "[" 1] = 2;',
+        'return 1 ";"',
+        '"let" x = 1;',  # nor a keyword
+    ],
+)
+def test_string_constants_are_rejected_as_symbols(statement):
+    with pytest.raises(SyntaxError):
+        jack_ast.parse(f"class A {{ function void f() {{ {statement} }} }}")
+
+
+def test_nodes_have_slots():
+    node = VarName("x", 0)
+    assert not hasattr(node, "__dict__")
+    assert node.visit_name == "visit_var_name"
+
+
+def test_lazy_parse():
+    source = (
+        "class A { field int x; "
+        "function void f() { return; } method int g() { return x; }"
+    )
+    tree = jack_ast.parse(source + " }", lazy=True)
+    assert tree.class_var_decs[0].names == ["x"]
+    assert [s.name for s in tree.subroutine_decs] == ["f", "g"]
+    assert list(tree.subroutine_decs) == []  # read once
+    # the closing brace is read after the last subroutine
+    subroutine_decs = jack_ast.parse(source, lazy=True).subroutine_decs
+    assert next(subroutine_decs).name == "f"
+    assert next(subroutine_decs).name == "g"
+    with pytest.raises(ValueError):
+        next(subroutine_decs)
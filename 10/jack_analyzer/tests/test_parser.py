@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+import parser
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 10/
+
+
+@pytest.mark.parametrize(
+    "fname",
+    sorted(PROJECT_DIR.glob("*/*.jack")),
+    ids=lambda p: f"{p.parent.name}/{p.stem}",
+)
+def test_reference_xml(fname):
+    expected = fname.with_suffix(".xml").read_text()
+    assert expected == "\n".join(parser.parse(fname.read_text())) + "\n"
+
+
+def test_parse_appends_to_given_result():
+    class Lines:
+        def __init__(self):
+            self.lines = []
+
+        def append(self, line):
+            self.lines.append(line)
+
+    source = "class Main { function void main() { return; } }"
+    result = Lines()
+    assert parser.parse(source, result=result) is result
+    assert result.lines == parser.parse(source)
+
+
+def test_each_subroutine_is_written_before_the_next_is_parsed():
+    source = (
+        "class Main { function void f() { return; } "
+        "function void g() { return } }"
+    )
+    result = []
+    with pytest.raises(SyntaxError):
+        parser.parse(source, result=result)
+    # f was written whole before the error in g
+    assert [line.strip() for line in result].count("</subroutineDec>") == 1
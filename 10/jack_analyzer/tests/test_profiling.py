@@ -0,0 +1,54 @@
+import pickle
+import pstats
+
+from profiling import NO_PROFILER, PhaseProfiler
+
+
+def test_phases_are_recorded_per_file():
+    profiler = PhaseProfiler()
+    for fname in ("A.jack", "B.jack"):
+        with profiler.phase(fname, "read"):
+            pass
+        with profiler.phase(fname, "parse"):
+            data = [0] * 100_000
+        del data
+    report = profiler.report()
+    assert list(report["files"]) == ["A.jack", "B.jack"]
+    assert list(report["files"]["A.jack"]) == ["read", "parse"]
+    assert report["files"]["A.jack"]["parse"]["peak_bytes"] >= 800_000
+    parse = report["total"]["parse"]
+    assert parse["seconds"] == sum(
+        phases["parse"]["seconds"] for phases in report["files"].values()
+    )
+    assert parse["peak_bytes"] == max(
+        phases["parse"]["peak_bytes"] for phases in report["files"].values()
+    )
+
+
+def test_add_merges_a_phase_run_again():
+    profiler = PhaseProfiler()
+    profiler.add("A.jack", {"optimize": {"seconds": 1.0, "peak_bytes": 10}})
+    profiler.add("A.jack", {"optimize": {"seconds": 2.0, "peak_bytes": 5}})
+    assert profiler.files["A.jack"]["optimize"] == {"seconds": 3.0, "peak_bytes": 10}
+
+
+def test_hot_phase_statistics(tmp_path):
+    profiler = PhaseProfiler(hot_phase="parse")
+    with profiler.phase("A.jack", "read"):
+        sorted(range(10))
+    with profiler.phase("A.jack", "parse"):
+        sum(range(10))
+    profiler.dump_stats(tmp_path / "parse.prof")
+    functions = {
+        name for _, _, name in pstats.Stats(str(tmp_path / "parse.prof")).stats
+    }
+    assert "<built-in method builtins.sum>" in functions
+    assert "<built-in method builtins.sorted>" not in functions
+    assert pickle.loads(pickle.dumps(profiler)).cprofile is None
+
+
+def test_no_profiler():
+    with NO_PROFILER.phase("A.jack", "read"):
+        pass
+    assert not NO_PROFILER.enabled
+    assert NO_PROFILER.files == {}
@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import pytest
+
+import tokenizer
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 10/
+
+
+def test_kinds_and_escaped_symbols():
+    assert tokenizer.tokenize('let x = a < 10 & "b c";') == [
+        ("keyword", "let"),
+        ("identifier", "x"),
+        ("symbol", "="),
+        ("identifier", "a"),
+        ("symbol", "&lt;"),
+        ("integerConstant", "10"),
+        ("symbol", "&amp;"),
+        ("stringConstant", "b c"),
+        ("symbol", ";"),
+    ]
+
+
+def test_scan_records_offsets():
+    source = "do  f(); // call\n"
+    assert list(tokenizer.scan(source)) == [
+        (tokenizer.KEYWORD, "do", 0),
+        (tokenizer.IDENTIFIER, "f", 4),
+        (tokenizer.SYMBOL, "(", 5),
+        (tokenizer.SYMBOL, ")", 6),
+        (tokenizer.SYMBOL, ";", 7),
+    ]
+
+
+def test_comments_do_not_swallow_code():
+    source = "/** a */ let /* b\n */ x // c\n/** d\n */ ;"
+    assert [value for _, value, _ in tokenizer.scan(source)] == ["let", "x", ";"]
+
+
+@pytest.mark.parametrize("value", ["32768", "007"])
+def test_invalid_integer_constant(value):
+    with pytest.raises(ValueError):
+        tokenizer.tokenize(f"let x = {value};")
+
+
+@pytest.mark.parametrize(
+    "fname", sorted(PROJECT_DIR.glob("*/*.jack")), ids=lambda p: f"{p.parent.name}/{p.stem}"
+)
+def test_reference_tokens(fname):
+    expected = (fname.parent / (fname.stem + "T")).with_suffix(".xml").read_text()
+    tokens = tokenizer.tokenize(fname.read_text())
+    result = "".join(f"<{kind}> {value} </{kind}>\n" for kind, value in tokens)
+    assert expected == f"<tokens>\n{result}</tokens>\n"
+
+
+def test_token_stream_lookahead_over_generator():
+    consumed = []
+
+    def tokens():
+        for token in "a b c d".split():
+            consumed.append(token)
+            yield token
+
+    stream = tokenizer.TokenStream(tokens())
+    assert stream.peek() == "a"
+    assert consumed == ["a"]
+    assert stream.peek(1) == "b"
+    assert consumed == ["a", "b"]  # read only what is looked at
+    with pytest.raises(ValueError):
+        stream.peek(2)
+    assert stream.advance() == "a"
+    assert stream.peek(1) == "c"
+    assert [stream.advance() for _ in range(3)] == ["b", "c", "d"]
+    assert stream.at_end()
+    with pytest.raises(ValueError):
+        stream.advance()
+
+
+def test_xml_lines():
+    assert list(tokenizer.xml_lines("return x;")) == [
+        "<tokens>",
+        "<keyword> return </keyword>",
+        "<identifier> x </identifier>",
+        "<symbol> ; </symbol>",
+        "</tokens>",
+    ]
+
+
+def test_token_stream_over_list():
+    tokens = ["a", "b"]
+    stream = tokenizer.TokenStream(tokens)
+    assert stream.peek(1) == "b"
+    assert [stream.advance(), stream.advance()] == tokens
+    assert stream.at_end()
+
+
+def test_scan_memory_mapped_file(tmp_path):
+    for fname in PROJECT_DIR.glob("**/*.jack"):
+        with tokenizer.open_source(fname) as source:
+            tokens = list(tokenizer.scan(source))
+        # the offsets are those of the bytes, with the \r of the line ends
+        expected = list(tokenizer.scan(fname.read_bytes().decode()))
+        assert tokens == expected
+        assert [token[:2] for token in tokens] == [
+            token[:2] for token in tokenizer.scan(fname.read_text())
+        ]
+    empty = tmp_path / "Empty.jack"
+    empty.write_text("")
+    with tokenizer.open_source(empty) as source:
+        assert list(tokenizer.scan(source)) == []
+    with pytest.raises(ValueError, match="'\\$' at offset 4"):
+        list(tokenizer.scan(b"let $"))
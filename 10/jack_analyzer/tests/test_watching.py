@@ -0,0 +1,74 @@
+import contextlib
+import os
+import time
+
+import pytest
+
+import watching
+from watching import Watcher
+
+
+def test_changes(tmp_path):
+    (tmp_path / "Main.jack").write_text("class Main {}")
+    (tmp_path / "Main.vm").write_text("")
+    watcher = Watcher([tmp_path])
+    assert watcher.changes() == []
+    (tmp_path / "Main.jack").write_text("class Main { }")
+    (tmp_path / "Point.jack").write_text("class Point {}")
+    (tmp_path / "Main.vm").write_text("return")
+    assert watcher.changes() == [tmp_path / "Main.jack", tmp_path / "Point.jack"]
+    assert watcher.changes() == []
+    # the same size, another modification time
+    (tmp_path / "Point.jack").write_text("class Piont {}")
+    later = time.time_ns() + 10**9
+    os.utime(tmp_path / "Point.jack", ns=(later, later))
+    assert watcher.changes() == [tmp_path / "Point.jack"]
+
+
+def test_file_removed_while_polled(tmp_path, monkeypatch):
+    (tmp_path / "Main.jack").write_text("class Main {}")
+    (tmp_path / "Point.jack").write_text("class Point {}")
+    watcher = Watcher([tmp_path])
+    scandir = os.scandir
+
+    def removing_scandir(path):
+        # an editor saving atomically replaces the file once it is listed
+        entries = list(scandir(path))
+        (tmp_path / "Main.jack").unlink()
+        return contextlib.nullcontext(entries)
+
+    monkeypatch.setattr(watching.os, "scandir", removing_scandir)
+    assert watcher.changes() == []
+    assert list(watcher.signatures) == [tmp_path / "Point.jack"]
+
+
+def test_changes_of_a_file(tmp_path):
+    fname = tmp_path / "Main.jack"
+    fname.write_text("class Main {}")
+    watcher = Watcher([fname])
+    (tmp_path / "Point.jack").write_text("class Point {}")
+    assert watcher.changes() == []
+    fname.unlink()
+    assert watcher.changes() == []
+    fname.write_text("class Main {}")
+    assert watcher.changes() == [fname]
+
+
+def test_watch_polls_until_a_file_changes(tmp_path, monkeypatch):
+    fname = tmp_path / "Main.jack"
+    fname.write_text("class Main {}")
+    sleeps = []
+
+    def sleep(interval):
+        sleeps.append(interval)
+        if len(sleeps) == 3:
+            fname.write_text("class Main { }")
+        if len(sleeps) == 5:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(watching.time, "sleep", sleep)
+    changes = Watcher([tmp_path]).watch(interval=0.5)
+    assert next(changes) == [fname]
+    assert sleeps == [0.5] * 3
+    with pytest.raises(KeyboardInterrupt):
+        next(changes)
@@ -1,85 +1,209 @@
+import mmap
 import re
-
-__all__ = ["tokenize"]
+import sys
+from contextlib import contextmanager
+
+__all__ = [
+    "tokenize",
+    "tokenize_lazily",
+    "scan",
+    "open_source",
+    "xml_lines",
+    "TokenStream",
+]
 # LEXICAL ELEMENTS
-# Implement these functions using regex
+# All lexical elements are recognized by one precompiled master pattern.
 
 KEYWORDS = "class constructor function method field static var int char boolean void true false null this let do if else while return".split()
 SYMBOLS = "{ } ( ) [ ] . , ; + - * / & | < > = ~".split()
 SPECIAL_SYMBOLS = dict([("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("&", "&amp;")])
 
-
-def is_keyword(token):
-    return token in KEYWORDS
-
-
-def is_symbol(token):
-    return token in SYMBOLS
-
-
-def is_integer_constant(token):
-    return bool(re.match(r"^[-+]?([1-9]\d*|0)$", token)) and 0 <= int(token) <= 32767
-
-
-def is_string_constant(token):
-    return bool(re.match(r'^".*"$', token))
-
-
-def is_identifier(token):
-    return bool(re.match(r"^[A-Za-z_]\w*$", token))
-
-
-def remove_comments(source_code: str) -> str:
-    """Returns a string without the comments."""
-    # removes one-line block comments /** */
-    no_line_comment1 = re.sub(r"/\*\*.*\*/", "", source_code)
-    # removes line comments //
-    no_line_comment2 = re.sub(r"//.*\n", "\n", no_line_comment1)
-    # removes block comments /** \n */
-    no_comment_string = re.sub(r"/\*\*[\s\S]*\*/", "", no_line_comment2)
-    return no_comment_string
-
-
-def create_token(value):
-    if is_keyword(value):
-        return ("keyword", value)
-    if is_integer_constant(value):
-        return ("integerConstant", value)
-    if is_identifier(value):
-        return ("identifier", value)
-
-
-def tokenize(source_code: str) -> str:
-    """Take string of source code and return string of 
-    tokens."""
-    clean_source_code = remove_comments(source_code)  # ignore comments
-    result = []
-    value = ""
-    recording_string = False  # flag for recording string constant
-    for char in clean_source_code:
-        if recording_string:
-            if char == '"':
-                result.append(("stringConstant", value))
-                value = ""
-                recording_string = False
+# token kind codes, see KIND_NAMES for the xml tag of each kind
+KEYWORD, SYMBOL, INTEGER_CONSTANT, STRING_CONSTANT, IDENTIFIER = range(5)
+KIND_NAMES = ("keyword", "symbol", "integerConstant", "stringConstant", "identifier")
+
+MAX_INTEGER = 32767
+
+_KEYWORDS = {sys.intern(keyword): sys.intern(keyword) for keyword in KEYWORDS}
+
+# Whitespace and comments are absorbed in front of every token, so each match
+# of the master pattern is exactly one token (or the end of the source).
+_TOKEN_REGEX = re.compile(
+    r"""
+    (?:\s+|//[^\n]*|/\*[\s\S]*?\*/)*
+    (?:
+        (?P<symbol>[{}()\[\].,;+\-*/&|<>=~])
+        |(?P<integerConstant>\d+)
+        |(?P<stringConstant>"[^"\n]*")
+        |(?P<word>[A-Za-z_]\w*)
+        |(?P<mismatch>\S)
+        |\Z
+    )
+    """,
+    re.VERBOSE,
+)
+_SYMBOL, _INTEGER, _STRING, _WORD = range(1, 5)
+# the same pattern over the bytes of a memory-mapped file
+_BYTES_TOKEN_REGEX = re.compile(_TOKEN_REGEX.pattern.encode(), re.VERBOSE)
+
+
+def scan(source_code):
+    """Yield the tokens of the source code as compact `(kind, value, offset)`
+    tuples, where kind is one of the integer kind codes and offset is the
+    position of the token in the source code.
+
+    Values are the raw lexemes: symbols are not xml-escaped, string constants
+    lose their quotes, keywords and identifiers are interned.
+
+    The source code is a string, or the UTF-8 bytes of one, such as the
+    memory-mapped file of `open_source`, whose offsets are then in bytes.
+    """
+    if not isinstance(source_code, str):
+        yield from _scan_bytes(source_code)
+        return
+    intern = sys.intern
+    keywords = _KEYWORDS
+    for match in _TOKEN_REGEX.finditer(source_code):
+        group = match.lastindex
+        if group == _SYMBOL:
+            yield (SYMBOL, match.group(group), match.start(group))
+        elif group == _WORD:
+            value = match.group(group)
+            keyword = keywords.get(value)
+            if keyword is None:
+                yield (IDENTIFIER, intern(value), match.start(group))
             else:
-                value += char
-        elif bool(re.match(r"\s", char)):
-            if value:
-                token = create_token(value)
-                result.append(token)
-                value = ""
-        else:
-            if is_symbol(char):
-                if value:
-                    token = create_token(value)
-                    result.append(token)
-                    value = ""
-                result.append(("symbol", SPECIAL_SYMBOLS.get(char) or char))
-            elif char == '"':  # start recording string constant here
-                if not recording_string:
-                    recording_string = True
+                yield (KEYWORD, keyword, match.start(group))
+        elif group == _INTEGER:
+            value = match.group(group)
+            if int(value) > MAX_INTEGER or (value[0] == "0" and len(value) > 1):
+                raise ValueError(
+                    f"Invalid integer constant {value} at offset {match.start(group)}"
+                )
+            yield (INTEGER_CONSTANT, value, match.start(group))
+        elif group == _STRING:
+            yield (STRING_CONSTANT, match.group(group)[1:-1], match.start(group))
+        elif group is not None:
+            raise ValueError(
+                f"Unexpected character {match.group(group)!r} at offset {match.start(group)}"
+            )
+
+
+def _scan_bytes(source_code):
+    intern = sys.intern
+    keywords = _KEYWORDS
+    for match in _BYTES_TOKEN_REGEX.finditer(source_code):
+        group = match.lastindex
+        if group is None:
+            continue
+        value = match.group(group).decode(errors="replace")
+        offset = match.start(group)
+        if group == _SYMBOL:
+            yield (SYMBOL, value, offset)
+        elif group == _WORD:
+            keyword = keywords.get(value)
+            if keyword is None:
+                yield (IDENTIFIER, intern(value), offset)
             else:
-                value += char
-    return result
-
+                yield (KEYWORD, keyword, offset)
+        elif group == _INTEGER:
+            if int(value) > MAX_INTEGER or (value[0] == "0" and len(value) > 1):
+                raise ValueError(f"Invalid integer constant {value} at offset {offset}")
+            yield (INTEGER_CONSTANT, value, offset)
+        elif group == _STRING:
+            yield (STRING_CONSTANT, value[1:-1], offset)
+        else:
+            raise ValueError(f"Unexpected character {value!r} at offset {offset}")
+
+
+@contextmanager
+def open_source(path):
+    """Memory-maps the file for `scan`, whose tokens are then read from the
+    page cache instead of a copy of the whole file."""
+    with open(path, "rb") as stream:
+        if not stream.seek(0, 2):
+            yield b""  # an empty file cannot be mapped
+            return
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            yield source
+
+
+def tokenize_lazily(source_code: str):
+    """Yield the (kind, value) tokens of the source code with xml-escaped
+    symbols."""
+    names = KIND_NAMES
+    special = SPECIAL_SYMBOLS
+    for kind, value, _ in scan(source_code):
+        yield (names[kind], special.get(value, value) if kind == SYMBOL else value)
+
+
+def tokenize(source_code: str) -> list:
+    """Take string of source code and return the list of
+    (kind, value) tokens with xml-escaped symbols."""
+    return list(tokenize_lazily(source_code))
+
+
+def xml_lines(source_code: str):
+    """Yield the lines of the tokens xml file one by one."""
+    yield "<tokens>"
+    for kind, value in tokenize_lazily(source_code):
+        yield f"<{kind}> {value} </{kind}>"
+    yield "</tokens>"
+
+
+_NOTHING = object()
+
+
+class TokenStream:
+    """Cursor over a list or a lazy iterator of tokens.
+
+    `advance` consumes the next token and `peek(n)` looks `n` tokens ahead,
+    n < `MAX_LOOKAHEAD`, which is all the Jack grammar needs. Tokens are
+    read from the iterator only when looked at, so the stream holds at most
+    `MAX_LOOKAHEAD` of them.
+    """
+
+    MAX_LOOKAHEAD = 2
+
+    def __init__(self, tokens):
+        self._next = iter(tokens).__next__
+        # the tokens looked at but not consumed yet
+        self._first = self._second = _NOTHING
+
+    def _read(self):
+        try:
+            return self._next()
+        except StopIteration:
+            raise ValueError("Unexpected end of tokens") from None
+
+    def peek(self, n=0):
+        """Returns the n-th token after the cursor without consuming it."""
+        first = self._first
+        if first is _NOTHING:
+            first = self._first = self._read()
+        if n == 0:
+            return first
+        if n >= self.MAX_LOOKAHEAD:
+            raise ValueError(f"Lookahead of {n + 1} tokens, at most {self.MAX_LOOKAHEAD}")
+        if self._second is _NOTHING:
+            self._second = self._read()
+        return self._second
+
+    def advance(self):
+        """Consumes and returns the token under the cursor."""
+        token = self._first
+        if token is _NOTHING:
+            try:
+                return self._next()
+            except StopIteration:
+                raise ValueError("Unexpected end of tokens") from None
+        self._first = self._second
+        self._second = _NOTHING
+        return token
+
+    def at_end(self):
+        try:
+            self.peek()
+        except ValueError:
+            return True
+        return False
@@ -0,0 +1,115 @@
+"""Reports what inlining the small leaf subroutines saves on the programs
+of ../../11 run in the vm emulator of ../../08, with the OS in Python.
+
+The Hack cycles are estimated from the executions of every vm command, each
+costing the instructions of its translation by the vm translator of
+../../08 without the shared subroutines (all of them for a comparison,
+whichever way it jumps); the calls of the OS count, not what the OS does,
+which inlining does not change. Square never ends: it runs with the right
+arrow held down for a number of commands, and the cost is given per move of
+the square.
+
+    $ python benchmarks/bench_inline.py --max-size 20
+"""
+import sys
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import compiler  # noqa: E402
+from inline import inline  # noqa: E402
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 11/
+ROOT_DIR = PROJECT_DIR.parent
+sys.path.append(str(ROOT_DIR / "08" / "vm_emulator"))
+sys.path.append(str(ROOT_DIR / "08" / "vm_translator"))
+from jack_os import KBD, SYS_INIT, NativeOS  # noqa: E402
+from machine import VirtualMachine  # noqa: E402
+from profiler import Profile  # noqa: E402
+from translator import VMTranslator, parse  # noqa: E402
+
+RIGHT_ARROW = 132
+
+# program -> keys typed, RAM set, steps, function whose calls are the unit
+PROGRAMS = {
+    "Seven": ("", {}, None, None),
+    "ConvertToBin": ("", {8000: 12345}, None, None),
+    "ComplexArrays": ("", {}, None, None),
+    "Average": ("3\n1\n2\n3\n", {}, None, None),
+    "Pong": ("aaaa", {}, None, None),
+    "Square": ("", {KBD: RIGHT_ARROW}, 200_000, "SquareGame.moveSquare"),
+}
+
+
+def cost(file_name, words):
+    """The instructions of the translation of the vm command."""
+    translator = VMTranslator(shared=False)
+    translator.file_name = file_name
+    translator.write(words)
+    return sum(1 for line in translator.result if not line.startswith("("))
+
+
+def run(files, keys, ram, steps):
+    """Runs the program, returns the commands run, the estimated cycles and
+    the calls of every function."""
+    jack_os = NativeOS()
+    jack_os.type(keys)
+    files = files + [SYS_INIT]
+    vm = VirtualMachine(files, jack_os.functions())
+    for address, value in ram.items():
+        vm.ram[address] = value
+    profile = Profile(vm, files)
+    vm.run(steps or 10_000_000)
+    if steps is None and not (vm.halted and vm.error is None):
+        raise click.ClickException(f"the program did not end: {vm.error}")
+    costs = [
+        cost(file_name, words)
+        for file_name, source_code in files
+        for words in parse(source_code)
+        if words[0] != "label"
+    ]
+    cycles = sum(count * c for count, c in zip(profile.counts, costs))
+    return vm.steps, cycles, profile.functions()
+
+
+@click.command()
+@click.option(
+    "--max-size",
+    default=20,
+    type=click.IntRange(min=1),
+    help="Size of the largest subroutine inlined, in vm commands.",
+)
+def bench(max_size):
+    for name, (keys, ram, steps, unit) in PROGRAMS.items():
+        classes = {
+            fname.stem: compiler.JackCompiler(fname.read_text()).compile()
+            for fname in sorted((PROJECT_DIR / name).glob("*.jack"))
+        }
+        result, inlined = inline(classes, max_size)
+        commands, cycles, functions = run(
+            [(c, "\n".join(lines)) for c, lines in classes.items()], keys, ram, steps
+        )
+        inlined_commands, inlined_cycles, inlined_functions = run(
+            [(c, "\n".join(lines)) for c, (lines, _) in result.items()],
+            keys,
+            ram,
+            steps,
+        )
+        per = ""
+        if unit:
+            # the same number of commands is not the same work
+            cycles //= functions[unit]["calls"]
+            inlined_cycles //= inlined_functions[unit]["calls"]
+            per = f" per call of {unit}"
+        else:
+            click.echo(f"{name}: {commands} -> {inlined_commands} vm commands")
+        click.echo(
+            f"{name}: {sum(inlined.values())} calls of {len(inlined)} subroutines "
+            f"inlined, {cycles} -> {inlined_cycles} Hack cycles{per} "
+            f"({100 * (cycles - inlined_cycles) / cycles:.1f}% saved)"
+        )
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,49 @@
+"""Times `jack_compile` on a directory of many classes with 1, 2, 4 and 8
+worker processes.
+
+    $ python benchmarks/bench_jobs.py --classes 200
+"""
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import jack_compiler  # noqa: E402
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 11/
+
+
+def populate(directory: Path, classes: int):
+    """Fills the directory with `classes` copies of the 11/ classes."""
+    sources = sorted(PROJECT_DIR.glob("*/*.jack"))
+    for i in range(classes):
+        source = sources[i % len(sources)]
+        name = f"{source.stem}{i}"
+        text = source.read_text().replace(f"class {source.stem}", f"class {name}", 1)
+        (directory / f"{name}.jack").write_text(text)
+
+
+@click.command()
+@click.option("--classes", default=200, help="number of classes to compile")
+@click.option("--jobs", "-j", multiple=True, type=int, default=(1, 2, 4, 8))
+def bench(classes, jobs):
+    directory = Path(tempfile.mkdtemp())
+    try:
+        populate(directory, classes)
+        filenames = jack_compiler.files_to_process(directory)
+        for n in jobs:
+            start = time.perf_counter()
+            jack_compiler.compile_files(filenames, n)
+            click.echo(
+                f"jobs {n}: {classes} classes in {time.perf_counter() - start:.3f}s"
+            )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,53 @@
+"""Reports what string pooling saves on the classes of a directory tree.
+
+Without pooling, every evaluation of a literal of n characters runs
+2 + 2n vm instructions (plus the calls of String.new and String.appendChar)
+and allocates a new string of n characters. With pooling, only the first
+evaluation does; the later ones run 3 instructions and allocate nothing.
+
+    $ python benchmarks/bench_strings.py ../../12
+"""
+import sys
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import compiler  # noqa: E402
+from tokenizer import STRING_CONSTANT, scan  # noqa: E402
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 11/
+
+
+def string_literals(source_code):
+    return [value for kind, value, _ in scan(source_code) if kind == STRING_CONSTANT]
+
+
+@click.command()
+@click.argument("path", default=str(PROJECT_DIR), type=click.Path(exists=True))
+def bench(path):
+    sites = distinct = plain_size = pooled_size = 0
+    plain_evaluation = pooled_evaluation = characters = 0
+    for fname in sorted(Path(path).glob("**/*.jack")):
+        source_code = fname.read_text()
+        strings = string_literals(source_code)
+        sites += len(strings)
+        distinct += len(set(strings))
+        plain_evaluation += sum(2 + 2 * len(s) for s in strings)
+        pooled_evaluation += 3 * len(strings)
+        characters += sum(map(len, strings))
+        plain_size += len(compiler.JackCompiler(source_code).compile())
+        pooled_size += len(
+            compiler.JackCompiler(source_code, pool_strings=True).compile()
+        )
+    click.echo(f"string literals: {sites} sites, {distinct} distinct per class")
+    click.echo(f"vm code size: {plain_size} -> {pooled_size} instructions")
+    click.echo(
+        "evaluating every site once more: "
+        f"{plain_evaluation} -> {pooled_evaluation} instructions, "
+        f"{characters} -> 0 characters allocated"
+    )
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,174 @@
+"""Times `tokenizer.tokenize`, `parser.parse` and `JackCompiler.compile`
+on every .jack file of the projects 09 to 12 and on synthetic classes, and
+fails when a phase is slower than its baseline by more than `--threshold`.
+
+The synthetic classes stress what the corpus lacks: deeply nested
+expressions, long lists of statements and huge string literals.
+
+The baselines are the best times of `--repeat` runs, stored in
+`baselines.json`. They depend on the machine, and are saved again with
+`--save` on a new machine or after an intended change.
+
+    $ python benchmarks/bench_suite.py
+    $ python benchmarks/bench_suite.py --save
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import compiler  # noqa: E402
+import parser  # noqa: E402
+import tokenizer  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+CORPUS_DIRS = ("09", "10", "11", "12")
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+
+PHASES = {
+    "tokenize": tokenizer.tokenize,
+    "parse": parser.parse,
+    "compile": lambda source: compiler.JackCompiler(source).compile(),
+}
+
+
+def corpus(rounds=5):
+    """Returns the contents of every jack file under the corpus directories,
+    `rounds` times so that the timings are not lost in the noise."""
+    return rounds * [
+        path.read_text()
+        for name in CORPUS_DIRS
+        for path in sorted((ROOT_DIR / name).glob("**/*.jack"))
+    ]
+
+
+def deep_expressions(depth, count):
+    """A class of `count` expressions of `depth` nested parentheses, the
+    depth being limited by the recursion of the parser and the compiler."""
+    expression = "x"
+    for level in range(depth):
+        expression = f"({expression} + {level % 7}) * y"
+    return (
+        "class Deep {\n"
+        "    function int main(int x, int y) {\n"
+        + f"        let x = {expression};\n" * count
+        + "        return x;\n"
+        "    }\n"
+        "}\n"
+    )
+
+
+def long_statements(count):
+    """A class with one function of `count` statements."""
+    statements = "".join(
+        f"        let a[i] = a[i - 1] + (x * {n % 100});\n"
+        f"        if (x > {n % 50}) {{ let x = x - 1; }} else {{ let x = -x; }}\n"
+        for n in range(count // 2)
+    )
+    return (
+        "class Long {\n"
+        "    function void main(Array a, int i, int x) {\n"
+        + statements
+        + "        return;\n"
+        "    }\n"
+        "}\n"
+    )
+
+
+def huge_strings(count, length):
+    """A class printing `count` string literals of `length` characters."""
+    text = ("The quick brown fox jumps over the lazy dog. " * (length // 45 + 1))[
+        :length
+    ]
+    statements = "".join(
+        f'        do Output.printString("{n} {text}");\n' for n in range(count)
+    )
+    return (
+        "class Strings {\n"
+        "    function void main() {\n" + statements + "        return;\n"
+        "    }\n"
+        "}\n"
+    )
+
+
+def synthetic(scale=1):
+    """Returns the synthetic classes, whose size grows with `scale`."""
+    return [
+        deep_expressions(60, 20 * scale),
+        long_statements(4000 * scale),
+        huge_strings(20 * scale, 2000),
+    ]
+
+
+def measure(sources, phase, repeat):
+    """The best time of the phase over all the sources."""
+    function = PHASES[phase]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for source in sources:
+            function(source)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def regressions(timings, baselines, threshold):
+    """Returns the messages of the timings slower than their baseline by
+    more than `threshold`."""
+    messages = []
+    for name, seconds in timings.items():
+        baseline = baselines.get(name)
+        if baseline is not None and seconds > baseline * (1 + threshold):
+            messages.append(
+                f"{name}: {seconds:.3f}s, baseline {baseline:.3f}s "
+                f"(+{seconds / baseline - 1:.0%})"
+            )
+    return messages
+
+
+@click.command()
+@click.option("--repeat", default=5, help="number of timed runs of each phase")
+@click.option("--scale", default=1, help="size factor of the synthetic classes")
+@click.option(
+    "--threshold", default=0.25, help="tolerated slowdown, 0.25 for 25 percent"
+)
+@click.option("--save", is_flag=True, help="store the timings as the baselines")
+def bench(repeat, scale, threshold, save):
+    workloads = {"corpus": corpus(), "synthetic": synthetic(scale)}
+    timings = {}
+    for workload, sources in workloads.items():
+        size = sum(len(source) for source in sources)
+        for phase in PHASES:
+            name = f"{workload}/{phase}"
+            timings[name] = measure(sources, phase, repeat)
+            click.echo(
+                f"{name:20} {timings[name]:7.3f}s  "
+                f"{size / timings[name] / 1024:8.0f} KB/s"
+            )
+    if save:
+        BASELINES.write_text(
+            json.dumps(
+                {name: round(seconds, 4) for name, seconds in timings.items()}, indent=2
+            )
+            + "\n"
+        )
+        click.echo(f"baselines saved to {BASELINES}")
+        return
+    if not BASELINES.exists():
+        click.echo("no baselines, run with --save first", err=True)
+        return
+    baselines = json.loads(BASELINES.read_text())
+    messages = regressions(timings, baselines, threshold)
+    for message in messages:
+        click.echo(f"slower than the baseline: {message}", err=True)
+    if messages:
+        raise SystemExit(1)
+    click.echo(f"no phase more than {threshold:.0%} slower than the baselines")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import compiler
+import fold
+import jack_ast
+import peephole
+import tokenizer
+
+__all__ = ["BuildCache", "COMPILER_VERSION"]
+
+
+def compiler_version():
+    """Returns a digest of the compiler sources, so that any change to the
+    compiler invalidates the cached results."""
+    digest = hashlib.sha256()
+    for module in (compiler, fold, peephole, jack_ast, tokenizer):
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+COMPILER_VERSION = compiler_version()
+DEFAULT_DIRECTORY = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "jack_compiler"
+)
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+class BuildCache:
+    """On-disk cache of the compiled vm code, keyed by the hash of the source
+    code, the compiler version and the compiler options.
+
+    Every entry is a file in the cache directory. Reading an entry refreshes
+    its modification time, and `evict` removes the least recently used
+    entries until the cache fits in `max_size` bytes.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_size=DEFAULT_MAX_SIZE, options=""):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.options = options
+
+    def key(self, source_code) -> str:
+        """The key of the source code, a string or its UTF-8 bytes."""
+        digest = hashlib.sha256()
+        digest.update(COMPILER_VERSION.encode())
+        digest.update(self.options.encode())
+        digest.update(b"\0")
+        if isinstance(source_code, str):
+            source_code = source_code.encode()
+        digest.update(source_code)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.vm"
+
+    def get(self, key):
+        """Returns the cached vm code or None if there is no such entry."""
+        path = self._path(key)
+        try:
+            with open(path) as stream:
+                result = stream.read()
+            os.utime(path)
+        except FileNotFoundError:  # also raised if evicted meanwhile
+            return None
+        return result
+
+    def put(self, key, result: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first so that concurrent readers never
+        # see a partial entry
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as stream:
+            stream.write(result)
+        os.replace(tmp_name, self._path(key))
+
+    def evict(self):
+        """Removes the least recently used entries that do not fit in the
+        cache. Returns the number of removed entries."""
+        if not self.directory.is_dir():
+            return 0
+        entries = []
+        for path in self.directory.glob("*.vm"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
@@ -1,5 +1,18 @@
-from tokenizer import tokenize
+import re
+import sys
+from bisect import bisect_right
 from dataclasses import dataclass
+from pathlib import Path
+
+# the front end (tokenizer and syntax tree) is shared with the analyzer of
+# project 10
+sys.path.append(str(Path(__file__).resolve().parents[2] / "10" / "jack_analyzer"))
+
+import jack_ast  # noqa: E402
+import peephole  # noqa: E402
+import tokenizer  # noqa: E402
+from fold import ConstantFolder  # noqa: E402
+from profiling import NO_PROFILER  # noqa: E402
 
 __all__ = ["JackCompiler"]
 
@@ -44,6 +57,12 @@ op_map = dict(
 )
 
 
+class Located(str):
+    """An instruction that knows the line of the jack statement it comes from."""
+
+    line = None
+
+
 def call(op):
     return f"{op_map[op]}"
 
@@ -52,9 +71,63 @@ def num_fields(symbols):
     return len([symbol for symbol in symbols.values() if symbol.kind == "field"])
 
 
-class JackCompiler:
-    def __init__(self, source_code):
+def segment(identifier):
+    return "this" if identifier.kind == "field" else identifier.kind
+
+
+# longest add chain that replaces a call to Math.multiply
+MAX_ADD_CHAIN = 32
+
+
+def add_chain(factor, load):
+    """Returns the instructions that multiply the value on top of the stack,
+    which `load` pushes again, by a positive factor using additions."""
+    chain = []
+    for i, bit in enumerate(bin(factor)[3:]):
+        if i == 0:
+            chain += [load, "add"]  # the top of the stack is still the value
+        else:
+            chain += ["pop temp 2", "push temp 2", "push temp 2", "add"]
+        if bit == "1":
+            chain += [load, "add"]
+    return chain
+
+
+class JackCompiler(jack_ast.NodeVisitor):
+    """Generates the vm code of a class by visiting its syntax tree.
+
+    The source code is a string or its UTF-8 bytes, such as the memory-mapped
+    file of `tokenizer.open_source`. The tokens are read through a lookahead
+    of two and, unless the phases are profiled, the syntax tree of only one
+    subroutine is held at a time.
+
+    With `optimize` >= 1 the vm code goes through the peephole optimizer and
+    `instructions_removed` counts the instructions it saved. With `optimize`
+    >= 2 constant subexpressions are folded and multiplications by small
+    constants become add chains.
+
+    With `pool_strings` every distinct string literal of the class is built
+    once, on its first evaluation, and kept in a static variable of its own
+    that later evaluations push. The pooled strings are shared, so they must
+    not be disposed of or modified by the program.
+
+    With `source_map`, `lines` maps every line of the vm code to the line of
+    the jack statement it was generated for, the line of the subroutine for
+    its prologue. An instruction created by the peephole optimizer gets the
+    line of the instruction before it.
+    """
+
+    def __init__(
+        self, source_code, optimize=0, pool_strings=False, source_map=False
+    ):
         self.source_code = source_code
+        self.optimize = optimize
+        self.pool_strings = pool_strings
+        self.source_map = source_map
+        self.line_starts = None  # offsets of the lines, for the source map
+        self.lines = None
+        self.strings = {}  # pooled literal -> static index
+        self.instructions_removed = 0
         self.INDECES = {"field": -1, "static": -1, "local": -1, "argument": -1}
         self.CLASS = Class("", {})
         self.SUBROUTINE = Subroutine("", "", "", {})
@@ -74,402 +147,282 @@ class JackCompiler:
         self.suffices.update({suffix: self.suffices[suffix] + 1})
         return l
 
-    def compile(self):
-        tokens = list(reversed(list(tokenize(self.source_code))))
-        return self.compile_class(tokens, result=[])
-
-    def compile_class(self, tokens, result):
-        """
-        <class> =>
-            'class' identifier '{' <classVarDec>* <subroutineDec>* '}'
-        """
-        tokens.pop()
-        self.CLASS.name = tokens.pop()[1]
-        tokens.pop()
-        self.compile_class_var_dec(tokens, result)
-        self.compile_subroutine_dec(tokens, result)
-        tokens.pop()
+    def lookup(self, name):
+        return self.SUBROUTINE.symbols.get(name) or self.CLASS.symbols.get(name)
+
+    def compile(self, profiler=NO_PROFILER, fname=None):
+        """Returns the vm code of the class. The phases are recorded by the
+        profiler under `fname`, the tokens being all read before parsing."""
+        if profiler.enabled:
+            with profiler.phase(fname, "tokenize"):
+                tokens = list(tokenizer.scan(self.source_code))
+            with profiler.phase(fname, "parse"):
+                tree = jack_ast.parse_class(tokenizer.TokenStream(tokens))
+        else:
+            # a subroutine is parsed, then compiled, then dropped
+            tree = jack_ast.parse(self.source_code, lazy=True)
+        if self.optimize >= 2:
+            with profiler.phase(fname, "optimize"):
+                ConstantFolder().fold(tree)
+        result = []
+        with profiler.phase(fname, "codegen"):
+            self.visit(tree, result)
+        if self.optimize >= 1:
+            with profiler.phase(fname, "optimize"):
+                optimized = peephole.optimize(result)
+            self.instructions_removed = len(result) - len(optimized)
+            result = optimized
+        if self.source_map:
+            self.lines = []
+            line = None
+            for instruction in result:
+                line = getattr(instruction, "line", line)
+                self.lines.append(line)
+            result = [str(instruction) for instruction in result]
         return result
 
-    def compile_class_var_dec(self, tokens, result):
-        """
-        <classVarDec> =>
-            ('static' | 'field') ('int' | 'char' | 'boolean' | identifier) identifier (',' identifier)* ';'
-
-        """
-        while tokens[-1][1] in ("static", "field"):
-            kind = tokens.pop()[1]
-            type = tokens.pop()[1]
-            name = tokens.pop()[1]
+    def locate(self, node, result, start):
+        """Gives the line of the node to the instructions from `start` on
+        that have none yet, those of the nested statements having theirs."""
+        if not self.source_map:
+            return
+        if self.line_starts is None:
+            newline = "\n" if isinstance(self.source_code, str) else b"\n"
+            self.line_starts = [0] + [
+                match.end() for match in re.finditer(newline, self.source_code)
+            ]
+        line = bisect_right(self.line_starts, node.offset)
+        for i in range(start, len(result)):
+            if not isinstance(result[i], Located):
+                result[i] = Located(result[i])
+                result[i].line = line
+
+    def visit_class(self, node, result):
+        self.CLASS.name = node.name
+        for class_var_dec in node.class_var_decs:
+            self.visit(class_var_dec, result)
+        for subroutine_dec in node.subroutine_decs:
+            self.visit(subroutine_dec, result)
+
+    def visit_class_var_dec(self, node, result):
+        for name in node.names:
             self.CLASS.symbols.update(
-                {name: Identifier(name, type, kind, self.next_index(kind))}
+                {name: Identifier(name, node.type, node.kind, self.next_index(node.kind))}
             )
-            while tokens[-1][1] == ",":
-                tokens.pop()
-                name = tokens.pop()[1]
-                self.CLASS.symbols.update(
-                    {name: Identifier(name, type, kind, self.next_index(kind))}
-                )
-            tokens.pop()
-
-    def compile_subroutine_dec(self, tokens, result):
-        """
-        <subroutineDec> =>
-            ('constructor' | 'function' | 'method')
-            ('void' | 'int' | 'char' | 'boolean' | identifier) identifier '(' <parameterList> ')'
-            <subroutineBody>
-        """
-        while tokens[-1][1] in ("constructor", "function", "method"):
-            self.SUBROUTINE.kind = tokens.pop()[1]
-            self.SUBROUTINE.type = tokens.pop()[1]
-            self.SUBROUTINE.name = tokens.pop()[1]
-            self.SUBROUTINE.symbols = {}
-            tokens.pop()
-            self.compile_parameter_list(tokens, result)
-            tokens.pop()
-            self.compile_subroutine_body(tokens, result)
-            self.SUBROUTINE = Subroutine("", "", "", {})
-
-    def compile_parameter_list(self, tokens, result):
-        """
-        <parameterList> =>
-            (<type> identifier (',' <type> identifier)* )?
-        """
-        if self.SUBROUTINE.kind == "method":
+
+    def visit_subroutine_dec(self, node, result):
+        self.SUBROUTINE = Subroutine(node.name, node.type, node.kind, {})
+        if node.kind == "method":
             self.next_index("argument")  # start argument at 1 instead of 0
-        while tokens[-1][1] != ")":
-            type = tokens.pop()[1]
-            name = tokens.pop()[1]
+        for parameter in node.parameters:
             self.SUBROUTINE.symbols.update(
-                {name: Identifier(name, type, "argument", self.next_index("argument"))}
+                {
+                    parameter.name: Identifier(
+                        parameter.name,
+                        parameter.type,
+                        "argument",
+                        self.next_index("argument"),
+                    )
+                }
             )
-            while tokens[-1][1] == ",":
-                tokens.pop()
-                type = tokens.pop()[1]
-                name = tokens.pop()[1]
-                self.SUBROUTINE.symbols.update(
-                    {
-                        name: Identifier(
-                            name, type, "argument", self.next_index("argument")
-                        )
-                    }
-                )
-
-    def compile_subroutine_body(self, tokens, result):
-        """
-        <subroutineBody> =>
-            '{' <varDec>* <statements> '}'
-        """
-        tokens.pop()
-        var_count = self.compile_var_dec(tokens, result)
-        result.append(f"function {self.CLASS.name}.{self.SUBROUTINE.name} {var_count}")
-        if self.SUBROUTINE.kind == "constructor":
+        var_count = 0
+        for var_dec in node.var_decs:
+            var_count += self.visit(var_dec, result)
+        self.reset_index("local")
+        self.reset_index("argument")
+        start = len(result)
+        result.append(f"function {self.CLASS.name}.{node.name} {var_count}")
+        if node.kind == "constructor":
             result.append(f"push constant {num_fields(self.CLASS.symbols)}")
             result.append(f"call Memory.alloc 1")
             result.append(f"pop pointer 0")
-        elif self.SUBROUTINE.kind == "method":
+        elif node.kind == "method":
             result.append(f"push argument 0")
             result.append(f"pop pointer 0")
-        self.compile_statements(tokens, result)
-        tokens.pop()
-
-    def compile_var_dec(self, tokens, result):
-        """
-        Spec:
-        <varDec> =>
-            'var' ('int' | 'char' | 'boolean' | identifier) identifier (',' identifier)* ';'
-        
-        return: number of local variables
-        """
-        count = 0
-        while tokens[-1][1] == "var":
-            tokens.pop()
-            type = tokens.pop()[1]
-            name = tokens.pop()[1]
+        self.compile_statements(node.statements, result)
+        self.locate(node, result, start)
+        self.SUBROUTINE = Subroutine("", "", "", {})
+
+    def visit_var_dec(self, node, result):
+        """return: number of local variables"""
+        for name in node.names:
             self.SUBROUTINE.symbols.update(
-                {name: Identifier(name, type, "local", self.next_index("local"))}
-            )
-            count += 1
-            while tokens[-1][1] == ",":
-                tokens.pop()
-                name = tokens.pop()[1]
-                self.SUBROUTINE.symbols.update(
-                    {name: Identifier(name, type, "local", self.next_index("local"))}
-                )
-                count += 1
-            tokens.pop()
-        self.reset_index("local")
-        self.reset_index("argument")
-        return count
-
-    def compile_statements(self, tokens, result):
-        """
-        <statements> =>
-            ( <letStatement> 
-            | <ifStatement> 
-            | <whileStatement> 
-            | <doStatement> 
-            | <returnStatement>
-            )*
-        """
-        while tokens[-1][1] in ("let", "if", "while", "do", "return"):
-            _, value = tokens[-1]
-            if value == "let":
-                self.compile_let_statement(tokens, result)
-            elif value == "if":
-                self.compile_if_statement(tokens, result)
-            elif value == "while":
-                self.compile_while_statement(tokens, result)
-            elif value == "do":
-                self.compile_do_statement(tokens, result)
-            elif value == "return":
-                self.compile_return_statement(tokens, result)
-
-    def compile_let_statement(self, tokens, result):
-        """
-        <letStatement> =>
-            'let' identifier ('[' <expression> ']')? '=' <expression> ';'
-        """
-        tokens.pop()
-        name = tokens.pop()[1]
-        identifier = self.SUBROUTINE.symbols.get(name) or self.CLASS.symbols.get(name)
-        is_array = False
-        if tokens[-1][1] == "[":
-            is_array = True
-            tokens.pop()
-            self.compile_expression(tokens, result)
-            result.append(
-                f"push {'this' if identifier.kind == 'field' else identifier.kind} {identifier.index}"
+                {name: Identifier(name, node.type, "local", self.next_index("local"))}
             )
+        return len(node.names)
+
+    def compile_statements(self, statements, result):
+        for statement in statements:
+            start = len(result)
+            self.visit(statement, result)
+            self.locate(statement, result, start)
+
+    def visit_let_statement(self, node, result):
+        identifier = self.lookup(node.name)
+        if node.index is not None:
+            self.visit(node.index, result)
+            result.append(f"push {segment(identifier)} {identifier.index}")
             result.append(f"add")
-            # result.append(f"pop pointer 1")
-            tokens.pop()
-        tokens.pop()
-        self.compile_expression(tokens, result)
-        if is_array:
+            self.visit(node.value, result)
             result.append("pop temp 0")
             result.append("pop pointer 1")
             result.append("push temp 0")
             result.append(f"pop that 0")
         else:
-            result.append(
-                f"pop {'this' if identifier.kind == 'field' else identifier.kind} {identifier.index}"
-            )
-        tokens.pop()
-
-    def compile_if_statement(self, tokens, result):
-        """
-        <ifStatement> =>
-            'if' '(' <expression> ')' '{' <statements> '}'
-            ('else' '{' statements> '}')?
-        """
+            self.visit(node.value, result)
+            result.append(f"pop {segment(identifier)} {identifier.index}")
 
+    def visit_if_statement(self, node, result):
         THEN = self.next_label("THEN")
         ELSE = self.next_label("ELSE")
-        tokens.pop()
-        tokens.pop()
-        self.compile_expression(tokens, result)
+        self.visit(node.condition, result)
         result.append(f"if-goto {THEN}")
         result.append(f"goto {ELSE}")
-        tokens.pop()
-        tokens.pop()
         result.append(f"label {THEN}")
-        self.compile_statements(tokens, result)
-        tokens.pop()
-        if tokens[-1][1] == "else":
+        self.compile_statements(node.statements, result)
+        if node.else_statements is not None:
             ENDIF = self.next_label("ENDIF")
             result.append(f"goto {ENDIF}")
             result.append(f"label {ELSE}")
-            tokens.pop()
-            tokens.pop()
-            self.compile_statements(tokens, result)
-            tokens.pop()
+            self.compile_statements(node.else_statements, result)
             result.append(f"label {ENDIF}")
         else:
             result.append(f"label {ELSE}")
 
-    def compile_while_statement(self, tokens, result):
-        """
-        <whileStatement> =>
-            'while' '(' <expression> ')' '{' <statements> '}'
-        """
+    def visit_while_statement(self, node, result):
         WHILE = self.next_label("WHILE")
         ENDWHILE = self.next_label("ENDWHILE")
-        tokens.pop()
-        tokens.pop()
         result.append(f"label {WHILE}")
-        self.compile_expression(tokens, result)
+        self.visit(node.condition, result)
         result.append(f"not")
-        tokens.pop()
-        tokens.pop()
         result.append(f"if-goto {ENDWHILE}")
-        self.compile_statements(tokens, result)
+        self.compile_statements(node.statements, result)
         result.append(f"goto {WHILE}")
-        tokens.pop()
         result.append(f"label {ENDWHILE}")
 
-    def compile_do_statement(self, tokens, result):
-        """
-        <doStatement> =>
-            'do' (identifier '.')? identifier '(' <expressionList> ')' ';'
-        """
-        tokens.pop()
-        prefix = None
-        if tokens[-2][1] == ".":
-            prefix = tokens.pop()[1]
-            tokens.pop()
-        function_name = tokens.pop()[1]
-        tokens.pop()
-        if prefix:
-            identifier = self.SUBROUTINE.symbols.get(prefix) or self.CLASS.symbols.get(
-                prefix
-            )
-            if identifier:
-                result.append(
-                    f"push {'this' if identifier.kind == 'field' else identifier.kind} {identifier.index}"
-                )
-                arg_count = self.compile_expression_list(tokens, result)
-                result.append(f"call {identifier.type}.{function_name} {arg_count + 1}")
-            else:
-                arg_count = self.compile_expression_list(tokens, result)
-                result.append(f"call {prefix}.{function_name} {arg_count}")
-        else:
-            result.append(f"push pointer 0")
-            arg_count = self.compile_expression_list(tokens, result)
-            result.append(f"call {self.CLASS.name}.{function_name} {arg_count + 1}")
+    def visit_do_statement(self, node, result):
+        self.visit(node.call, result)
         result.append(f"pop temp 0")
-        tokens.pop()
-        tokens.pop()
-
-    def compile_return_statement(self, tokens, result):
-        """
-        <returnStatement> =>
-            'return' <expression>? ';'
-        """
-        tokens.pop()
-        if tokens[-1][1] == ";":
+
+    def visit_return_statement(self, node, result):
+        if node.value is None:
             result.append(f"push constant 0")
         else:
-            self.compile_expression(tokens, result)
+            self.visit(node.value, result)
         result.append(f"return")
-        tokens.pop()
-
-    def compile_expression(self, tokens, result):
-        """
-        <expression> =>
-            <term> (('+' | '-' | '*' | '/' | '&' | '|' | '<' | '>' | '=') <term>)*
-        """
-        self.compile_term(tokens, result)
-        while tokens[-1][1] in ("+", "-", "*", "/", "&", "|", "<", ">", "="):
-            op = tokens.pop()[1]
-            self.compile_term(tokens, result)
-            result.append(call(op))
-
-    def compile_term(self, tokens, result):
-        """
-        <term> =>
-            ( integerConstant 
-            | stringConstant 
-            | 'true' 
-            | 'false' 
-            | 'null' 
-            | 'this' 
-            | <varName> 
-            | <varName> '[' <expression> ']' 
-            | (identifier '.')? identifier '(' <expressionList> ')' 
-            | '(' <expression> ')' 
-            | ('-' | '~') <term> 
-            )
-        """
-        if tokens[-1][1] == "(":
-            tokens.pop()
-            self.compile_expression(tokens, result)
-            tokens.pop()
-        elif tokens[-1][1] in ("-", "~"):
-            unary_op = tokens.pop()[1]
-            self.compile_term(tokens, result)
-            result.append(f"{'neg' if unary_op == '-' else 'not'}")
-        elif tokens[-2][1] == "[":
-            name = tokens.pop()[1]
-            tokens.pop()
-            self.compile_expression(tokens, result)
-            tokens.pop()
-            identifier = self.SUBROUTINE.symbols.get(name) or self.CLASS.symbols.get(
-                name
-            )
-            result.append(
-                f"push {'this' if identifier.kind == 'field' else identifier.kind} {identifier.index}"
-            )
-            result.append(f"add")
-            result.append(f"pop pointer 1")
-            result.append(f"push that 0")
-        elif tokens[-2][1] in ("(", "."):
-            prefix = None
-            if tokens[-2][1] == ".":
-                prefix = tokens.pop()[1]
-                tokens.pop()
-            function_name = tokens.pop()[1]
-            tokens.pop()
-            if prefix:
-                identifier = self.SUBROUTINE.symbols.get(
-                    prefix
-                ) or self.CLASS.symbols.get(prefix)
-                if identifier:
-                    result.append(
-                        f"push {'this' if identifier.kind == 'field' else identifier.kind} {identifier.index}"
-                    )
-                    arg_count = self.compile_expression_list(tokens, result)
-                    result.append(
-                        f"call {identifier.type}.{function_name} {arg_count + 1}"
-                    )
-                else:
-                    arg_count = self.compile_expression_list(tokens, result)
-                    result.append(f"call {prefix}.{function_name} {arg_count}")
-            else:
-                result.append(f"push pointer 0")
-                arg_count = self.compile_expression_list(tokens, result)
-                result.append(f"call {self.CLASS.name}.{function_name} {arg_count + 1}")
-                self.compile_expression_list(tokens, result)
-            tokens.pop()
+
+    def visit_binary_op(self, node, result):
+        if self.optimize >= 2 and node.op == "*":
+            for operand, factor in ((node.left, node.right), (node.right, node.left)):
+                if isinstance(factor, jack_ast.IntegerConstant):
+                    if self.multiply_by_constant(operand, factor.value, result):
+                        return
+        self.visit(node.left, result)
+        self.visit(node.right, result)
+        result.append(call(node.op))
+
+    def multiply_by_constant(self, operand, factor, result):
+        """Emits operand * factor without calling Math.multiply if the add
+        chain is short enough. Returns whether it did."""
+        if factor in (0, -0x8000):
+            return False
+        if isinstance(operand, jack_ast.VarName):
+            setup = []
+            self.visit(operand, setup)
+            load = setup[0]
         else:
-            type_, terminal = tokens.pop()
-            if terminal in self.SUBROUTINE.symbols:
-                identifier = self.SUBROUTINE.symbols.get(terminal)
-                result.append(
-                    f"push {'this' if identifier.kind == 'field' else identifier.kind} {identifier.index}"
-                )
-            elif terminal in self.CLASS.symbols:
-                identifier = self.CLASS.symbols.get(terminal)
-                result.append(
-                    f"push {'this' if identifier.kind == 'field' else identifier.kind} {identifier.index}"
-                )
-            elif terminal in ("false", "null"):
-                result.append(f"push constant 0")
-            elif terminal == "true":
-                result.append(f"push constant 0")
-                result.append(f"not")
-            elif terminal == "this":
-                result.append(f"push pointer 0")
-            elif type_ == "integerConstant":
-                result.append(f"push constant {terminal}")
-            else:
-                result.append(f"push constant {len(terminal)}")
-                result.append(f"call String.new 1")
-                for c in terminal:
-                    result.append(f"push constant {ord(c)}")
-                    result.append(f"call String.appendChar 2")
-
-    def compile_expression_list(self, tokens, result):
-        """
-        <expressionList> =>
-            (<expression> (',' <expression>)* )?
-        """
-        count = 0
-        if tokens[-1][1] != ")":
-            self.compile_expression(tokens, result)
-            count += 1
-            while tokens[-1][1] == ",":
-                tokens.pop()
-                self.compile_expression(tokens, result)
-                count += 1
-        return count
+            load = "push temp 1"
+            setup = ["pop temp 1", load]
+        chain = add_chain(abs(factor), load)
+        if len(chain) > MAX_ADD_CHAIN:
+            return False
+        if not isinstance(operand, jack_ast.VarName):
+            self.visit(operand, result)
+        result.extend(setup)
+        result.extend(chain)
+        if factor < 0:
+            result.append("neg")
+        return True
+
+    def visit_unary_op(self, node, result):
+        self.visit(node.operand, result)
+        result.append(f"{'neg' if node.op == '-' else 'not'}")
+
+    def visit_parenthesized(self, node, result):
+        self.visit(node.expression, result)
+
+    def visit_integer_constant(self, node, result):
+        if node.value >= 0:
+            result.append(f"push constant {node.value}")
+        elif node.value == -0x8000:  # folded, -32768 == ~32767
+            result.append(f"push constant 32767")
+            result.append(f"not")
+        else:  # folded
+            result.append(f"push constant {-node.value}")
+            result.append(f"neg")
+
+    def visit_string_constant(self, node, result):
+        if self.pool_strings:
+            self.pooled_string(node, result)
+        else:
+            self.new_string(node, result)
+
+    def pooled_string(self, node, result):
+        index = self.strings.get(node.value)
+        if index is None:
+            index = self.strings[node.value] = self.next_index("static")
+        POOLED = self.next_label("POOLED")
+        result.append(f"push static {index}")
+        result.append(f"if-goto {POOLED}")
+        self.new_string(node, result)
+        result.append(f"pop static {index}")
+        result.append(f"label {POOLED}")
+        result.append(f"push static {index}")
+
+    def new_string(self, node, result):
+        result.append(f"push constant {len(node.value)}")
+        result.append(f"call String.new 1")
+        for c in node.value:
+            result.append(f"push constant {ord(c)}")
+            result.append(f"call String.appendChar 2")
+
+    def visit_keyword_constant(self, node, result):
+        if node.value in ("false", "null"):
+            result.append(f"push constant 0")
+        elif node.value == "true":
+            result.append(f"push constant 0")
+            result.append(f"not")
+        else:
+            result.append(f"push pointer 0")
+
+    def visit_var_name(self, node, result):
+        identifier = self.lookup(node.name)
+        result.append(f"push {segment(identifier)} {identifier.index}")
+
+    def visit_array_access(self, node, result):
+        self.visit(node.index, result)
+        identifier = self.lookup(node.name)
+        result.append(f"push {segment(identifier)} {identifier.index}")
+        result.append(f"add")
+        result.append(f"pop pointer 1")
+        result.append(f"push that 0")
+
+    def visit_subroutine_call(self, node, result):
+        if node.receiver is None:
+            result.append(f"push pointer 0")
+            arg_count = self.compile_expression_list(node.arguments, result)
+            result.append(f"call {self.CLASS.name}.{node.name} {arg_count + 1}")
+            return
+        identifier = self.lookup(node.receiver)
+        if identifier:
+            result.append(f"push {segment(identifier)} {identifier.index}")
+            arg_count = self.compile_expression_list(node.arguments, result)
+            result.append(f"call {identifier.type}.{node.name} {arg_count + 1}")
+        else:
+            arg_count = self.compile_expression_list(node.arguments, result)
+            result.append(f"call {node.receiver}.{node.name} {arg_count}")
+
+    def compile_expression_list(self, expressions, result):
+        for expression in expressions:
+            self.visit(expression, result)
+        return len(expressions)
@@ -0,0 +1,147 @@
+"""Compile-time evaluation of the constant subexpressions of a syntax tree.
+
+Values are 16-bit two's complement integers as on the Hack platform; `true`
+is -1 and `false` and `null` are 0. A folded expression becomes an
+`IntegerConstant`, whose value may be negative after folding.
+"""
+import jack_ast
+from jack_ast import IntegerConstant, KeywordConstant
+
+__all__ = ["ConstantFolder", "to_word"]
+
+KEYWORD_VALUES = {"true": -1, "false": 0, "null": 0}
+
+
+def to_word(value):
+    """Wraps the integer around to the signed 16-bit range."""
+    return (value + 0x8000) % 0x10000 - 0x8000
+
+
+def divide(x, y):
+    """Integer part of x / y, as Math.divide."""
+    quotient = abs(x) // abs(y)
+    return quotient if (x < 0) == (y < 0) else -quotient
+
+
+OPERATIONS = {
+    "+": lambda x, y: x + y,
+    "-": lambda x, y: x - y,
+    "*": lambda x, y: x * y,
+    "/": divide,
+    "&": lambda x, y: x & y,
+    "|": lambda x, y: x | y,
+    "<": lambda x, y: -1 if x < y else 0,
+    ">": lambda x, y: -1 if x > y else 0,
+    "=": lambda x, y: -1 if x == y else 0,
+}
+
+
+def constant_value(node):
+    """Returns the value of a constant node, None if it is not constant."""
+    if isinstance(node, IntegerConstant):
+        return node.value
+    if isinstance(node, KeywordConstant):
+        return KEYWORD_VALUES.get(node.value)
+    return None
+
+
+class ConstantFolder(jack_ast.NodeVisitor):
+    """Replaces, in place, the expressions of the statements of a class by
+    their folded version.
+
+    Besides constant subexpressions, the identities x + 0, 0 + x, x - 0,
+    x * 1, 1 * x and x / 1 are simplified to x.
+    """
+
+    def fold(self, tree):
+        """Folds the class, a lazily parsed one as its subroutines are read."""
+        if isinstance(tree.subroutine_decs, list):
+            for subroutine_dec in tree.subroutine_decs:
+                self.fold_subroutine(subroutine_dec)
+        else:
+            tree.subroutine_decs = map(self.fold_subroutine, tree.subroutine_decs)
+        return tree
+
+    def fold_subroutine(self, subroutine_dec):
+        self.statements(subroutine_dec.statements)
+        return subroutine_dec
+
+    def statements(self, statements):
+        for statement in statements:
+            self.visit(statement)
+
+    def visit_let_statement(self, node):
+        if node.index is not None:
+            node.index = self.visit(node.index)
+        node.value = self.visit(node.value)
+
+    def visit_if_statement(self, node):
+        node.condition = self.visit(node.condition)
+        self.statements(node.statements)
+        if node.else_statements is not None:
+            self.statements(node.else_statements)
+
+    def visit_while_statement(self, node):
+        node.condition = self.visit(node.condition)
+        self.statements(node.statements)
+
+    def visit_do_statement(self, node):
+        self.visit(node.call)
+
+    def visit_return_statement(self, node):
+        if node.value is not None:
+            node.value = self.visit(node.value)
+
+    # the expression visitors return the folded expression
+
+    def visit_integer_constant(self, node):
+        return node
+
+    def visit_string_constant(self, node):
+        return node
+
+    def visit_keyword_constant(self, node):
+        return node
+
+    def visit_var_name(self, node):
+        return node
+
+    def visit_array_access(self, node):
+        node.index = self.visit(node.index)
+        return node
+
+    def visit_subroutine_call(self, node):
+        node.arguments = [self.visit(argument) for argument in node.arguments]
+        return node
+
+    def visit_parenthesized(self, node):
+        expression = self.visit(node.expression)
+        if not isinstance(expression, jack_ast.BinaryOp):
+            return expression  # a term needs no parentheses
+        node.expression = expression
+        return node
+
+    def visit_unary_op(self, node):
+        operand = self.visit(node.operand)
+        value = constant_value(operand)
+        if value is None:
+            node.operand = operand
+            return node
+        return IntegerConstant(
+            to_word(-value if node.op == "-" else ~value), node.offset
+        )
+
+    def visit_binary_op(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        x = constant_value(left)
+        y = constant_value(right)
+        if x is not None and y is not None and not (node.op == "/" and y == 0):
+            return IntegerConstant(to_word(OPERATIONS[node.op](x, y)), node.offset)
+        if (node.op in ("+", "-") and y == 0) or (node.op in ("*", "/") and y == 1):
+            return left
+        if (node.op == "+" and x == 0) or (node.op == "*" and x == 1):
+            return right
+        node.left = left
+        node.right = right
+        return node
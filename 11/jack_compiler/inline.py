@@ -0,0 +1,160 @@
+"""Whole-program inlining of the calls of the small leaf subroutines.
+
+A function of at most `max_size` vm commands that calls no function and
+uses no static variable (those of its own class cannot be reached from
+another class) is a leaf, and its calls, in any class, are replaced with
+its code:
+
+    pop V+n-1, ..., pop V+1, pop V         the n arguments, into variables
+    push pointer 0, pop V+n                if the leaf sets this (a method),
+    push pointer 1, pop V+n+1              or that
+    push constant 0, pop V+n+2+j           its locals, zero as after a call
+    its code, with `argument i` as V+i, `local j` as V+n+2+j, its labels
+    renamed and `return` as `goto` the end
+    label END
+    push V+n, pop pointer 0, ...           this and that restored
+
+which leaves the return value on the stack as the call would. The object of
+a method goes right from the stack to `pointer 0`, once it is saved.
+
+The variables V are `temp 3` to `temp 7` if there are enough of them: the
+compiler keeps values in `temp 0` to `temp 2` only, and never across a call.
+Otherwise they are new locals after those of the caller, which all the
+inlined calls of the caller share, since a leaf calls nothing and two of
+them never run at once. The leaves are left in the program, for
+`whole_program` to remove those that are not called anymore.
+"""
+import json
+from collections import Counter
+
+from whole_program import functions_of
+
+__all__ = ["inline", "inline_files", "leaves"]
+
+FREE_TEMPS = range(3, 8)
+
+
+def leaves(classes, max_size):
+    """Returns the number of locals and the code of the leaves of the
+    classes, which map class names to their vm lines."""
+    result = {}
+    for lines in classes.values():
+        for name, start, end in functions_of(lines):
+            code = lines[start + 1 : end]
+            if len(code) <= max_size and not any(
+                line.startswith("call ") or " static " in line for line in code
+            ):
+                result[name] = int(lines[start].split()[2]), code
+    return result
+
+
+def expand(leaf, arguments, base, label):
+    """The code of the call of the leaf, with the number of locals from
+    `base` on it uses, none if its variables fit in the free temps."""
+    local_count, code = leaf
+    # a method starts with `push argument 0, pop pointer 0`, this can go
+    # right from the stack to the pointer once the pointer is saved
+    this = (
+        arguments > 0
+        and code[:2] == ["push argument 0", "pop pointer 0"]
+        and sum(line.endswith(" argument 0") for line in code) == 1
+    )
+    pointers = [p for p in (0, 1) if f"pop pointer {p}" in code]
+    if this:
+        code = code[2:]
+    size = arguments - this + len(pointers) + local_count
+    in_temps = size <= len(FREE_TEMPS)
+    if in_temps:
+        slots = [f"temp {t}" for t in FREE_TEMPS[:size]]
+    else:
+        slots = [f"local {base + k}" for k in range(size)]
+    argument_slots = [None] * this + slots[: arguments - this]
+    pointer_slots = slots[arguments - this : size - local_count]
+    local_slots = slots[size - local_count :]
+    result = [f"pop {slot}" for slot in reversed(argument_slots[this:])]
+    for pointer, slot in zip(pointers, pointer_slots):
+        result += [f"push pointer {pointer}", f"pop {slot}"]
+    if this:
+        result.append("pop pointer 0")
+    for slot in local_slots:
+        result += ["push constant 0", f"pop {slot}"]
+    end = f"{label}.END"
+    ends = False
+    for index, line in enumerate(code):
+        words = line.split()
+        if words[0] in ("push", "pop") and words[1] == "argument":
+            line = f"{words[0]} {argument_slots[int(words[2])]}"
+        elif words[0] in ("push", "pop") and words[1] == "local":
+            line = f"{words[0]} {local_slots[int(words[2])]}"
+        elif words[0] in ("label", "goto", "if-goto"):
+            line = f"{words[0]} {label}.{words[1]}"
+        elif words[0] == "return":
+            if index == len(code) - 1:
+                continue  # the end is next
+            line = f"goto {end}"
+            ends = True
+        result.append(line)
+    if ends:
+        result.append(f"label {end}")
+    for pointer, slot in zip(pointers, pointer_slots):
+        result += [f"push {slot}", f"pop pointer {pointer}"]
+    return result, 0 if in_temps else size
+
+
+def inline(classes, max_size):
+    """Inlines the calls of the leaves of at most `max_size` commands.
+
+    Returns the new vm lines of every class, with the index of the line of
+    the old ones each comes from (that of the call for an inlined leaf), and
+    the number of calls inlined of every leaf."""
+    leaf_code = leaves(classes, max_size)
+    inlined = Counter()
+    result = {}
+    for class_name, lines in classes.items():
+        new_lines, origins = [], []
+        labels = 0
+        for name, start, end in functions_of(lines):
+            words = lines[start].split()
+            local_count = int(words[2])
+            extra = 0
+            code, code_origins = [], []
+            for index in range(start + 1, end):
+                words = lines[index].split()
+                if words[0] == "call" and words[1] in leaf_code:
+                    expanded, used = expand(
+                        leaf_code[words[1]],
+                        int(words[2]),
+                        local_count,
+                        f"INLINE{labels}",
+                    )
+                    labels += 1
+                    extra = max(extra, used)
+                    inlined[words[1]] += 1
+                    code += expanded
+                    code_origins += [index] * len(expanded)
+                else:
+                    code.append(lines[index])
+                    code_origins.append(index)
+            new_lines.append(f"function {name} {local_count + extra}")
+            origins.append(start)
+            new_lines += code
+            origins += code_origins
+        result[class_name] = new_lines, origins
+    return result, inlined
+
+
+def inline_files(vm_files, max_size):
+    """Inlines the leaves of the program of the .vm files in them, and in
+    their source maps. Returns the number of calls inlined of every leaf."""
+    classes = {path: path.read_text().splitlines() for path in vm_files}
+    result, inlined = inline(classes, max_size)
+    for path, (lines, origins) in result.items():
+        if lines == classes[path]:
+            continue
+        path.write_text("".join(line + "\n" for line in lines))
+        source_map_path = path.with_suffix(".vmmap")
+        if source_map_path.exists():
+            source_map = json.loads(source_map_path.read_text())
+            source_map["lines"] = [source_map["lines"][i] for i in origins]
+            source_map_path.write_text(json.dumps(source_map))
+    return inlined
@@ -1,30 +1,342 @@
+import json
+import os
+import time
 import click
 import compiler
+from cache import BuildCache, DEFAULT_DIRECTORY, DEFAULT_MAX_SIZE
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import partial
+from inline import inline_files
 from pathlib import Path
+from profiling import NO_PROFILER, PhaseProfiler
+from tokenizer import open_source
+from typing import Optional
+from watching import DEFAULT_INTERVAL, Watcher
+from whole_program import ROOTS, prune_files
 
 
 def files_to_process(path: Path):
     """Returns the path of the jack files in the given path if dir."""
     if path.is_dir():
-        return [d for d in path.iterdir() if d.suffix == ".jack"]
+        return sorted(d for d in path.iterdir() if d.suffix == ".jack")
     else:
         return [path] if path.suffix == ".jack" else []
 
 
+@dataclass
+class FileResult:
+    cached: bool = False
+    error: Optional[str] = None  # message of the compilation error
+    instructions_removed: int = 0  # by the optimizer
+    phases: Optional[dict] = None  # recorded by the profiler
+
+
+def compile_file(
+    fname: Path,
+    cache=None,
+    optimize=0,
+    pool_strings=False,
+    profiler=NO_PROFILER,
+    source_map=False,
+):
+    """Compiles the jack file into the .vm file next to it, or restores the
+    .vm file from the cache if the source code is unchanged.
+
+    With `source_map` the file is always compiled, and the jack line of
+    every vm line is written as JSON to the .vmmap file next to it.
+    """
+    result = FileResult()
+    try:
+        with ExitStack() as stack:
+            with profiler.phase(fname, "read"):
+                # mapped, not read: the tokens are scanned from the page cache
+                source_code = stack.enter_context(open_source(fname))
+            key = result_string = None
+            if cache:
+                with profiler.phase(fname, "cache"):
+                    key = cache.key(source_code)
+                    result_string = cache.get(key)
+            result.cached = result_string is not None and not source_map
+            if not result.cached:
+                jack = compiler.JackCompiler(
+                    source_code, optimize, pool_strings, source_map
+                )
+                result_string = "\n".join(jack.compile(profiler, fname)) + "\n"
+                result.instructions_removed = jack.instructions_removed
+                if cache:
+                    with profiler.phase(fname, "cache"):
+                        cache.put(key, result_string)
+        with profiler.phase(fname, "write"):
+            with open(fname.with_suffix(".vm"), "w") as ans:
+                ans.write(result_string)
+            if source_map:
+                with open(fname.with_suffix(".vmmap"), "w") as ans:
+                    json.dump({"source": fname.name, "lines": jack.lines}, ans)
+    except Exception as error:
+        result.error = f"{type(error).__name__}: {error}"
+    result.phases = profiler.files.get(str(fname))
+    return result
+
+
+def compile_files(
+    filenames,
+    jobs=1,
+    cache=None,
+    optimize=0,
+    pool_strings=False,
+    profiler=NO_PROFILER,
+    source_map=False,
+):
+    """Compiles the files, in a pool of `jobs` processes if more than one.
+
+    Returns the `FileResult`s in the order of the files."""
+    compile_ = partial(
+        compile_file,
+        cache=cache,
+        optimize=optimize,
+        pool_strings=pool_strings,
+        profiler=profiler,
+        source_map=source_map,
+    )
+    if jobs == 1 or len(filenames) == 1:
+        return [compile_(fname) for fname in filenames]
+    workers = min(jobs, len(filenames))
+    # a few chunks per worker keep the load balanced with little pickling
+    chunksize = max(1, len(filenames) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(compile_, filenames, chunksize=chunksize))
+    # the workers recorded the phases in their copy of the profiler
+    for fname, result in zip(filenames, results):
+        if result.phases:
+            profiler.add(fname, result.phases)
+    return results
+
+
+def build(
+    filenames,
+    jobs=1,
+    cache=None,
+    optimize=0,
+    pool_strings=False,
+    profiler=NO_PROFILER,
+    source_map=False,
+    inline_size=0,
+    whole_program=False,
+):
+    """Compiles the files of a program, runs the whole-program passes over
+    them and reports the results. Returns the files that failed, with their
+    errors."""
+    results = compile_files(
+        filenames, jobs, cache, optimize, pool_strings, profiler, source_map
+    )
+    if optimize:
+        for fname, result in zip(filenames, results):
+            if not result.error:
+                removed = "cached" if result.cached else result.instructions_removed
+                click.echo(f"{fname}: instructions removed: {removed}")
+    failed = [
+        (f, result.error) for f, result in zip(filenames, results) if result.error
+    ]
+    if inline_size and not failed:
+        inlined = inline_files([f.with_suffix(".vm") for f in filenames], inline_size)
+        for name, calls in sorted(inlined.items()):
+            click.echo(f"inlined {name} ({calls} calls)")
+        click.echo(
+            f"inline: {sum(inlined.values())} calls of {len(inlined)} subroutines "
+            "inlined"
+        )
+    if whole_program and not failed:
+        removed = prune_files([f.with_suffix(".vm") for f in filenames])
+        if removed is None:
+            click.echo(f"whole program: no {' or '.join(ROOTS)}, nothing removed")
+        else:
+            for function in removed:
+                click.echo(f"removed {function.name} ({function.lines} vm lines)")
+            click.echo(
+                f"whole program: {len(removed)} functions removed, "
+                f"{sum(function.lines for function in removed)} vm lines saved"
+            )
+    if cache:
+        hits = sum(result.cached for result in results)
+        click.echo(f"cache: {hits} hits, {len(results) - hits} misses")
+    for fname, error in failed:
+        click.echo(f"Unable to compile {fname}: {error}", err=True)
+    return failed
+
+
+def watch_paths(watcher, build_program, whole_program=False, interval=DEFAULT_INTERVAL):
+    """Compiles again the files of the paths of the watcher that change,
+    until interrupted. The watcher is created before the first build, so
+    that the changes made during it are compiled too.
+
+    With the whole-program passes, which read the vm code of every class,
+    the whole program of a changed file is built again, the unchanged files
+    being restored from the cache."""
+    paths = watcher.paths
+    click.echo(f"Watching {', '.join(map(str, paths))}, press Ctrl-C to stop")
+    try:
+        for changed in watcher.watch(interval):
+            start = time.perf_counter()
+            for path in paths:
+                # listed again, for the files created meanwhile
+                filenames = files_to_process(Path(path))
+                touched = [f for f in changed if f in filenames]
+                if touched:
+                    build_program(filenames if whole_program else touched)
+            elapsed = 1000 * (time.perf_counter() - start)
+            click.echo(f"watch: {len(changed)} changed, built in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+
+
 @click.command()
-@click.argument("path", type=click.Path(exists=True))
-def jack_compile(path=""):
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--jobs",
+    "-j",
+    default=1,
+    type=click.IntRange(min=0),
+    help="Number of classes compiled in parallel, 0 for one per cpu.",
+)
+@click.option(
+    "--no-cache", is_flag=True, help="Compile every file, ignoring the cache."
+)
+@click.option(
+    "--cache-dir",
+    default=str(DEFAULT_DIRECTORY),
+    envvar="JACK_COMPILER_CACHE",
+    type=click.Path(file_okay=False),
+    help="Directory of the build cache.",
+)
+@click.option(
+    "--cache-size",
+    default=DEFAULT_MAX_SIZE,
+    type=click.IntRange(min=0),
+    help="Maximum size of the build cache in bytes.",
+)
+@click.option(
+    "--optimize",
+    "-O",
+    default=0,
+    type=click.IntRange(0, 2),
+    help="Optimization level, 1 runs the peephole optimizer, 2 also folds "
+    "constants and multiplies by constants without Math.multiply.",
+)
+@click.option(
+    "--pool-strings",
+    is_flag=True,
+    help="Build each string literal once and reuse it afterwards.",
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False),
+    help="Write the time and peak memory of each phase as JSON to this file.",
+)
+@click.option(
+    "--profile-stats",
+    type=click.Path(dir_okay=False),
+    help="Write the cProfile statistics of the code generation to this file, "
+    "compiling in one process.",
+)
+@click.option(
+    "--source-map",
+    is_flag=True,
+    help="Also write the jack line of every vm line to a .vmmap file, "
+    "for the profiler of the vm emulator.",
+)
+@click.option(
+    "--inline",
+    "inline_size",
+    default=0,
+    type=click.IntRange(min=0),
+    help="Inline the calls of the subroutines of at most this many vm commands "
+    "that call nothing, across the classes of the directory, 0 for none.",
+)
+@click.option(
+    "--whole-program",
+    is_flag=True,
+    help=f"Remove the subroutines that cannot be called from {' or '.join(ROOTS)} "
+    "in any class of the directory.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and compile again every jack file that changes.",
+)
+@click.option(
+    "--interval",
+    default=DEFAULT_INTERVAL,
+    type=click.FloatRange(min=0),
+    help="Seconds between two polls of the files with --watch.",
+)
+def jack_compile(
+    paths=(),
+    jobs=1,
+    no_cache=False,
+    cache_dir=None,
+    cache_size=None,
+    optimize=0,
+    pool_strings=False,
+    profile=None,
+    profile_stats=None,
+    source_map=False,
+    inline_size=0,
+    whole_program=False,
+    watch=False,
+    interval=DEFAULT_INTERVAL,
+):
     """compiler"""
-    filenames = files_to_process(Path(path))
-    if not filenames:
-        click.echo(f"Unable to detect jack files in the given path: {path}")
+    if watch and (profile or profile_stats):
+        raise click.UsageError("--watch cannot be used with --profile")
+    programs = []
+    for path in paths:
+        filenames = files_to_process(Path(path))
+        if not filenames:
+            click.echo(f"Unable to detect jack files in the given path: {path}")
+        else:
+            programs.append(filenames)
+    if not programs:
         return
-    for fname in filenames:
-        with open(fname) as stream:
-            jack = compiler.JackCompiler(stream.read())
-            result_string = "\n".join(jack.compile()) + "\n"
-            with open(fname.with_suffix(".vm"), "w") as ans:
-                ans.write(result_string)
+    options = f"-O{optimize}" + (" --pool-strings" if pool_strings else "")
+    cache = None if no_cache else BuildCache(cache_dir, cache_size, options)
+    profiler = NO_PROFILER
+    if profile or profile_stats:
+        profiler = PhaseProfiler("codegen" if profile_stats else None)
+        if profile_stats:
+            jobs = 1  # the statistics are those of this process
+    build_program = partial(
+        build,
+        cache=cache,
+        optimize=optimize,
+        pool_strings=pool_strings,
+        profiler=profiler,
+        source_map=source_map,
+        inline_size=inline_size,
+        whole_program=whole_program,
+    )
+    # polled from before the first build, which misses none of the changes
+    # made meanwhile
+    watcher = Watcher(paths) if watch else None
+    # each path is a program of its own for the whole-program passes
+    failed = []
+    for filenames in programs:
+        failed += build_program(filenames, jobs or os.cpu_count())
+    if profile:
+        profiler.write(Path(profile))
+    if profile_stats:
+        profiler.dump_stats(Path(profile_stats))
+    if cache:
+        cache.evict()
+    if watch:
+        # in this process: a pool would cost more than the few files changed
+        watch_paths(watcher, build_program, inline_size or whole_program, interval)
+        if cache:
+            cache.evict()
+    elif failed:
+        raise SystemExit(1)
+
 
 if __name__ == "__main__":
     jack_compile()
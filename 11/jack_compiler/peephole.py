@@ -0,0 +1,162 @@
+"""Window-based peephole optimizer of the generated vm code.
+
+Every instruction is appended to the output and the rules below are tried on
+the tail of the output. A rule that matches replaces the matched instructions,
+and its replacement is fed through the rules again, so rewrites cascade
+(e.g. the `not` introduced for an if statement cancels a `not` of the
+condition). Then unreachable instructions and unreferenced labels are
+removed, and everything is repeated until nothing changes.
+
+The rewrites keep the behavior of the program, except for the value left in
+`temp 0`, which the compiler only uses as a scratch register.
+"""
+from collections import deque
+
+__all__ = ["optimize"]
+
+# segments whose value is unaffected by `pop pointer 1`
+STABLE_SEGMENTS = ("constant", "local", "argument", "static", "this", "temp")
+
+
+def is_stable_push(instruction):
+    parts = instruction.split()
+    return len(parts) == 3 and parts[0] == "push" and parts[1] in STABLE_SEGMENTS
+
+
+def double_negation(tail):
+    """not, not => ; neg, neg =>"""
+    if tail[-1] == tail[-2] and tail[-1] in ("not", "neg"):
+        return 2, []
+
+
+def neutral_operand(tail):
+    """push constant 0, (add | sub | or) =>"""
+    if tail[-2] == "push constant 0" and tail[-1] in ("add", "sub", "or"):
+        return 2, []
+
+
+def constant_condition(tail):
+    """push constant 0, if-goto L => ; push constant 0, not, if-goto L => goto L"""
+    if not tail[-1].startswith("if-goto "):
+        return None
+    if tail[-2] == "push constant 0":
+        return 2, []
+    if len(tail) > 2 and tail[-3:-1] == ["push constant 0", "not"]:
+        return 3, [f"goto {tail[-1].split()[1]}"]
+
+
+def is_boolean(tail, index):
+    """Whether the instruction at the negative index leaves 0 or -1 (true)
+    on the stack: a comparison, or the `not` of one."""
+    while tail[index] == "not" and index > -len(tail):
+        index -= 1
+    return tail[index] in ("eq", "gt", "lt")
+
+
+def branch_over_goto(tail):
+    """b, if-goto A, goto B, label A => b, not, if-goto B, label A
+
+    where b is a boolean: for any other nonzero value, which if-goto takes as
+    true, `not` would not be false."""
+    if len(tail) < 4:
+        return None
+    if_goto, goto, label = tail[-3:]
+    if (
+        if_goto.startswith("if-goto ")
+        and goto.startswith("goto ")
+        and label == f"label {if_goto.split()[1]}"
+        and is_boolean(tail, -4)
+    ):
+        return 3, ["not", f"if-goto {goto.split()[1]}", label]
+
+
+def goto_next(tail):
+    """goto L, label L => label L"""
+    if tail[-1].startswith("label ") and tail[-2] == f"goto {tail[-1].split()[1]}":
+        return 2, [tail[-1]]
+
+
+def repeated_array_read(tail):
+    """a, b, add, pop pointer 1, push that 0, a, b, add, pop pointer 1, push that 0
+    => a, b, add, pop pointer 1, push that 0, push that 0"""
+    if len(tail) < 10 or tail[-1] != "push that 0" or tail[-5:] != tail[-10:-5]:
+        return None
+    if tail[-3:-1] == ["add", "pop pointer 1"] and all(
+        map(is_stable_push, tail[-5:-3])
+    ):
+        return 5, ["push that 0"]
+
+
+def simple_array_write(tail):
+    """push x, pop temp 0, pop pointer 1, push temp 0, pop that 0
+    => pop pointer 1, push x, pop that 0"""
+    if len(tail) < 5 or tail[-4:] != [
+        "pop temp 0",
+        "pop pointer 1",
+        "push temp 0",
+        "pop that 0",
+    ]:
+        return None
+    if is_stable_push(tail[-5]):
+        return 5, ["pop pointer 1", tail[-5], "pop that 0"]
+
+
+RULES = (
+    double_negation,
+    neutral_operand,
+    constant_condition,
+    branch_over_goto,
+    goto_next,
+    repeated_array_read,
+    simple_array_write,
+)
+
+
+def rewrite(instructions):
+    result = []
+    pending = deque(instructions)
+    while pending:
+        result.append(pending.popleft())
+        if len(result) < 2:
+            continue
+        for rule in RULES:
+            match = rule(result)
+            if match:
+                count, replacement = match
+                del result[-count:]
+                pending.extendleft(reversed(replacement))
+                break
+    return result
+
+
+def remove_dead_code(instructions):
+    """Removes the instructions that follow a goto or a return up to the next
+    label or function, and the labels that are never jumped to."""
+    targets = {
+        instruction.split()[1]
+        for instruction in instructions
+        if instruction.startswith(("goto ", "if-goto "))
+    }
+    result = []
+    reachable = True
+    for instruction in instructions:
+        if instruction.startswith("label "):
+            if instruction.split()[1] not in targets:
+                continue
+            reachable = True
+        elif instruction.startswith("function "):
+            reachable = True
+        if reachable:
+            result.append(instruction)
+        if instruction == "return" or instruction.startswith("goto "):
+            reachable = False
+    return result
+
+
+def optimize(instructions):
+    """Returns the optimized list of vm instructions."""
+    while True:
+        result = remove_dead_code(rewrite(instructions))
+        if result == instructions:
+            return result
+        instructions = result
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+import bench_suite  # noqa: E402
+
+
+@pytest.mark.parametrize("phase", bench_suite.PHASES)
+def test_synthetic_classes(phase):
+    for source in bench_suite.synthetic():
+        assert bench_suite.PHASES[phase](source)
+
+
+def test_corpus():
+    sources = bench_suite.corpus(rounds=2)
+    assert len(sources) % 2 == 0
+    assert len(sources) >= 2 * 40
+
+
+def test_regressions():
+    baselines = {"corpus/parse": 1.0, "corpus/compile": 2.0}
+    timings = {"corpus/parse": 1.2, "corpus/compile": 2.6, "synthetic/parse": 9.0}
+    assert bench_suite.regressions(timings, baselines, 0.25) == [
+        "corpus/compile: 2.600s, baseline 2.000s (+30%)"
+    ]
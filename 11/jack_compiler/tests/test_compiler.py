@@ -0,0 +1,177 @@
+import gc
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from compiler import JackCompiler
+from tokenizer import open_source
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+SOURCE = """
+class Point {
+    field int x, y;
+    static Array cache;
+
+    method int get(int i) {
+        var int ok;
+        let cache[i] = x;
+        if (~(i < 0)) { do Output.printString("ok"); }
+        while (ok) { let ok = ok - 1; }
+        return cache[i] + get(y);
+    }
+}
+"""
+
+EXPECTED = """\
+function Point.get 1
+push argument 0
+pop pointer 0
+push argument 1
+push static 0
+add
+push this 0
+pop temp 0
+pop pointer 1
+push temp 0
+pop that 0
+push argument 1
+push constant 0
+lt
+not
+if-goto THEN0
+goto ELSE0
+label THEN0
+push constant 2
+call String.new 1
+push constant 111
+call String.appendChar 2
+push constant 107
+call String.appendChar 2
+call Output.printString 1
+pop temp 0
+label ELSE0
+label WHILE0
+push local 0
+not
+if-goto ENDWHILE0
+push local 0
+push constant 1
+sub
+pop local 0
+goto WHILE0
+label ENDWHILE0
+push argument 1
+push static 0
+add
+pop pointer 1
+push that 0
+push pointer 0
+push this 1
+call Point.get 2
+add
+return"""
+
+
+def test_compile():
+    assert "\n".join(JackCompiler(SOURCE).compile()) == EXPECTED
+
+
+def test_pool_strings():
+    source = """
+class Log {
+    static int count;
+
+    function void f() {
+        do Output.printString("ok");
+        do Output.printString("no");
+        do Output.printString("ok");
+        return;
+    }
+}
+"""
+    instructions = JackCompiler(source, pool_strings=True).compile()
+    # every site builds its literal unless the pool already holds it
+    assert instructions.count("call String.new 1") == 3
+    assert instructions[1:9] == [
+        "push static 1",
+        "if-goto POOLED0",
+        "push constant 2",
+        "call String.new 1",
+        "push constant 111",
+        "call String.appendChar 2",
+        "push constant 107",
+        "call String.appendChar 2",
+    ]
+    assert instructions[9:12] == ["pop static 1", "label POOLED0", "push static 1"]
+    # the second "ok" reuses static 1, "no" got static 2
+    assert instructions[instructions.index("label POOLED2") + 1] == "push static 1"
+    assert "pop static 2" in instructions
+
+
+def test_source_map():
+    jack = JackCompiler(SOURCE, source_map=True)
+    instructions = jack.compile()
+    assert "\n".join(instructions) == EXPECTED
+    assert len(jack.lines) == len(instructions)
+    lines = dict(zip(instructions, jack.lines))
+    assert jack.lines[:3] == [6, 6, 6]  # the prologue, on the method
+    assert lines["push this 0"] == 8
+    assert lines["call Output.printString 1"] == 9
+    assert lines["label WHILE0"] == lines["goto WHILE0"] == 10
+    assert lines["return"] == 11
+
+
+def test_source_map_after_peephole():
+    jack = JackCompiler(SOURCE, optimize=2, source_map=True)
+    instructions = jack.compile()
+    assert len(jack.lines) == len(instructions)
+    assert None not in jack.lines
+    assert jack.lines == sorted(jack.lines)
+
+
+def synthetic_class(subroutines):
+    return "class Main {\n    field int y;\n%s}\n" % "".join(
+        f"""
+    function int f{i}(int x) {{
+        var int a, b;
+        let a = x + {i};
+        while (a > 0) {{ let b = b + (a * 2); let a = a - 1; }}
+        do Output.printString("subroutine {i}");
+        return b;
+    }}
+"""
+        for i in range(subroutines)
+    )
+
+
+@pytest.mark.parametrize("optimize", [0, 2])
+def test_memory_mapped_source(tmp_path, optimize):
+    fnames = [*ROOT_DIR.glob("1[012]/**/*.jack"), tmp_path / "Main.jack"]
+    fnames[-1].write_text(synthetic_class(3))
+    for fname in fnames:
+        jack = JackCompiler(fname.read_text(), optimize, source_map=True)
+        expected = jack.compile()
+        with open_source(fname) as source_code:
+            mapped = JackCompiler(source_code, optimize, source_map=True)
+            assert mapped.compile() == expected
+        assert mapped.lines == jack.lines
+
+
+def test_memory_does_not_grow_with_the_source(tmp_path):
+    """Besides the vm code, the compilation of a mapped file holds its
+    tokens and syntax tree one subroutine at a time."""
+    transient = []
+    for subroutines in (50, 400):
+        fname = tmp_path / f"Main{subroutines}.jack"
+        fname.write_text(synthetic_class(subroutines))
+        gc.collect()
+        tracemalloc.start()
+        with open_source(fname) as source_code:
+            result = JackCompiler(source_code).compile()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(result) > 20 * subroutines
+        transient.append(peak - current)
+    assert transient[1] < 1.5 * transient[0]
@@ -0,0 +1,77 @@
+import pytest
+
+import jack_ast
+from compiler import JackCompiler, add_chain
+from fold import ConstantFolder, to_word
+
+
+def folded(expression):
+    tree = jack_ast.parse(f"class A {{ function int f() {{ return {expression}; }} }}")
+    ConstantFolder().fold(tree)
+    return tree.subroutine_decs[0].statements[0].value
+
+
+@pytest.mark.parametrize(
+    "expression, value",
+    [
+        ("1 + 2 * 3", 9),  # no operator precedence in Jack
+        ("-(3 - 5)", 2),
+        ("~0", -1),
+        ("32767 + 1", -32768),
+        ("-7 / 2", -3),
+        ("300 * 300", to_word(90000)),
+        ("(1 < 2) & true", -1),
+        ("~(1 = 1)", 0),
+    ],
+)
+def test_constants(expression, value):
+    node = folded(expression)
+    assert isinstance(node, jack_ast.IntegerConstant)
+    assert node.value == value
+
+
+def test_identities_and_division_by_zero():
+    assert isinstance(folded("(x + 0) * 1"), jack_ast.VarName)
+    assert folded("1 / 0").op == "/"
+
+
+def run(instructions, x):
+    """Evaluates straight-line arithmetic vm code with `local 0` = x."""
+    stack, temp = [], {}
+    for instruction in instructions:
+        match instruction.split():
+            case ["push", "constant", value]:
+                stack.append(int(value))
+            case ["push", "local", "0"]:
+                stack.append(x)
+            case ["push", "temp", index]:
+                stack.append(temp[index])
+            case ["pop", "temp", index]:
+                temp[index] = stack.pop()
+            case ["add"]:
+                stack.append(to_word(stack.pop() + stack.pop()))
+            case ["or"]:
+                stack.append(stack.pop() | stack.pop())
+            case ["neg"]:
+                stack.append(to_word(-stack.pop()))
+            case ["not"]:
+                stack.append(~stack.pop())
+    assert len(stack) == 1
+    return stack[0]
+
+
+@pytest.mark.parametrize("factor", [2, 3, 5, 10, 12, 80, -6, -32767])
+@pytest.mark.parametrize("operand", ["x", "(x | x)"])
+def test_multiplication_by_constant(factor, operand):
+    source = (
+        "class A { function int f() { var int x; "
+        f"return {operand} * ({factor}); }} }}"
+    )
+    instructions = JackCompiler(source, optimize=2).compile()
+    body = instructions[1:-1]
+    if len(add_chain(abs(factor), "push temp 1")) > 32:
+        assert "call Math.multiply 2" in body
+    else:
+        assert "call Math.multiply 2" not in body
+        for x in (0, 1, -3, 7, 1000, 32767):
+            assert run(body, x) == to_word(x * factor)
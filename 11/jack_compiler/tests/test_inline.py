@@ -0,0 +1,210 @@
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+import jack_compiler
+from compiler import JackCompiler
+from inline import expand, inline, inline_files, leaves
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(ROOT_DIR / "08" / "vm_emulator"))
+from jack_os import SYS_INIT, NativeOS  # noqa: E402
+from machine import VirtualMachine  # noqa: E402
+from profiler import Profile  # noqa: E402
+
+POINT = """
+class Point {
+    field int x, y;
+
+    constructor Point new(int ax, int ay) {
+        let x = ax;
+        let y = ay;
+        return this;
+    }
+
+    method int getX() { return x; }
+
+    method int getY() { return y; }
+
+    method void setX(int ax) { let x = ax; return; }
+
+    method int manhattan(Point other) {
+        return Point.abs(x - other.getX()) + Point.abs(y - other.getY());
+    }
+
+    function int abs(int a) {
+        if (a < 0) { return -a; }
+        return a;
+    }
+
+    function int sum(int n) {
+        var int i, total;
+        while (i < n) {
+            let i = i + 1;
+            let total = total + i;
+        }
+        return total;
+    }
+}
+"""
+
+MAIN = """
+class Main {
+    function void main() {
+        var Point p, q;
+        var int i;
+        let p = Point.new(3, -4);
+        let q = Point.new(-2, 7);
+        while (i < 3) {
+            do p.setX(p.getX() + Point.abs(q.getX()));
+            do Output.printInt(p.manhattan(q));
+            do Output.printInt(Point.sum(i + 4));
+            let i = i + 1;
+        }
+        do Output.printInt(p.getX() + p.getY());
+        return;
+    }
+}
+"""
+
+
+def compile_program(*sources):
+    return {name: JackCompiler(source).compile() for name, source in sources}
+
+
+def run(classes):
+    jack_os = NativeOS()
+    files = [(name, "\n".join(lines)) for name, lines in classes.items()]
+    files.append(SYS_INIT)
+    vm = VirtualMachine(files, jack_os.functions())
+    profile = Profile(vm, files)
+    vm.run(100_000)
+    assert vm.halted and vm.error is None
+    calls = sum(function["calls"] for function in profile.functions().values())
+    return calls, jack_os.text
+
+
+def test_leaves():
+    classes = compile_program(("Point", POINT))
+    found = leaves(classes, 30)
+    # the constructor calls Memory.alloc, manhattan calls the others
+    assert set(found) == {
+        "Point.getX",
+        "Point.getY",
+        "Point.setX",
+        "Point.abs",
+        "Point.sum",
+    }
+    assert found["Point.sum"][0] == 2
+    assert "Point.sum" not in leaves(classes, 10)
+
+
+def test_expand_method():
+    leaf = 0, ["push argument 0", "pop pointer 0", "push this 1", "return"]
+    code, used = expand(leaf, 1, 3, "INLINE0")
+    assert code == [
+        "push pointer 0",
+        "pop temp 3",
+        "pop pointer 0",
+        "push this 1",
+        "push temp 3",
+        "pop pointer 0",
+    ]
+    assert used == 0
+
+
+def test_expand_renames_labels_and_returns():
+    leaf = 1, [
+        "push argument 0",
+        "if-goto L",
+        "push local 0",
+        "return",
+        "label L",
+        "push argument 0",
+        "return",
+    ]
+    code, used = expand(leaf, 1, 0, "INLINE2")
+    assert code == [
+        "pop temp 3",
+        "push constant 0",
+        "pop temp 4",
+        "push temp 3",
+        "if-goto INLINE2.L",
+        "push temp 4",
+        "goto INLINE2.END",
+        "label INLINE2.L",
+        "push temp 3",
+        "label INLINE2.END",
+    ]
+    assert used == 0
+
+
+def test_expand_into_locals():
+    # 4 arguments and 2 locals do not fit in the 5 free temps
+    leaf = 2, ["push argument 3", "pop local 1", "push local 1", "return"]
+    code, used = expand(leaf, 4, 2, "INLINE0")
+    assert code == [
+        "pop local 5",
+        "pop local 4",
+        "pop local 3",
+        "pop local 2",
+        "push constant 0",
+        "pop local 6",
+        "push constant 0",
+        "pop local 7",
+        "push local 5",
+        "pop local 7",
+        "push local 7",
+    ]
+    assert used == 6
+
+
+@pytest.mark.parametrize(
+    "max_size, calls_saved",
+    [
+        # getX three times, getY in every iteration, and getX and getY after
+        (5, 3 * 4 + 2),
+        # and setX, abs three times and sum
+        (30, 3 * 9 + 2),
+    ],
+)
+def test_inlined_program_runs_the_same(max_size, calls_saved):
+    classes = compile_program(("Main", MAIN), ("Point", POINT))
+    result, inlined = inline(classes, max_size)
+    assert inlined["Point.getX"] == 4
+    assert ("Point.sum" in inlined) == (max_size == 30)
+    inlined_classes = {name: lines for name, (lines, _) in result.items()}
+    assert not any(
+        line.startswith("call Point.get")
+        for lines in inlined_classes.values()
+        for line in lines
+    )
+    calls, text = run(classes)
+    inlined_calls, inlined_text = run(inlined_classes)
+    assert inlined_text == text
+    assert calls - inlined_calls == calls_saved
+    for name, (lines, origins) in result.items():
+        assert len(origins) == len(lines)
+        assert all(
+            line == classes[name][origin] or classes[name][origin].startswith("call ")
+            for line, origin in zip(lines, origins)
+            if not line.startswith("function ")
+        )
+
+
+def test_inline_files(tmp_path):
+    for fname in (ROOT_DIR / "11" / "Pong").glob("*.jack"):
+        shutil.copy(fname, tmp_path)
+    filenames = jack_compiler.files_to_process(tmp_path)
+    jack_compiler.compile_files(filenames, source_map=True)
+    inlined = inline_files([f.with_suffix(".vm") for f in filenames], 20)
+    assert inlined["Ball.getLeft"] > 0
+    assert "Bat.getLeft" in inlined
+    for fname in filenames:
+        vm_lines = fname.with_suffix(".vm").read_text().splitlines()
+        source_map = json.loads(fname.with_suffix(".vmmap").read_text())
+        assert len(source_map["lines"]) == len(vm_lines)
+    assert "call Ball.getLeft" not in (tmp_path / "PongGame.vm").read_text()
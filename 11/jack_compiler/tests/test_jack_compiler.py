@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+import jack_compiler
+import watching
+from cache import BuildCache
+from jack_compiler import FileResult
+from profiling import PhaseProfiler
+from watching import Watcher
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]  # 11/
+
+
+@pytest.fixture
+def square(tmp_path):
+    for fname in (PROJECT_DIR / "Square").glob("*.jack"):
+        shutil.copy(fname, tmp_path)
+    return tmp_path
+
+
+def test_parallel_output_matches_sequential(square):
+    filenames = jack_compiler.files_to_process(square)
+    assert [f.name for f in filenames] == [
+        "Main.jack",
+        "Square.jack",
+        "SquareGame.jack",
+    ]
+    assert jack_compiler.compile_files(filenames, jobs=1) == [FileResult()] * 3
+    sequential = [f.with_suffix(".vm").read_text() for f in filenames]
+    for f in filenames:
+        f.with_suffix(".vm").unlink()
+    assert jack_compiler.compile_files(filenames, jobs=2) == [FileResult()] * 3
+    assert [f.with_suffix(".vm").read_text() for f in filenames] == sequential
+
+
+def test_errors_are_reported_in_file_order(square):
+    (square / "Broken.jack").write_text("class Broken {")
+    filenames = jack_compiler.files_to_process(square)
+    results = jack_compiler.compile_files(filenames, jobs=2)
+    assert [f.name for f, r in zip(filenames, results) if r.error] == ["Broken.jack"]
+
+
+def test_cache_restores_unchanged_files(square, tmp_path_factory):
+    cache = BuildCache(tmp_path_factory.mktemp("cache"))
+    filenames = jack_compiler.files_to_process(square)
+    jack_compiler.compile_files(filenames, cache=cache)
+    expected = [f.with_suffix(".vm").read_text() for f in filenames]
+    for f in filenames:
+        f.with_suffix(".vm").unlink()
+    main = square / "Main.jack"
+    main.write_text(main.read_text() + "\n// changed\n")
+    results = jack_compiler.compile_files(filenames, cache=cache)
+    assert [result.cached for result in results] == [False, True, True]
+    assert [f.with_suffix(".vm").read_text() for f in filenames] == expected
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = BuildCache(tmp_path, max_size=10)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, "x" * 4)
+        os.utime(tmp_path / f"{key}.vm", (i, i))
+    assert cache.get("a") == "xxxx"  # refreshes "a"
+    assert cache.evict() == 1
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == "xxxx"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_profile_records_the_phases(square, jobs):
+    filenames = jack_compiler.files_to_process(square)
+    profiler = PhaseProfiler()
+    results = jack_compiler.compile_files(
+        filenames, jobs, optimize=2, profiler=profiler
+    )
+    assert [result.error for result in results] == [None] * 3
+    assert list(profiler.files) == [str(f) for f in filenames]
+    assert set(profiler.report()["total"]) == {
+        "read",
+        "tokenize",
+        "parse",
+        "optimize",
+        "codegen",
+        "write",
+    }
+
+
+def test_source_map_files(square):
+    filenames = jack_compiler.files_to_process(square)
+    results = jack_compiler.compile_files(filenames, source_map=True)
+    assert [result.error for result in results] == [None] * 3
+    for fname in filenames:
+        source_map = json.loads(fname.with_suffix(".vmmap").read_text())
+        assert source_map["source"] == fname.name
+        vm_lines = fname.with_suffix(".vm").read_text().splitlines()
+        assert len(source_map["lines"]) == len(vm_lines)
+
+
+@pytest.mark.parametrize("whole_program", [False, True])
+def test_watch_builds_the_changed_files(square, monkeypatch, whole_program):
+    main, point = square / "Main.jack", square / "Point.jack"
+    edits = [
+        lambda: main.write_text(main.read_text() + "\n// changed\n"),
+        lambda: point.write_text("class Point { function int f() { return 0; } }"),
+    ]
+
+    def sleep(interval):
+        if not edits:
+            raise KeyboardInterrupt
+        edits.pop(0)()
+
+    monkeypatch.setattr(watching.time, "sleep", sleep)
+    built = []
+
+    def build_program(filenames):
+        built.append([f.name for f in filenames])
+        return jack_compiler.build(filenames)
+
+    jack_compiler.watch_paths(Watcher([square]), build_program, whole_program)
+    if whole_program:
+        everything = ["Main.jack", "Square.jack", "SquareGame.jack"]
+        assert built == [everything, ["Main.jack", "Point.jack"] + everything[1:]]
+    else:
+        assert built == [["Main.jack"], ["Point.jack"]]
+    assert (square / "Point.vm").read_text().startswith("function Point.f 0\n")
+
+
+def test_watch_builds_the_changes_made_during_the_first_build(square, monkeypatch):
+    def sleep(interval):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(watching.time, "sleep", sleep)
+    watcher = Watcher([square])
+    main = square / "Main.jack"
+    main.write_text(main.read_text() + "\n// changed while building\n")
+    built = []
+    jack_compiler.watch_paths(watcher, built.append)
+    assert built == [[main]]
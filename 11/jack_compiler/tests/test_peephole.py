@@ -0,0 +1,166 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from compiler import JackCompiler
+from peephole import optimize
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(ROOT_DIR / "08" / "vm_emulator"))
+from jack_os import SYS_INIT, NativeOS  # noqa: E402
+from machine import VirtualMachine  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "instructions, expected",
+    [
+        # if statement whose condition is a negated comparison
+        (
+            [
+                "push local 0",
+                "push local 1",
+                "lt",
+                "not",
+                "if-goto THEN0",
+                "goto ELSE0",
+                "label THEN0",
+                "push constant 1",
+                "return",
+                "label ELSE0",
+            ],
+            [
+                "push local 0",
+                "push local 1",
+                "lt",
+                "if-goto ELSE0",
+                "push constant 1",
+                "return",
+                "label ELSE0",
+            ],
+        ),
+        # any nonzero condition is true, `not` of it is not always false
+        (
+            [
+                "push local 0",
+                "not",
+                "if-goto THEN0",
+                "goto ELSE0",
+                "label THEN0",
+                "push constant 1",
+                "return",
+                "label ELSE0",
+            ],
+            [
+                "push local 0",
+                "not",
+                "if-goto THEN0",
+                "goto ELSE0",
+                "label THEN0",
+                "push constant 1",
+                "return",
+                "label ELSE0",
+            ],
+        ),
+        # while (true) loop
+        (
+            [
+                "label WHILE0",
+                "push constant 0",
+                "not",
+                "not",
+                "if-goto ENDWHILE0",
+                "call Main.f 0",
+                "pop temp 0",
+                "goto WHILE0",
+                "label ENDWHILE0",
+            ],
+            ["label WHILE0", "call Main.f 0", "pop temp 0", "goto WHILE0"],
+        ),
+        # code after return and unreferenced labels
+        (
+            ["push constant 0", "return", "goto ENDIF0", "label ELSE0", "label ENDIF0"],
+            ["push constant 0", "return"],
+        ),
+        # array write of a simple value
+        (
+            [
+                "push local 1",
+                "push local 0",
+                "add",
+                "push constant 7",
+                "pop temp 0",
+                "pop pointer 1",
+                "push temp 0",
+                "pop that 0",
+            ],
+            [
+                "push local 1",
+                "push local 0",
+                "add",
+                "pop pointer 1",
+                "push constant 7",
+                "pop that 0",
+            ],
+        ),
+        # the same array element read twice
+        (
+            ["push local 1", "push local 0", "add", "pop pointer 1", "push that 0"] * 2
+            + ["add"],
+            [
+                "push local 1",
+                "push local 0",
+                "add",
+                "pop pointer 1",
+                "push that 0",
+                "push that 0",
+                "add",
+            ],
+        ),
+        (
+            ["push argument 0", "push constant 0", "add", "push constant 0", "sub"],
+            ["push argument 0"],
+        ),
+    ],
+)
+def test_optimize(instructions, expected):
+    assert optimize(instructions) == expected
+
+
+def test_array_write_of_that_is_kept():
+    instructions = [
+        "push local 0",
+        "push that 0",
+        "pop temp 0",
+        "pop pointer 1",
+        "push temp 0",
+        "pop that 0",
+    ]
+    assert optimize(instructions) == instructions
+
+
+def test_non_boolean_conditions_run_the_same():
+    source = """
+    class Main {
+        function void main() {
+            do Output.printInt(Main.f(5));
+            do Output.printInt(Main.f(4));
+            return;
+        }
+
+        function int f(int x) {
+            if (x & 1) { return 1; }
+            if (~(x & 4)) { return 2; }
+            return 3;
+        }
+    }
+    """
+    outputs = []
+    for optimize_level in (0, 1):
+        jack_os = NativeOS()
+        files = [("Main", "\n".join(JackCompiler(source, optimize_level).compile()))]
+        vm = VirtualMachine(files + [SYS_INIT], jack_os.functions())
+        vm.run(10_000)
+        assert vm.halted and vm.error is None
+        outputs.append(jack_os.text)
+    assert outputs == ["12"] * 2
@@ -0,0 +1,71 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import jack_compiler
+from whole_program import dead_functions, functions_of, prune_files
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+
+@pytest.fixture
+def pong(tmp_path):
+    """Pong with the classes of the OS of ../../12."""
+    for fname in [
+        *(ROOT_DIR / "11" / "Pong").glob("*.jack"),
+        *ROOT_DIR.glob("12/*.jack"),
+    ]:
+        shutil.copy(fname, tmp_path)
+    return tmp_path
+
+
+def vm_functions(directory):
+    return {
+        name: path.read_text().splitlines()[start:end]
+        for path in directory.glob("*.vm")
+        for name, start, end in functions_of(path.read_text().splitlines())
+    }
+
+
+def test_dead_functions():
+    classes = {
+        "Main": ["function Main.main 0", "call A.f 0", "return", "function Main.g 0"],
+        "A": ["function A.f 0", "call A.f 0", "call Output.printInt 1", "return"],
+        "B": ["function B.h 0", "call Main.main 0", "return"],
+    }
+    assert dead_functions(classes) == {"Main.g", "B.h"}
+    classes["Sys"] = ["function Sys.init 0", "call B.h 0", "return"]
+    assert dead_functions(classes) == {"Main.g"}
+
+
+def test_prune_files(pong):
+    filenames = jack_compiler.files_to_process(pong)
+    jack_compiler.compile_files(filenames, source_map=True)
+    before = vm_functions(pong)
+    removed = prune_files([f.with_suffix(".vm") for f in filenames])
+    after = vm_functions(pong)
+    assert {function.name for function in removed} == set(before) - set(after)
+    assert "Output.initMap" not in after
+    assert {"Main.main", "PongGame.run", "Ball.move", "Sys.init"} <= set(after)
+    for name, lines in after.items():
+        assert lines == before[name]
+        for line in lines:
+            if line.startswith("call "):
+                callee = line.split()[1]
+                assert callee in after or callee not in before
+    for fname in filenames:
+        vm_lines = fname.with_suffix(".vm").read_text().splitlines()
+        source_map = json.loads(fname.with_suffix(".vmmap").read_text())
+        assert len(source_map["lines"]) == len(vm_lines)
+
+
+def test_program_without_entry_point(tmp_path):
+    shutil.copy(ROOT_DIR / "11" / "Pong" / "Ball.jack", tmp_path)
+    filenames = jack_compiler.files_to_process(tmp_path)
+    jack_compiler.compile_files(filenames)
+    vm = tmp_path / "Ball.vm"
+    code = vm.read_text()
+    assert prune_files([vm]) is None
+    assert vm.read_text() == code
@@ -0,0 +1,87 @@
+"""Whole-program elimination of the subroutines that are never called.
+
+The vm code of all the classes of a program is split into functions and the
+call graph is walked from the entry points, `Main.main` and `Sys.init`; the
+functions it does not reach are removed from the .vm files. Jack has no
+function pointers, so every call of a function is a `call` command, and the
+calls the compiler generates itself (`Memory.alloc` in the constructors,
+`String.new` for the literals, `Math.multiply`) are in the vm code too.
+
+Calls of functions that are not in the program, such as those of an OS that
+is not compiled with it, are left alone.
+"""
+import json
+from dataclasses import dataclass
+
+__all__ = ["ROOTS", "Removed", "dead_functions", "functions_of", "prune_files"]
+
+ROOTS = ("Main.main", "Sys.init")
+
+
+@dataclass
+class Removed:
+    name: str
+    lines: int  # of vm code
+
+
+def functions_of(lines):
+    """Yields the name, the first line and the end line of every function
+    of the vm code."""
+    starts = [
+        (index, line.split()[1])
+        for index, line in enumerate(lines)
+        if line.startswith("function ")
+    ]
+    ends = [index for index, _ in starts[1:]] + [len(lines)]
+    for (start, name), end in zip(starts, ends):
+        yield name, start, end
+
+
+def dead_functions(classes, roots=ROOTS):
+    """Returns the names of the functions of the classes, which map class
+    names to their vm lines, that cannot be called from the roots."""
+    callees = {}  # function -> functions it calls
+    for lines in classes.values():
+        for name, start, end in functions_of(lines):
+            callees[name] = {
+                line.split()[1] for line in lines[start:end] if line.startswith("call ")
+            }
+    reached = set()
+    pending = [root for root in roots if root in callees]
+    while pending:
+        name = pending.pop()
+        if name not in reached:
+            reached.add(name)
+            pending.extend(callees.get(name, ()))
+    return set(callees) - reached
+
+
+def prune_files(vm_files, roots=ROOTS):
+    """Removes the dead functions of the program of the .vm files from them,
+    and the lines of their source maps. Returns the removed functions, in
+    the order of the files, or None if the program has none of the roots."""
+    classes = {path: path.read_text().splitlines() for path in vm_files}
+    names = {name for lines in classes.values() for name, _, _ in functions_of(lines)}
+    if not names.intersection(roots):
+        return None
+    dead = dead_functions(classes, roots)
+    removed = []
+    for path, lines in classes.items():
+        functions = list(functions_of(lines))
+        kept = []
+        for name, start, end in functions:
+            if name in dead:
+                removed.append(Removed(name, end - start))
+            else:
+                kept.append((start, end))
+        if len(kept) == len(functions):
+            continue
+        path.write_text("".join(line + "\n" for s, e in kept for line in lines[s:e]))
+        source_map_path = path.with_suffix(".vmmap")
+        if source_map_path.exists():
+            source_map = json.loads(source_map_path.read_text())
+            source_map["lines"] = [
+                line for s, e in kept for line in source_map["lines"][s:e]
+            ]
+            source_map_path.write_text(json.dumps(source_map))
+    return removed
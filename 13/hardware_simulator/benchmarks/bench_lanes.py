@@ -0,0 +1,46 @@
+"""Compares the time of the evaluation of the whole truth table of a chip,
+its vectors in the lanes of one evaluation, with one evaluation per vector.
+
+    $ python benchmarks/bench_lanes.py --chip ../../02/Inc16.hdl
+"""
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from check import exhaustive_lanes  # noqa: E402
+from simulator import Chip  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+
+@click.command()
+@click.option("--chip", default=str(ROOT_DIR / "02" / "Inc16.hdl"), help="the chip")
+@click.option("--limit", default=20.0, help="minimum speedup of the lanes")
+def bench(chip, limit):
+    one = Chip(chip)
+    width = len(one.inputs)
+    vectors = 1 << width
+    start = time.perf_counter()
+    for vector in range(vectors):
+        one.inputs = [vector >> bit & 1 for bit in range(width)]
+        one.eval()
+    single = time.perf_counter() - start
+    click.echo(f"one vector at a time: {vectors} vectors in {single:.3f}s")
+    lanes = Chip(chip, vectors)
+    start = time.perf_counter()
+    lanes.inputs = [exhaustive_lanes(bit, 0, vectors) for bit in range(width)]
+    lanes.eval()
+    parallel = time.perf_counter() - start
+    click.echo(
+        f"{vectors} lanes: {parallel:.4f}s, {single / parallel:.0f} times faster"
+    )
+    if single / parallel < limit:
+        click.echo(f"less than {limit} times faster", err=True)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    bench()
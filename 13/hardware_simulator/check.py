@@ -0,0 +1,158 @@
+"""Checks of the chips against their Python models, many vectors at a time.
+
+A combinational chip with at most `EXHAUSTIVE_BITS` bits of inputs is
+checked on every combination of them, its whole truth table evaluated in
+lanes of `CHUNK` vectors; a wider chip on `vectors` random vectors. A
+sequential chip is run for `cycles` clock cycles, with random inputs at
+every cycle and one sequence of inputs per lane.
+"""
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from references import COMBINATIONAL, SEQUENTIAL
+from simulator import Chip, unpack
+
+__all__ = ["CheckResult", "check", "exhaustive_lanes"]
+
+EXHAUSTIVE_BITS = 20
+CHUNK = 1 << 16
+
+
+@dataclass
+class CheckResult:
+    path: Path
+    vectors: int
+    exhaustive: bool
+    gates: int
+    dffs: int
+    seconds: float
+    error: Optional[str] = None
+
+
+def exhaustive_lanes(bit, first, lanes):
+    """The lanes of the bit of the vectors first to first + lanes - 1, all
+    the combinations of the input bits counted in order, lanes being a
+    power of two and first a multiple of it."""
+    period = 1 << bit  # the bit alternates every `period` vectors
+    if period >= lanes:
+        return (1 << lanes) - 1 if first & period else 0
+    pattern = ((1 << period) - 1) << period
+    width = 2 * period
+    while width < lanes:
+        pattern |= pattern << width
+        width *= 2
+    return pattern
+
+
+def input_values(chip):
+    """The values of the input pins in every lane."""
+    return {
+        pin: unpack(
+            chip.inputs[chip.offsets[pin] : chip.offsets[pin] + len(nets)], chip.lanes
+        )
+        for pin, nets in chip.netlist.inputs.items()
+    }
+
+
+def describe(name, inputs, actual, expected):
+    arguments = ", ".join(f"{pin}={value}" for pin, value in inputs.items())
+    for pin, value in expected.items():
+        if actual[pin] != value:
+            return f"{name}({arguments}): {pin} is {actual[pin]}, expected {value}"
+    return None
+
+
+def first_difference(name, inputs, outputs, model, vectors):
+    """The first vector whose outputs differ from the model, None if none.
+
+    `inputs` and `outputs` map the pins to the values of every vector."""
+    for vector in range(vectors):
+        vector_inputs = {pin: inputs[pin][vector] for pin in inputs}
+        expected = model(vector_inputs)
+        for pin, value in expected.items():
+            if outputs[pin][vector] != value:
+                actual = {pin: outputs[pin][vector] for pin in outputs}
+                return describe(name, vector_inputs, actual, expected)
+    return None
+
+
+def check_combinational(chip, model, vectors, rng):
+    inputs = chip.netlist.inputs
+    width = sum(len(nets) for nets in inputs.values())
+    exhaustive = width <= EXHAUSTIVE_BITS
+    total = 1 << width if exhaustive else vectors
+    name = chip.netlist.name
+    for first in range(0, total, CHUNK if exhaustive else total):
+        lanes = min(CHUNK, total - first) if exhaustive else total
+        chip.resize(lanes)
+        if exhaustive:
+            chip.inputs = [exhaustive_lanes(bit, first, lanes) for bit in range(width)]
+        else:
+            chip.inputs = [rng.getrandbits(lanes) for _ in range(width)]
+        chip.eval()
+        outputs = {pin: unpack(bits, lanes) for pin, bits in chip.outputs.items()}
+        error = first_difference(name, input_values(chip), outputs, model, lanes)
+        if error:
+            return total, exhaustive, error
+    return total, exhaustive, None
+
+
+def check_sequential(chip, model, vectors, cycles, rng):
+    inputs = chip.netlist.inputs
+    chip.resize(vectors)
+    states = [0] * vectors
+    name = chip.netlist.name
+    for cycle in range(cycles):
+        for pin, nets in inputs.items():
+            # the control bits of the sequential chips are mostly off
+            bits = [rng.getrandbits(vectors) for _ in nets]
+            if len(nets) == 1:
+                bits = [bits[0] & rng.getrandbits(vectors)]
+            chip.set_lanes(pin, bits)
+        chip.tick()
+        chip.tock()
+        values_in = input_values(chip)
+        (out,) = chip.netlist.outputs
+        actual = unpack(chip.outputs[out], vectors)
+        for vector in range(vectors):
+            vector_inputs = {pin: values_in[pin][vector] for pin in inputs}
+            states[vector] = model(states[vector], vector_inputs)
+            if actual[vector] != states[vector]:
+                return (
+                    f"{name}({', '.join(f'{p}={v}' for p, v in vector_inputs.items())})"
+                    f" at cycle {cycle + 1}: {out} is {actual[vector]}, "
+                    f"expected {states[vector]}"
+                )
+    return None
+
+
+def check(path, vectors=4096, cycles=64, seed=0):
+    """Checks the chip of the .hdl file against its model, returns a
+    CheckResult, whose vectors are 0 if the chip has no model."""
+    start = time.perf_counter()
+    path = Path(path)
+    rng = random.Random(seed)
+    chip = Chip(path)
+    name = chip.netlist.name
+    error = None
+    exhaustive = False
+    count = 0
+    if name in COMBINATIONAL:
+        count, exhaustive, error = check_combinational(
+            chip, COMBINATIONAL[name], vectors, rng
+        )
+    elif name in SEQUENTIAL:
+        count = vectors
+        error = check_sequential(chip, SEQUENTIAL[name], vectors, cycles, rng)
+    return CheckResult(
+        path,
+        count,
+        exhaustive,
+        chip.gates,
+        chip.dffs,
+        time.perf_counter() - start,
+        error,
+    )
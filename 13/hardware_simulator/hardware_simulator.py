@@ -0,0 +1,72 @@
+import time
+from pathlib import Path
+
+import click
+
+from check import check
+from hdl import HDLError
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+PROJECTS = ["01", "02", "03", "05"]
+
+
+def chips_to_check(path: Path):
+    """Returns the path of the chips in the given path if dir."""
+    if path.is_dir():
+        return sorted(path.rglob("*.hdl"))
+    else:
+        return [path] if path.suffix == ".hdl" else []
+
+
+@click.command()
+@click.argument("paths", nargs=-1, type=click.Path(exists=True))
+@click.option(
+    "--vectors",
+    default=4096,
+    type=click.IntRange(min=1),
+    help="Number of random vectors of the chips too wide to check exhaustively.",
+)
+@click.option(
+    "--cycles", default=64, help="Number of clock cycles of the sequential chips."
+)
+@click.option("--seed", default=0, help="Seed of the random vectors.")
+def check_chips(paths, vectors, cycles, seed):
+    """bit-parallel checker of the chips, of the projects 01 to 05 by default"""
+    directories = [Path(path) for path in paths] or [
+        ROOT_DIR / project for project in PROJECTS
+    ]
+    chips = [chip for path in directories for chip in chips_to_check(path)]
+    if not chips:
+        click.echo(f"Unable to detect chips in the given paths: {' '.join(paths)}")
+        return
+    start = time.perf_counter()
+    failures = 0
+    for path in chips:
+        try:
+            result = check(path, vectors, cycles, seed)
+        except HDLError as error:
+            failures += 1
+            click.echo(f"error    {path}: {error}")
+            continue
+        if result.vectors == 0:
+            status, vectors_text = "built", "no model"
+        else:
+            status = "failed" if result.error else "ok"
+            kind = "exhaustive" if result.exhaustive else "random"
+            vectors_text = f"{result.vectors} vectors, {kind}"
+        failures += status == "failed"
+        click.echo(
+            f"{status:8} {result.seconds:7.3f}s  {path}: {vectors_text}, "
+            f"{result.gates} gates, {result.dffs} dffs"
+        )
+        if result.error:
+            click.echo(f"         {result.error}")
+    click.echo(
+        f"{len(chips)} chips, {failures} failed, in {time.perf_counter() - start:.2f}s"
+    )
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    check_chips()
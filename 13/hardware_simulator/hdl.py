@@ -0,0 +1,186 @@
+"""Parser of the hardware description language of the course.
+
+    CHIP Mux {
+        IN a, b, sel;
+        OUT out;
+
+        PARTS:
+        Not(in=sel, out=notsel);
+        ...
+    }
+
+A connection joins a pin of the part, or a range of its bits, to a signal
+of the chip, a range of the bits of an input or output of the chip, or the
+constant `true` or `false`.
+"""
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+__all__ = ["ChipDef", "Connection", "HDLError", "Part", "Pin", "parse", "parse_file"]
+
+TOKEN = re.compile(
+    r"""
+    \s+ | //[^\n]* | /\*.*?\*/         # skipped
+    | (?P<number>\d+)
+    | (?P<identifier>[A-Za-z_][\w.]*)
+    | (?P<symbol>\.\.|[{}()\[\];,=:])
+    """,
+    re.S | re.X,
+)
+
+
+class HDLError(Exception):
+    pass
+
+
+@dataclass
+class Pin:
+    name: str
+    width: int = 1
+
+
+@dataclass
+class Connection:
+    pin: str
+    pin_range: Optional[Tuple[int, int]]  # first and last bit, None for all
+    signal: str
+    signal_range: Optional[Tuple[int, int]]
+
+
+@dataclass
+class Part:
+    chip: str
+    connections: List[Connection]
+    line: int
+
+
+@dataclass
+class ChipDef:
+    name: str
+    inputs: List[Pin]
+    outputs: List[Pin]
+    parts: List[Part] = field(default_factory=list)
+    path: Optional[Path] = None
+
+    def pin(self, name):
+        for pin in self.inputs + self.outputs:
+            if pin.name == name:
+                return pin
+        return None
+
+    def is_input(self, name):
+        return any(pin.name == name for pin in self.inputs)
+
+
+class Parser:
+    def __init__(self, source, path=None):
+        self.path = path
+        self.tokens = []
+        line = 1
+        position = 0
+        while position < len(source):
+            match = TOKEN.match(source, position)
+            if match is None:
+                raise self.error(f"unexpected {source[position]!r}", line)
+            if match.lastgroup:
+                self.tokens.append((match.group(match.lastgroup), line))
+            line += source.count("\n", position, match.end())
+            position = match.end()
+        self.position = 0
+
+    def error(self, message, line=None):
+        if line is None:
+            line = self.tokens[min(self.position, len(self.tokens) - 1)][1]
+        return HDLError(f"{self.path or 'HDL'}, line {line}: {message}")
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+    def next(self):
+        if self.position >= len(self.tokens):
+            raise self.error("unexpected end of file")
+        token = self.tokens[self.position][0]
+        self.position += 1
+        return token
+
+    def expect(self, expected):
+        token = self.next()
+        if token != expected:
+            raise self.error(f"expected {expected!r}, got {token!r}")
+
+    def number(self):
+        token = self.next()
+        if not token.isdigit():
+            raise self.error(f"expected a number, got {token!r}")
+        return int(token)
+
+    def chip(self):
+        self.expect("CHIP")
+        name = self.next()
+        self.expect("{")
+        inputs = self.pins("IN") if self.peek() == "IN" else []
+        outputs = self.pins("OUT") if self.peek() == "OUT" else []
+        chip = ChipDef(name, inputs, outputs, path=self.path)
+        self.expect("PARTS")
+        self.expect(":")
+        while self.peek() not in ("}", None):
+            chip.parts.append(self.part())
+        self.expect("}")
+        return chip
+
+    def pins(self, keyword):
+        self.expect(keyword)
+        pins = []
+        while True:
+            pin = Pin(self.next())
+            if self.peek() == "[":
+                self.next()
+                pin.width = self.number()
+                self.expect("]")
+            pins.append(pin)
+            if self.next() == ";":
+                return pins
+
+    def part(self):
+        line = self.tokens[self.position][1]
+        chip = self.next()
+        self.expect("(")
+        connections = []
+        while True:
+            pin, pin_range = self.bus()
+            self.expect("=")
+            signal, signal_range = self.bus()
+            connections.append(Connection(pin, pin_range, signal, signal_range))
+            token = self.next()
+            if token == ")":
+                break
+            if token != ",":
+                raise self.error(f"expected ',' or ')', got {token!r}")
+        self.expect(";")
+        return Part(chip, connections, line)
+
+    def bus(self):
+        name = self.next()
+        if self.peek() != "[":
+            return name, None
+        self.next()
+        first = last = self.number()
+        if self.peek() == "..":
+            self.next()
+            last = self.number()
+        self.expect("]")
+        return name, (first, last)
+
+
+def parse(source, path=None):
+    """Returns the ChipDef of the HDL source."""
+    return Parser(source, path).chip()
+
+
+def parse_file(path):
+    path = Path(path)
+    return parse(path.read_text(), path)
@@ -0,0 +1,502 @@
+"""Flattening of a chip into a netlist of Nand gates, DFFs and built-in
+blocks, compiled into a Python function.
+
+Every net is one bit. The netlist is simplified while it is sorted: the
+constants are propagated, a Nand of a signal with itself or with `true` is
+an inverted signal that costs no gate, and a Nand of two inverted signals
+is an Or. The function that evaluates it is straight-line code on Python
+integers, bit-sliced: the bit k of every value belongs to the test vector
+k, so that a single evaluation computes as many vectors as the integers
+have bits.
+
+As in the simulator of the course, a part is the chip of the .hdl file of
+the directory of the chip that uses it, else a built-in chip, else the chip
+of the projects 01 to 05. The memories and the registers of the CPU are
+built-in blocks evaluated as a whole, not flattened.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from hdl import ChipDef, HDLError, Pin, parse_file
+
+__all__ = ["Block", "Netlist", "BUILTINS", "LIBRARY"]
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+LIBRARY = [ROOT_DIR / project for project in ("01", "02", "03/a", "03/b", "05")]
+
+FALSE = 0  # the net of the constant 0, 1 is its inversion
+
+PRIMITIVES = {
+    "Nand": ChipDef("Nand", [Pin("a"), Pin("b")], [Pin("out")]),
+    "DFF": ChipDef("DFF", [Pin("in")], [Pin("out")]),
+}
+
+
+def memory(name, address_width):
+    return ChipDef(
+        name,
+        [Pin("in", 16), Pin("load"), Pin("address", address_width)],
+        [Pin("out", 16)],
+    )
+
+
+def register(name):
+    return ChipDef(name, [Pin("in", 16), Pin("load")], [Pin("out", 16)])
+
+
+BUILTINS = {
+    "RAM8": memory("RAM8", 3),
+    "RAM64": memory("RAM64", 6),
+    "RAM512": memory("RAM512", 9),
+    "RAM4K": memory("RAM4K", 12),
+    "RAM16K": memory("RAM16K", 14),
+    "Screen": memory("Screen", 13),
+    "ROM32K": ChipDef("ROM32K", [Pin("address", 15)], [Pin("out", 16)]),
+    "Keyboard": ChipDef("Keyboard", [], [Pin("out", 16)]),
+    "ARegister": register("ARegister"),
+    "DRegister": register("DRegister"),
+}
+
+
+@dataclass
+class Block:
+    """A built-in chip: its words, written on tock when `load` is set, and
+    the nets of its pins, the address and load being empty for a register
+    and the input empty for a read-only block."""
+
+    name: str
+    memory: List[int]
+    address: List[int]
+    data: List[int]
+    load: Optional[int]
+    out: List[int]
+
+
+@dataclass
+class Netlist:
+    name: str = ""
+    inputs: Dict[str, List[int]] = field(default_factory=dict)
+    outputs: Dict[str, List[int]] = field(default_factory=dict)
+    size: int = 1  # number of nets, net 0 is false
+    nands: list = field(default_factory=list)  # (out, a, b)
+    dffs: list = field(default_factory=list)  # (out, in)
+    blocks: List[Block] = field(default_factory=list)
+    # the output nets of the first part of every chip, for the scripts
+    parts: Dict[str, List[int]] = field(default_factory=dict)
+    alias: Dict[int, int] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, path):
+        """Flattens the chip of the .hdl file."""
+        return Flattener().template(parse_file(path))
+
+    def new_nets(self, count):
+        first = self.size
+        self.size += count
+        return list(range(first, first + count))
+
+    def find(self, net):
+        alias = self.alias
+        root = net
+        while root in alias:
+            root = alias[root]
+        while net != root:  # path compression
+            alias[net], net = root, alias[net]
+        return root
+
+    def resolve(self):
+        """Replaces the nets by the ones that drive them, false if none."""
+        find = self.find
+        driven = {FALSE}
+        driven.update(net for nets in self.inputs.values() for net in nets)
+        driven.update(out for out, _, _ in self.nands)
+        driven.update(out for out, _ in self.dffs)
+        driven.update(net for block in self.blocks for net in block.out)
+
+        def driver(net):
+            net = find(net)
+            return net if net in driven else FALSE
+
+        self.nands = [(out, driver(a), driver(b)) for out, a, b in self.nands]
+        self.dffs = [(out, driver(net)) for out, net in self.dffs]
+        for block in self.blocks:
+            block.address = [driver(net) for net in block.address]
+            block.data = [driver(net) for net in block.data]
+            if block.load is not None:
+                block.load = driver(block.load)
+        self.outputs = {
+            name: [driver(net) for net in nets] for name, nets in self.outputs.items()
+        }
+        self.parts = {
+            name: [driver(net) for net in nets] for name, nets in self.parts.items()
+        }
+        self.alias = {}
+
+    def compile(self):
+        """Returns the Python source code of the function that evaluates the
+        netlist, and the number of gates it computes."""
+        return Compiler(self).source()
+
+
+class Flattener:
+    """Flattens every chip once: the netlist of a chip is a template that
+    each of its parts copies, its nets renumbered."""
+
+    def __init__(self):
+        self.chips = {}  # (name, directory) -> ChipDef
+        self.templates = {}  # (name, path) -> Netlist
+
+    def load(self, name, directory):
+        if (name, directory) not in self.chips:
+            self.chips[name, directory] = self.find(name, directory)
+        return self.chips[name, directory]
+
+    def find(self, name, directory):
+        path = directory / f"{name}.hdl"
+        if not path.exists():
+            if name in PRIMITIVES:
+                return PRIMITIVES[name]
+            if name in BUILTINS:
+                return BUILTINS[name]
+            path = next(
+                (d / f"{name}.hdl" for d in LIBRARY if (d / f"{name}.hdl").exists()),
+                None,
+            )
+            if path is None:
+                raise HDLError(f"unknown chip {name}")
+        return parse_file(path)
+
+    def template(self, chip):
+        """The netlist of the chip, its inputs being the nets from 1 on."""
+        key = (chip.name, chip.path)
+        if key not in self.templates:
+            netlist = Netlist(chip.name)
+            netlist.inputs = {
+                pin.name: netlist.new_nets(pin.width) for pin in chip.inputs
+            }
+            netlist.outputs = {
+                pin.name: netlist.new_nets(pin.width) for pin in chip.outputs
+            }
+            netlist.parts[chip.name] = [
+                net for nets in netlist.outputs.values() for net in nets
+            ]
+            if chip.path is None:
+                self.builtin(netlist, chip)
+            else:
+                self.flatten(netlist, chip)
+            netlist.resolve()
+            self.templates[key] = netlist
+        return self.templates[key]
+
+    def flatten(self, netlist, chip):
+        directory = chip.path.parent
+        parts = [(part, self.load(part.chip, directory)) for part in chip.parts]
+        # the width of the internal signals, given by the outputs they connect to
+        signals = dict(netlist.inputs, **netlist.outputs)
+        widths = {}
+        for part, part_chip in parts:
+            for connection in part.connections:
+                pin = part_chip.pin(connection.pin)
+                if pin is None:
+                    raise HDLError(
+                        f"{chip.path}, line {part.line}: "
+                        f"{part.chip} has no pin {connection.pin}"
+                    )
+                if (
+                    not part_chip.is_input(pin.name)
+                    and connection.signal not in signals
+                ):
+                    first, last = connection.pin_range or (0, pin.width - 1)
+                    width = last - first + 1
+                    widths[connection.signal] = max(
+                        widths.get(connection.signal, 0), width
+                    )
+        for name, width in widths.items():
+            signals[name] = netlist.new_nets(width)
+        for part, part_chip in parts:
+            part_inputs = {pin.name: [FALSE] * pin.width for pin in part_chip.inputs}
+            part_outputs = {
+                pin.name: netlist.new_nets(pin.width) for pin in part_chip.outputs
+            }
+            for connection in part.connections:
+                if connection.pin in part_inputs:
+                    self.connect_input(
+                        netlist, chip, part, connection, part_inputs, signals
+                    )
+                else:
+                    self.connect_output(
+                        netlist, chip, part, connection, part_outputs, signals
+                    )
+            self.insert(netlist, self.template(part_chip), part_inputs, part_outputs)
+
+    @staticmethod
+    def insert(netlist, template, inputs, outputs):
+        """Adds a copy of the template, whose pins are the given nets."""
+        local_inputs = [net for nets in inputs.values() for net in nets]
+        first = len(local_inputs) + 1  # the first net of the template to copy
+        base = netlist.size
+        netlist.size += template.size - first
+        nets = [FALSE] + local_inputs + list(range(base, netlist.size))
+        netlist.nands += [(nets[out], nets[a], nets[b]) for out, a, b in template.nands]
+        netlist.dffs += [(nets[out], nets[net]) for out, net in template.dffs]
+        for block in template.blocks:
+            netlist.blocks.append(
+                Block(
+                    block.name,
+                    [0] * len(block.memory),
+                    [nets[net] for net in block.address],
+                    [nets[net] for net in block.data],
+                    None if block.load is None else nets[block.load],
+                    [nets[net] for net in block.out],
+                )
+            )
+        for name, part_nets in template.parts.items():
+            if name not in netlist.parts:
+                netlist.parts[name] = [nets[net] for net in part_nets]
+        for name, pin_nets in outputs.items():
+            for net, template_net in zip(pin_nets, template.outputs[name]):
+                netlist.alias[net] = nets[template_net]
+
+    @staticmethod
+    def bits(chip, part, nets, bus_range, name):
+        if bus_range is None:
+            return range(len(nets))
+        first, last = bus_range
+        if not 0 <= first <= last < len(nets):
+            raise HDLError(
+                f"{chip.path}, line {part.line}: {name}[{first}..{last}] "
+                f"is out of the {len(nets)} bits"
+            )
+        return range(first, last + 1)
+
+    def connect_input(self, netlist, chip, part, connection, part_inputs, signals):
+        pin_nets = part_inputs[connection.pin]
+        pin_bits = self.bits(chip, part, pin_nets, connection.pin_range, connection.pin)
+        if connection.signal in ("true", "false"):
+            for bit in pin_bits:
+                pin_nets[bit] = (
+                    FALSE if connection.signal == "false" else self.true(netlist)
+                )
+            return
+        if connection.signal not in signals:
+            raise HDLError(
+                f"{chip.path}, line {part.line}: no signal {connection.signal}"
+            )
+        nets = signals[connection.signal]
+        signal_bits = self.bits(
+            chip, part, nets, connection.signal_range, connection.signal
+        )
+        if len(signal_bits) != len(pin_bits):
+            raise HDLError(
+                f"{chip.path}, line {part.line}: {connection.pin} has "
+                f"{len(pin_bits)} bits, {connection.signal} {len(signal_bits)}"
+            )
+        for bit, signal_bit in zip(pin_bits, signal_bits):
+            pin_nets[bit] = nets[signal_bit]
+
+    def connect_output(self, netlist, chip, part, connection, part_outputs, signals):
+        pin_nets = part_outputs[connection.pin]
+        pin_bits = self.bits(chip, part, pin_nets, connection.pin_range, connection.pin)
+        nets = signals[connection.signal]
+        if connection.signal_range is None:
+            signal_bits = range(len(pin_bits))
+        else:
+            signal_bits = self.bits(
+                chip, part, nets, connection.signal_range, connection.signal
+            )
+        if len(signal_bits) != len(pin_bits) or len(signal_bits) > len(nets):
+            raise HDLError(
+                f"{chip.path}, line {part.line}: {connection.pin} has "
+                f"{len(pin_bits)} bits, {connection.signal} {len(nets)}"
+            )
+        for bit, signal_bit in zip(pin_bits, signal_bits):
+            netlist.alias[nets[signal_bit]] = pin_nets[bit]
+
+    @staticmethod
+    def true(netlist):
+        """A net of the constant 1, a Nand of false with itself."""
+        (net,) = netlist.new_nets(1)
+        netlist.nands.append((net, FALSE, FALSE))
+        return net
+
+    @staticmethod
+    def builtin(netlist, chip):
+        inputs, outputs = netlist.inputs, netlist.outputs
+        if chip.name == "Nand":
+            netlist.nands.append((outputs["out"][0], inputs["a"][0], inputs["b"][0]))
+        elif chip.name == "DFF":
+            netlist.dffs.append((outputs["out"][0], inputs["in"][0]))
+        else:
+            address = inputs.get("address", [])
+            netlist.blocks.append(
+                Block(
+                    chip.name,
+                    [0] * (1 << len(address)),
+                    list(address),
+                    list(inputs.get("in", [])),
+                    inputs["load"][0] if "load" in inputs else None,
+                    list(outputs["out"]),
+                )
+            )
+
+
+class Compiler:
+    """Sorts and simplifies the netlist and writes the evaluation function.
+
+    The value of a net is known as (base, inverted), the base being a net
+    whose value is computed, or false for the constants."""
+
+    def __init__(self, netlist):
+        self.netlist = netlist
+        self.value = {FALSE: (FALSE, False)}
+        self.lines = []
+        self.gates = 0
+
+    def term(self, net):
+        """The expression of the value of the net, between 0 and M."""
+        base, inverted = self.value[net]
+        if base == FALSE:
+            return "M" if inverted else "0"
+        return f"(M ^ n{base})" if inverted else f"n{base}"
+
+    def source(self):
+        netlist = self.netlist
+        for nets in netlist.inputs.values():
+            for net in nets:
+                self.value[net] = (net, False)
+        for out, _ in netlist.dffs:
+            self.value[out] = (out, False)
+        inputs = [net for nets in netlist.inputs.values() for net in nets]
+        lines = self.lines
+        lines.append("def evaluate(inputs, state, memories, M):")
+        lines.append("    n0 = 0")
+        if inputs:
+            lines.append(f"    {', '.join(f'n{net}' for net in inputs)}, = inputs")
+        if netlist.dffs:
+            names = ", ".join(f"n{out}" for out, _ in netlist.dffs)
+            lines.append(f"    {names}, = state")
+        self.emit(self.order())
+        outputs = [net for nets in netlist.outputs.values() for net in nets]
+        parts = [net for nets in netlist.parts.values() for net in nets]
+        blocks = [
+            net
+            for block in netlist.blocks
+            for net in block.address + block.data + [block.load]
+            if net is not None
+        ]
+        results = ", ".join(
+            f"({''.join(self.term(net) + ', ' for net in nets)})"
+            for nets in (outputs, [net for _, net in netlist.dffs], blocks, parts)
+        )
+        lines.append(f"    return {results}")
+        return "\n".join(lines) + "\n", self.gates
+
+    def order(self):
+        """Returns the gates and blocks in an order in which the inputs of
+        each are computed before it, without the ones that drive nothing."""
+        netlist = self.netlist
+        nodes = [("nand", gate) for gate in netlist.nands]
+        nodes += [("block", block) for block in netlist.blocks]
+        driver = {}
+        for index, (kind, node) in enumerate(nodes):
+            for net in [node[0]] if kind == "nand" else node.out:
+                driver[net] = index
+
+        def sources(kind, node):
+            return [node[1], node[2]] if kind == "nand" else node.address
+
+        # only the nodes that the outputs, the state and the blocks need
+        needed = [net for nets in netlist.outputs.values() for net in nets]
+        needed += [net for nets in netlist.parts.values() for net in nets]
+        needed += [net for _, net in netlist.dffs]
+        for block in netlist.blocks:
+            needed += block.address + block.data
+            if block.load is not None:
+                needed.append(block.load)
+        live = set()
+        stack = [driver[net] for net in needed if net in driver]
+        while stack:
+            index = stack.pop()
+            if index in live:
+                continue
+            live.add(index)
+            stack.extend(driver[net] for net in sources(*nodes[index]) if net in driver)
+        # depth first, the inputs of a node before it
+        order = []
+        state = {}  # index -> 1 while visiting, 2 when done
+        for root in sorted(live):
+            if root in state:
+                continue
+            stack = [(root, False)]
+            while stack:
+                index, expanded = stack.pop()
+                if expanded:
+                    state[index] = 2
+                    order.append(nodes[index])
+                    continue
+                if state.get(index) == 2:
+                    continue
+                if state.get(index) == 1:
+                    raise HDLError("the chip has a combinational loop")
+                state[index] = 1
+                stack.append((index, True))
+                for net in sources(*nodes[index]):
+                    source = driver.get(net)
+                    if source is not None and state.get(source) != 2:
+                        if state.get(source) == 1:
+                            raise HDLError("the chip has a combinational loop")
+                        stack.append((source, False))
+        return order
+
+    def emit(self, order):
+        value = self.value
+        lines = self.lines
+        known = {}  # (value of a, value of b) -> the value of their Nand
+        for kind, node in order:
+            if kind == "block":
+                self.emit_block(node)
+                continue
+            out, a, b = node
+            va, vb = value[a], value[b]
+            if va > vb:
+                va, vb = vb, va
+            if va == (FALSE, False):
+                value[out] = (FALSE, True)
+            elif va == (FALSE, True):
+                value[out] = (vb[0], not vb[1])
+            elif va == vb:
+                value[out] = (va[0], not va[1])
+            elif va[0] == vb[0]:  # x and not x
+                value[out] = (FALSE, True)
+            elif (va, vb) in known:
+                value[out] = known[va, vb]
+            else:
+                (x, x_inverted), (y, y_inverted) = va, vb
+                if x_inverted and y_inverted:
+                    expression = f"n{x} | n{y}"
+                elif x_inverted:
+                    expression = f"M ^ (n{y} & ~n{x})"
+                elif y_inverted:
+                    expression = f"M ^ (n{x} & ~n{y})"
+                else:
+                    expression = f"M ^ (n{x} & n{y})"
+                lines.append(f"    n{out} = {expression}")
+                value[out] = known[va, vb] = (out, False)
+                self.gates += 1
+
+    def emit_block(self, block):
+        index = self.netlist.blocks.index(block)
+        if block.address:
+            address = " | ".join(
+                f"{self.term(net)} << {bit}" if bit else self.term(net)
+                for bit, net in enumerate(block.address)
+            )
+        else:
+            address = "0"
+        self.lines.append(f"    word = memories[{index}][{address}]")
+        for bit, net in enumerate(block.out):
+            self.lines.append(
+                f"    n{net} = word >> {bit} & 1" if bit else f"    n{net} = word & 1"
+            )
+            self.value[net] = (net, False)
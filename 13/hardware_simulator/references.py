@@ -0,0 +1,92 @@
+"""Python models of the chips of the projects 01 to 03, which the chips of
+the .hdl files are checked against.
+
+A combinational model maps the values of the inputs to the values of the
+outputs, all unsigned. A sequential model is a pair of functions, of the
+outputs of the state and of the next state of the state and the inputs,
+the state being 0 at first.
+"""
+__all__ = ["COMBINATIONAL", "SEQUENTIAL"]
+
+WORD = 0xFFFF
+
+
+def mux(a, b, sel):
+    return b if sel else a
+
+
+def select(sel, inputs):
+    return inputs[sel]
+
+
+def demux(value, sel, names):
+    return {name: value if index == sel else 0 for index, name in enumerate(names)}
+
+
+def add16(a, b):
+    return (a + b) & WORD
+
+
+def alu(x, y, zx, nx, zy, ny, f, no):
+    if zx:
+        x = 0
+    if nx:
+        x ^= WORD
+    if zy:
+        y = 0
+    if ny:
+        y ^= WORD
+    out = add16(x, y) if f else x & y
+    if no:
+        out ^= WORD
+    return {"out": out, "zr": int(out == 0), "ng": out >> 15}
+
+
+COMBINATIONAL = {
+    "Not": lambda i: {"out": 1 - i["in"]},
+    "And": lambda i: {"out": i["a"] & i["b"]},
+    "Or": lambda i: {"out": i["a"] | i["b"]},
+    "Xor": lambda i: {"out": i["a"] ^ i["b"]},
+    "Mux": lambda i: {"out": mux(i["a"], i["b"], i["sel"])},
+    "DMux": lambda i: demux(i["in"], i["sel"], "ab"),
+    "Not16": lambda i: {"out": i["in"] ^ WORD},
+    "And16": lambda i: {"out": i["a"] & i["b"]},
+    "Or16": lambda i: {"out": i["a"] | i["b"]},
+    "Mux16": lambda i: {"out": mux(i["a"], i["b"], i["sel"])},
+    "Or8Way": lambda i: {"out": int(i["in"] != 0)},
+    "Mux4Way16": lambda i: {"out": select(i["sel"], [i[x] for x in "abcd"])},
+    "Mux8Way16": lambda i: {"out": select(i["sel"], [i[x] for x in "abcdefgh"])},
+    "DMux4Way": lambda i: demux(i["in"], i["sel"], "abcd"),
+    "DMux8Way": lambda i: demux(i["in"], i["sel"], "abcdefgh"),
+    "HalfAdder": lambda i: {"sum": i["a"] ^ i["b"], "carry": i["a"] & i["b"]},
+    "FullAdder": lambda i: {
+        "sum": i["a"] ^ i["b"] ^ i["c"],
+        "carry": int(i["a"] + i["b"] + i["c"] > 1),
+    },
+    "Add16": lambda i: {"out": add16(i["a"], i["b"])},
+    "Inc16": lambda i: {"out": add16(i["in"], 1)},
+    "ALU": lambda i: alu(
+        *(i[x] for x in ("x", "y", "zx", "nx", "zy", "ny", "f", "no"))
+    ),
+}
+
+
+def register(state, i):
+    return i["in"] if i["load"] else state
+
+
+def counter(state, i):
+    if i["reset"]:
+        return 0
+    if i["load"]:
+        return i["in"]
+    if i["inc"]:
+        return add16(state, 1)
+    return state
+
+
+SEQUENTIAL = {
+    "Bit": register,
+    "Register": register,
+    "PC": counter,
+}
@@ -0,0 +1,191 @@
+"""Simulation of a chip from its compiled netlist.
+
+The values of the nets are Python integers whose bits are lanes: a chip
+simulated with 64 lanes evaluates 64 vectors of inputs at once, the bit k
+of every net belonging to the vector k. The chips with memories, whose
+words are read at an address, are simulated with one lane.
+
+`tick` computes the chip and samples the inputs of its DFFs and memories,
+`tock` makes them the new state and computes the chip again, as the clock
+of the simulator of the course.
+"""
+from pathlib import Path
+
+from hdl import HDLError
+from netlist import Netlist
+
+__all__ = ["Chip", "lanes_of", "pack", "unpack"]
+
+
+def pack(values, width):
+    """The lanes of the bits of the values: the integer of the bit i has
+    the bit i of the values[k] as its bit k."""
+    if not values:
+        return [0] * width
+    texts = [format(value, f"0{width}b") for value in reversed(values)]
+    # the columns of the texts, the most significant bit first
+    columns = list(zip(*texts))[::-1] if width else []
+    return [int("".join(column), 2) for column in columns]
+
+
+def unpack(bits, lanes):
+    """The values of the lanes of the bits, the inverse of `pack`."""
+    if not bits:
+        return [0] * lanes
+    texts = [format(lane_bits, f"0{lanes}b")[::-1] for lane_bits in reversed(bits)]
+    return [int("".join(column), 2) for column in zip(*texts)]
+
+
+def lanes_of(value, mask):
+    """The integer of a bit that is the same in every lane."""
+    return mask if value else 0
+
+
+def signed(value, width):
+    if width == 16 and value & 0x8000:
+        return value - 0x10000
+    return value
+
+
+class Chip:
+    """A chip of a .hdl file, its pins read and written by name."""
+
+    def __init__(self, path, lanes=1):
+        self.path = Path(path)
+        self.netlist = netlist = Netlist.build(self.path)
+        source, self.gates = netlist.compile()
+        namespace = {}
+        exec(compile(source, f"<{self.path.name}>", "exec"), namespace)
+        self.evaluate = namespace["evaluate"]
+        self.offsets = {}  # input pin -> position of its first bit
+        position = 0
+        for name, nets in netlist.inputs.items():
+            self.offsets[name] = position
+            position += len(nets)
+        self.memories = [block.memory for block in netlist.blocks]
+        self.resize(lanes)
+
+    def resize(self, lanes):
+        """Sets the number of lanes, the inputs and the state to 0."""
+        if lanes > 1 and self.netlist.blocks:
+            raise HDLError(f"{self.path.name}: a chip with memories has one lane")
+        self.lanes = lanes
+        self.mask = (1 << lanes) - 1
+        self.inputs = [0] * sum(len(nets) for nets in self.netlist.inputs.values())
+        self.state = [0] * len(self.netlist.dffs)
+        self.latched = None
+        self.eval()
+
+    @property
+    def dffs(self):
+        return len(self.state)
+
+    def eval(self):
+        outputs, self.next_state, block_inputs, parts = self.evaluate(
+            self.inputs, self.state, self.memories, self.mask
+        )
+        self.outputs = self.split(outputs, self.netlist.outputs)
+        self.parts = self.split(parts, self.netlist.parts)
+        self.writes = []
+        position = 0
+        for memory, block in zip(self.memories, self.netlist.blocks):
+            address_bits = block_inputs[position : position + len(block.address)]
+            position += len(address_bits)
+            data_bits = block_inputs[position : position + len(block.data)]
+            position += len(data_bits)
+            if block.load is None:
+                continue
+            load = block_inputs[position]
+            position += 1
+            if load:
+                address = sum(bit << i for i, bit in enumerate(address_bits))
+                data = sum(bit << i for i, bit in enumerate(data_bits))
+                self.writes.append((memory, address, data))
+
+    @staticmethod
+    def split(values, pins):
+        result = {}
+        position = 0
+        for name, nets in pins.items():
+            result[name] = values[position : position + len(nets)]
+            position += len(nets)
+        return result
+
+    def tick(self):
+        self.eval()
+        self.latched = (self.next_state, self.writes)
+
+    def tock(self):
+        if self.latched is None:
+            self.tick()
+        state, writes = self.latched
+        self.state = list(state)
+        for memory, address, data in writes:
+            memory[address] = data
+        self.latched = None
+        self.eval()
+
+    def block(self, name):
+        for block, memory in zip(self.netlist.blocks, self.memories):
+            if block.name == name:
+                return memory
+        return None
+
+    def get(self, name, index=None):
+        """The value of a pin in the lane 0, the word `index` of a memory, or
+        the output of the first part named so, as `PC[]`. The 16-bit values
+        are signed.
+
+        As in the simulator of the course, a memory has its new word from the
+        tick, while its output only changes on the tock."""
+        memory = self.block(name)
+        if memory is not None and (index is not None or len(memory) == 1):
+            address = max(index or 0, 0)
+            value = memory[address]
+            # between the tick and the tock, the word the block stored
+            for written, written_address, data in (
+                self.latched[1] if self.latched else ()
+            ):
+                if written is memory and written_address == address:
+                    value = data
+            return signed(value, 16)
+        if name in self.offsets:
+            position = self.offsets[name]
+            bits = self.inputs[position : position + len(self.netlist.inputs[name])]
+        elif name in self.outputs and index is None:
+            bits = self.outputs[name]
+        elif name in self.parts and index is not None:
+            bits = self.parts[name]
+        else:
+            raise HDLError(f"{self.path.name} has no pin {name}")
+        value = sum((bit & 1) << i for i, bit in enumerate(bits))
+        return signed(value, len(bits))
+
+    def set(self, name, value, index=None):
+        """Sets an input pin in every lane, or a word of a memory."""
+        memory = self.block(name)
+        if memory is not None and (index is not None or len(memory) == 1):
+            memory[max(index or 0, 0)] = value & 0xFFFF
+            return
+        if name not in self.offsets:
+            raise HDLError(f"{self.path.name} has no input pin {name}")
+        position = self.offsets[name]
+        for bit in range(len(self.netlist.inputs[name])):
+            self.inputs[position + bit] = lanes_of(value >> bit & 1, self.mask)
+
+    def set_lanes(self, name, bits):
+        """Sets the lanes of the bits of an input pin, as `pack` returns."""
+        position = self.offsets[name]
+        self.inputs[position : position + len(bits)] = bits
+
+    def load(self, name, path):
+        """Loads the words of a .hack file into the memory, as ROM32K."""
+        memory = self.block(name)
+        if memory is None:
+            raise HDLError(f"{self.path.name} has no {name}")
+        words = [int(line, 2) for line in Path(path).read_text().split()]
+        memory[:] = words + [0] * (len(memory) - len(words))
+
+    def press(self, key):
+        """Holds a key down on the keyboard, 0 for none."""
+        self.set("Keyboard", key)
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import pytest
+
+from check import check, exhaustive_lanes
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+CHIPS = sorted(ROOT_DIR.glob("0[1-3]/**/*.hdl"))
+
+
+def test_exhaustive_lanes():
+    assert exhaustive_lanes(0, 0, 8) == 0b10101010
+    assert exhaustive_lanes(1, 0, 8) == 0b11001100
+    assert exhaustive_lanes(2, 0, 8) == 0b11110000
+    assert exhaustive_lanes(3, 8, 8) == 0b11111111
+    assert exhaustive_lanes(3, 16, 8) == 0
+
+
+@pytest.mark.parametrize("chip", CHIPS, ids=lambda chip: chip.name)
+def test_chips(chip):
+    result = check(chip, vectors=256, cycles=16)
+    assert result.error is None
+
+
+def test_exhaustive():
+    result = check(ROOT_DIR / "02" / "Inc16.hdl")
+    assert (result.vectors, result.exhaustive) == (65536, True)
+    result = check(ROOT_DIR / "02" / "Add16.hdl", vectors=100)
+    assert (result.vectors, result.exhaustive) == (100, False)
+
+
+def test_failure(tmp_path):
+    source = (ROOT_DIR / "02" / "FullAdder.hdl").read_text()
+    (tmp_path / "FullAdder.hdl").write_text(source.replace("b=c,", "b=a,"))
+    result = check(tmp_path / "FullAdder.hdl")
+    assert result.error is not None
+    assert result.error.startswith("FullAdder(a=")
+
+
+def test_sequential_failure(tmp_path):
+    source = (ROOT_DIR / "03" / "a" / "Bit.hdl").read_text()
+    (tmp_path / "Bit.hdl").write_text(source.replace("sel=load", "sel=in"))
+    result = check(tmp_path / "Bit.hdl", vectors=64, cycles=8)
+    assert "at cycle" in result.error
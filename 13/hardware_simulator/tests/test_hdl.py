@@ -0,0 +1,51 @@
+import pytest
+
+from hdl import Connection, HDLError, Pin, parse
+
+SOURCE = """
+// a comment
+CHIP Mux4 {
+    IN a[4], b[4], sel;
+    OUT out[4], low;
+
+    PARTS:
+    /* the bits */
+    Mux(a=a[0], b=b[0], sel=sel, out=out[0], out=low);
+    Mux16(a[0..3]=a, b[0..3]=b, sel=true, out[1..3]=out[1..3]);
+}
+"""
+
+
+def test_parse():
+    chip = parse(SOURCE)
+    assert chip.name == "Mux4"
+    assert chip.inputs == [Pin("a", 4), Pin("b", 4), Pin("sel")]
+    assert chip.outputs == [Pin("out", 4), Pin("low")]
+    assert [part.chip for part in chip.parts] == ["Mux", "Mux16"]
+    assert chip.parts[0].line == 9
+    assert chip.parts[0].connections[0] == Connection("a", None, "a", (0, 0))
+    assert chip.parts[1].connections[0] == Connection("a", (0, 3), "a", None)
+    assert chip.parts[1].connections[2] == Connection("sel", None, "true", None)
+    assert chip.is_input("sel") and not chip.is_input("low")
+    assert chip.pin("out").width == 4
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        (
+            "CHIP Not { IN in; OUT out; PARTS: Nand(a=in b=in); }",
+            r"line 1: expected ',' or '\)'",
+        ),
+        (
+            "CHIP Not { IN in; OUT out; PARTS:\n Nand(a=in, b=in, out=out) }",
+            "line 2: expected ';'",
+        ),
+        ("CHIP Not { IN in[x]; }", "line 1: expected a number"),
+        ("CHIP Not { IN in; OUT out; PARTS: ", "unexpected end of file"),
+        ("CHIP Not { IN in; # }", "unexpected '#'"),
+    ],
+)
+def test_errors(source, message):
+    with pytest.raises(HDLError, match=message):
+        parse(source)
@@ -0,0 +1,145 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from hdl import HDLError
+from netlist import Netlist
+from simulator import Chip, pack, unpack
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+
+def chip_file(directory, name, source):
+    path = directory / f"{name}.hdl"
+    path.write_text(source)
+    return path
+
+
+def test_pack_unpack():
+    values = [random.getrandbits(5) for _ in range(100)]
+    bits = pack(values, 5)
+    assert len(bits) == 5
+    assert bits[0] == sum((value & 1) << lane for lane, value in enumerate(values))
+    assert unpack(bits, 100) == values
+
+
+def test_combinational():
+    chip = Chip(ROOT_DIR / "02" / "ALU.hdl")
+    for pin, value in dict(x=1234, y=-34, zx=0, nx=0, zy=0, ny=0, f=1, no=0).items():
+        chip.set(pin, value)
+    chip.eval()
+    assert chip.get("out") == 1200
+    assert (chip.get("zr"), chip.get("ng")) == (0, 0)
+    chip.set("no", 1)
+    chip.eval()
+    assert chip.get("out") == ~1200
+    assert chip.get("ng") == 1
+
+
+def test_constants_are_folded(tmp_path):
+    path = chip_file(
+        tmp_path,
+        "Folded",
+        """CHIP Folded {
+            IN a, b;
+            OUT out, one, same;
+            PARTS:
+            Not(in=a, out=na);
+            Not(in=b, out=nb);
+            Nand(a=na, b=nb, out=out);  // an Or of a and b
+            Nand(a=a, b=false, out=one);
+            And(a=a, b=true, out=same);
+        }""",
+    )
+    chip = Chip(path)
+    assert chip.gates == 1
+    source, _ = chip.netlist.compile()
+    assert "|" in source
+    chip.resize(4)
+    chip.set_lanes("a", [0b1010])
+    chip.set_lanes("b", [0b1100])
+    chip.eval()
+    assert chip.outputs["out"] == (0b1110,)
+    assert chip.outputs["one"] == (0b1111,)
+    assert chip.outputs["same"] == (0b1010,)
+
+
+def test_combinational_loop(tmp_path):
+    path = chip_file(
+        tmp_path,
+        "Loop",
+        """CHIP Loop {
+            IN a;
+            OUT out;
+            PARTS:
+            Nand(a=a, b=x, out=y);
+            Nand(a=a, b=y, out=x, out=out);
+        }""",
+    )
+    with pytest.raises(HDLError, match="combinational loop"):
+        Chip(path)
+
+
+def test_unknown_chip(tmp_path):
+    path = chip_file(
+        tmp_path,
+        "Unknown",
+        "CHIP Unknown { IN a; OUT out; PARTS: Foo(in=a, out=out); }",
+    )
+    with pytest.raises(HDLError, match="unknown chip Foo"):
+        Netlist.build(path)
+
+
+def test_width_mismatch(tmp_path):
+    path = chip_file(
+        tmp_path,
+        "Wide",
+        "CHIP Wide { IN a[2]; OUT out; PARTS: Not(in=a, out=out); }",
+    )
+    with pytest.raises(HDLError, match="line 1: in has 1 bits, a 2"):
+        Netlist.build(path)
+
+
+def test_clock():
+    chip = Chip(ROOT_DIR / "03" / "a" / "Register.hdl")
+    chip.set("in", -7)
+    chip.set("load", 1)
+    chip.tick()
+    assert chip.get("out") == 0
+    chip.tock()
+    assert chip.get("out") == -7
+    chip.set("in", 5)
+    chip.set("load", 0)
+    chip.tick()
+    chip.tock()
+    assert chip.get("out") == -7
+
+
+def test_memories():
+    chip = Chip(ROOT_DIR / "05" / "Memory.hdl")
+    chip.set("address", 0x4005)
+    chip.set("in", 42)
+    chip.set("load", 1)
+    chip.tick()
+    assert chip.get("Screen", 5) == 42
+    assert chip.get("out") == 0
+    chip.tock()
+    assert chip.get("out") == 42
+    assert chip.get("RAM16K", 5) == 0
+    chip.press(75)
+    chip.set("address", 0x6000)
+    chip.eval()
+    assert chip.get("out") == 75
+    with pytest.raises(HDLError, match="one lane"):
+        chip.resize(2)
+
+
+def test_computer():
+    chip = Chip(ROOT_DIR / "05" / "Computer.hdl")
+    chip.load("ROM32K", ROOT_DIR / "05" / "Add.hack")
+    for _ in range(6):
+        chip.tick()
+        chip.tock()
+    assert chip.get("RAM16K", 0) == 5
+    assert chip.get("PC", -1) == 6
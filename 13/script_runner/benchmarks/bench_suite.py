@@ -0,0 +1,39 @@
+"""Times the test scripts of the projects 01 to 08, the slowest first, and
+fails if the whole suite takes longer than `--limit` seconds.
+
+    $ python benchmarks/bench_suite.py --jobs 4
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from runner import run_scripts  # noqa: E402
+from script_runner import PROJECTS, ROOT_DIR, scripts_to_run  # noqa: E402
+
+
+@click.command()
+@click.option("--jobs", default=0, help="number of processes, 0 for one per cpu")
+@click.option("--slowest", default=5, help="number of scripts to print")
+@click.option("--limit", default=5.0, help="maximum time of the suite")
+def bench(jobs, slowest, limit):
+    scripts = [
+        script for project in PROJECTS for script in scripts_to_run(ROOT_DIR / project)
+    ]
+    start = time.perf_counter()
+    results = run_scripts(scripts, jobs or os.cpu_count())
+    elapsed = time.perf_counter() - start
+    for result in sorted(results, key=lambda result: -result.seconds)[:slowest]:
+        click.echo(f"{result.seconds:7.3f}s  {result.script.relative_to(ROOT_DIR)}")
+    ran = sum(result.status != "skipped" for result in results)
+    click.echo(f"{len(scripts)} scripts, {ran} run, in {elapsed:.2f}s")
+    if elapsed > limit:
+        click.echo(f"slower than the limit of {limit}s", err=True)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,210 @@
+"""Runs test scripts and compares their output with the .cmp files."""
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from script import (
+    Command,
+    Repeat,
+    ScriptError,
+    format_value,
+    parse,
+    parse_column,
+    parse_value,
+)
+from simulators import Unsupported, simulator
+
+__all__ = ["ScriptResult", "ScriptRunner", "compare", "run_script", "run_scripts"]
+
+CLOCK_COMMANDS = ("tick", "tock", "ticktock", "eval", "vmstep")
+# the commands that only matter to the interactive simulators
+IGNORED_COMMANDS = (
+    "output-file",
+    "clear-echo",
+    "breakpoint",
+    "clear-breakpoints",
+)
+# the echo of the scripts that wait for a key, which is pressed for them
+HOLD_KEY = re.compile(r"[Hh]old down (?:the )?'(.)'")
+# longest while loop, as they wait for keys on the interactive simulators
+MAX_ITERATIONS = 1_000_000
+
+OPERATORS = {
+    "=": lambda x, y: x == y,
+    "<>": lambda x, y: x != y,
+    "<": lambda x, y: x < y,
+    ">": lambda x, y: x > y,
+    "<=": lambda x, y: x <= y,
+    ">=": lambda x, y: x >= y,
+}
+
+
+@dataclass
+class ScriptResult:
+    script: Path
+    status: str  # passed, failed, skipped or error
+    message: Optional[str] = None
+    seconds: float = 0.0
+    rows: int = 0  # compared rows, with the headers
+
+
+def split_variable(text):
+    """'RAM[16]' -> ('RAM', 16), 'pc' -> ('pc', None), 'DRegister[]' ->
+    ('DRegister', -1)"""
+    name, bracket, index = text.partition("[")
+    if not bracket:
+        return name, None
+    index = index.rstrip("]")
+    return name, int(index) if index else -1
+
+
+def compare(rows, expected):
+    """Returns the first difference between the output rows and the rows
+    of the .cmp file, in which '*' matches any character, None if none."""
+    for number, (row, line) in enumerate(zip(rows, expected), 1):
+        cells, expected_cells = row.split("|"), line.split("|")
+        if len(cells) != len(expected_cells):
+            return f"row {number}: {len(expected_cells) - 2} columns expected"
+        for column, (cell, expected_cell) in enumerate(zip(cells, expected_cells)):
+            if len(cell) != len(expected_cell) or any(
+                c != e and e != "*" for c, e in zip(cell, expected_cell)
+            ):
+                return (
+                    f"row {number}, column {column}: "
+                    f"expected {expected_cell.strip()!r}, got {cell.strip()!r}"
+                )
+    if len(rows) != len(expected):
+        return f"{len(expected)} rows expected, got {len(rows)}"
+    return None
+
+
+class ScriptRunner:
+    """Executes the commands of a script, recording the rows of the outputs."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.simulator = None
+        self.compare_to = None
+        self.columns = []
+        self.rows = []
+
+    def run(self):
+        statements = parse(self.path.read_text())
+        self.execute(statements)
+
+    def execute(self, statements):
+        for statement in statements:
+            if isinstance(statement, Command):
+                self.command(statement.words)
+            elif isinstance(statement, Repeat):
+                self.repeat(statement)
+            else:
+                self.while_(statement)
+
+    def repeat(self, statement):
+        if statement.count is None:
+            raise ScriptError(f"line {statement.line}: endless repeat")
+        body = statement.body
+        if (
+            len(body) == 1
+            and isinstance(body[0], Command)
+            and body[0].words[0] in CLOCK_COMMANDS
+            and len(body[0].words) == 1
+        ):
+            self.require_simulator().step(body[0].words[0], statement.count)
+            return
+        for _ in range(statement.count):
+            self.execute(body)
+
+    def while_(self, statement):
+        left, operator, right = statement.condition
+        if operator not in OPERATORS:
+            raise ScriptError(f"line {statement.line}: unknown operator {operator!r}")
+        test = OPERATORS[operator]
+        for _ in range(MAX_ITERATIONS):
+            if not test(self.value(left), self.value(right)):
+                return
+            self.execute(statement.body)
+        raise ScriptError(f"line {statement.line}: while loop does not end")
+
+    def value(self, text):
+        try:
+            return parse_value(text)
+        except ScriptError:
+            return self.require_simulator().get(*split_variable(text))
+
+    def require_simulator(self):
+        if self.simulator is None:
+            raise ScriptError("no program loaded")
+        return self.simulator
+
+    def command(self, words):
+        command = words[0]
+        if command == "load":
+            self.simulator = simulator(
+                self.path.parent, words[1] if len(words) > 1 else ""
+            )
+        elif command == "compare-to":
+            self.compare_to = self.path.parent / words[1]
+        elif command == "output-list":
+            self.columns = [parse_column(word) for word in words[1:]]
+            self.rows.append(f"|{'|'.join(column.header for column in self.columns)}|")
+        elif command == "output":
+            simulator_ = self.require_simulator()
+            cells = [
+                format_value(simulator_.get(column.name, column.index), column)
+                for column in self.columns
+            ]
+            self.rows.append(f"|{'|'.join(cells)}|")
+        elif command == "set" and len(words) == 3:
+            name, index = split_variable(words[1])
+            self.require_simulator().set(name, index, parse_value(words[2]))
+        elif command in CLOCK_COMMANDS and len(words) == 1:
+            self.require_simulator().step(command)
+        elif command == "echo":
+            match = HOLD_KEY.search(" ".join(words[1:]))
+            if match:
+                self.require_simulator().press(ord(match.group(1)))
+        elif command in IGNORED_COMMANDS:
+            pass
+        elif len(words) == 3 and words[1] == "load":  # e.g. ROM32K load Max.hack
+            self.require_simulator().load(command, self.path.parent / words[2])
+        else:
+            raise ScriptError(f"unknown command {' '.join(words)!r}")
+
+
+def run_script(path):
+    """Runs the script and compares its output, returns a ScriptResult."""
+    start = time.perf_counter()
+    runner = ScriptRunner(path)
+    try:
+        text = Path(path).read_text()
+        if "compare-to" not in text:
+            status, message = "skipped", "no compare file, an interactive test"
+        else:
+            runner.run()
+            lines = runner.compare_to.read_text().splitlines()
+            expected = [line.strip() for line in lines if line.strip()]
+            message = compare(runner.rows, expected)
+            status = "failed" if message else "passed"
+    except Unsupported as error:
+        status, message = "skipped", str(error)
+    except Exception as error:
+        status, message = "error", f"{type(error).__name__}: {error}"
+    return ScriptResult(
+        Path(path), status, message, time.perf_counter() - start, len(runner.rows)
+    )
+
+
+def run_scripts(paths, jobs=1):
+    """Runs the scripts, in a pool of `jobs` processes if more than one.
+
+    Returns the `ScriptResult`s in the order of the scripts."""
+    if jobs == 1 or len(paths) <= 1:
+        return [run_script(path) for path in paths]
+    workers = min(jobs, len(paths))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_script, paths))
@@ -0,0 +1,197 @@
+"""Parser of the test script language of the simulators of the course.
+
+A script is a sequence of commands made of words and ended by `,`, `;` or
+`!`, which the runner treats alike, and of `repeat n { ... }` and
+`while a <> b { ... }` blocks. Comments are in the C++ style.
+
+An `output-list` column is a name, with an index or not, and a format:
+`RAM[16]%D1.6.1` prints RAM[16] in decimal, right aligned in 6 characters,
+with 1 space on the left and 1 on the right. Every `output-list` prints a
+row of the centered names of its columns.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+__all__ = [
+    "Column",
+    "Command",
+    "Repeat",
+    "ScriptError",
+    "While",
+    "format_value",
+    "parse",
+    "parse_column",
+    "parse_value",
+]
+
+TOKEN = re.compile(
+    r"""
+    \s+ | //[^\n]* | /\*.*?\*/       # skipped
+    | "(?P<string>[^"]*)"
+    | (?P<punctuation>[{},;!])
+    | (?P<word>[^\s{},;!"]+)
+    """,
+    re.S | re.X,
+)
+COLUMN = re.compile(
+    r"(?P<name>[^\[%]+)(?:\[(?P<index>\d*)\])?"
+    r"(?:%(?P<format>[BDXS])(?P<left>\d+)\.(?P<length>\d+)\.(?P<right>\d+))?$"
+)
+
+
+class ScriptError(Exception):
+    pass
+
+
+@dataclass
+class Command:
+    words: List[str]
+    line: int
+
+
+@dataclass
+class Repeat:
+    count: Optional[int]  # None repeats forever
+    body: list
+    line: int
+
+
+@dataclass
+class While:
+    condition: Tuple[str, str, str]  # left operand, operator, right operand
+    body: list
+    line: int
+
+
+@dataclass
+class Column:
+    name: str
+    index: Optional[int]  # None without brackets, -1 for []
+    format: str = "B"
+    left: int = 1
+    length: int = 1
+    right: int = 1
+
+    @property
+    def width(self):
+        return self.left + self.length + self.right
+
+    @property
+    def header(self):
+        """The name of the column centered in its width, as in the .out
+        file."""
+        if self.index is None:
+            name = self.name
+        else:
+            name = f"{self.name}[{'' if self.index < 0 else self.index}]"
+        name = name[: self.width]
+        left = (self.width - len(name)) // 2
+        return " " * left + name + " " * (self.width - len(name) - left)
+
+
+def tokenize(source):
+    """Yields the (kind, text, line) of the tokens of the script."""
+    line = 1
+    position = 0
+    while position < len(source):
+        match = TOKEN.match(source, position)
+        if match is None:
+            raise ScriptError(f"line {line}: unexpected {source[position]!r}")
+        kind = match.lastgroup
+        if kind is not None:
+            yield kind, match.group(kind), line
+        line += source.count("\n", position, match.end())
+        position = match.end()
+
+
+def parse(source):
+    """Returns the commands and blocks of the script."""
+    tokens = list(tokenize(source))
+    statements, position = parse_block(tokens, 0)
+    if position < len(tokens):
+        raise ScriptError(f"line {tokens[position][2]}: unexpected '}}'")
+    return statements
+
+
+def parse_block(tokens, position):
+    """Parses statements up to a closing brace or the end of the tokens,
+    returns them with the position of the closing brace."""
+    statements = []
+    words = []
+    line = None
+    while position < len(tokens):
+        kind, text, token_line = tokens[position]
+        position += 1
+        if kind in ("word", "string"):
+            if not words:
+                line = token_line
+            words.append(text)
+        elif text in ",;!":
+            if words:
+                statements.append(Command(words, line))
+            words = []
+        elif text == "{":
+            body, position = parse_block(tokens, position)
+            if position == len(tokens):
+                raise ScriptError(f"line {line}: missing '}}'")
+            position += 1
+            statements.append(loop(words, body, line))
+            words = []
+        else:  # }
+            if words:
+                statements.append(Command(words, line))
+            return statements, position - 1
+    if words:
+        statements.append(Command(words, line))
+    return statements, position
+
+
+def loop(words, body, line):
+    if words[0] == "repeat" and len(words) <= 2:
+        return Repeat(int(words[1]) if len(words) == 2 else None, body, line)
+    if words[0] == "while" and len(words) == 4:
+        return While(tuple(words[1:]), body, line)
+    raise ScriptError(f"line {line}: invalid block {' '.join(words)!r}")
+
+
+def parse_column(text):
+    match = COLUMN.match(text)
+    if match is None:
+        raise ScriptError(f"invalid output column {text!r}")
+    index = match.group("index")
+    column = Column(match.group("name"), None if index is None else int(index or -1))
+    if match.group("format"):
+        column.format = match.group("format")
+        column.left, column.length, column.right = (
+            int(match.group(group)) for group in ("left", "length", "right")
+        )
+    return column
+
+
+def parse_value(text):
+    """The integer of `%B0101`, `%XFF`, `%D-1` or `-1`."""
+    bases = {"%B": 2, "%X": 16, "%D": 10}
+    try:
+        if text[:2] in bases:
+            value = int(text[2:], bases[text[:2]])
+            if text[:2] != "%D" and value >= 0x8000:
+                value -= 0x10000  # the bits of a negative value
+            return value
+        return int(text)
+    except ValueError:
+        raise ScriptError(f"invalid value {text!r}") from None
+
+
+def format_value(value, column):
+    """The cell of the value in the column, as in the .out file."""
+    length = column.length
+    if column.format == "S":
+        text = str(value).ljust(length)
+    elif column.format == "D":
+        text = str(value).rjust(length)
+    elif column.format == "B":
+        text = format(value & (1 << length) - 1, f"0{length}b")
+    else:
+        text = format(value & (1 << 4 * length) - 1, f"0{length}X")
+    return " " * column.left + text[:length] + " " * column.right
@@ -0,0 +1,61 @@
+import os
+import time
+from pathlib import Path
+
+import click
+
+from runner import run_scripts
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+PROJECTS = [f"0{number}" for number in range(1, 9)]
+
+
+def scripts_to_run(path: Path):
+    """Returns the path of the test scripts in the given path if dir."""
+    if path.is_dir():
+        return sorted(path.rglob("*.tst"))
+    else:
+        return [path] if path.suffix == ".tst" else []
+
+
+@click.command()
+@click.argument("paths", nargs=-1, type=click.Path(exists=True))
+@click.option(
+    "--jobs",
+    "-j",
+    default=0,
+    type=click.IntRange(min=0),
+    help="Number of scripts run in parallel, 0 for one per cpu.",
+)
+@click.option("--quiet", "-q", is_flag=True, help="Only print the failures.")
+def run_tests(paths, jobs, quiet):
+    """test script runner, for the projects 01 to 08 by default"""
+    directories = [Path(path) for path in paths] or [
+        ROOT_DIR / project for project in PROJECTS
+    ]
+    scripts = [script for path in directories for script in scripts_to_run(path)]
+    if not scripts:
+        click.echo(
+            f"Unable to detect test scripts in the given paths: {' '.join(paths)}"
+        )
+        return
+    start = time.perf_counter()
+    results = run_scripts(scripts, jobs or os.cpu_count())
+    elapsed = time.perf_counter() - start
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+        if quiet and result.status in ("passed", "skipped"):
+            continue
+        line = f"{result.status:8} {result.seconds:7.3f}s  {result.script}"
+        if result.message:
+            line += f": {result.message}"
+        click.echo(line)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    click.echo(f"{summary} in {elapsed:.2f}s")
+    if counts.get("failed") or counts.get("error"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    run_tests()
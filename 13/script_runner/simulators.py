@@ -0,0 +1,252 @@
+"""The simulators that the scripts drive, on top of the tools of the other
+projects.
+
+A simulator reads and writes the variables of the scripts with `get` and
+`set` and runs the clock commands with `step`, which takes a count so that
+a `repeat` of a single clock command runs in one call.
+"""
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+for directory in (
+    "05/hack_emulator",
+    "06/hack_assembler",
+    "08/vm_translator",
+    "08/vm_emulator",
+    "13/hardware_simulator",
+):
+    sys.path.append(str(ROOT_DIR / directory))
+
+import assembler  # noqa: E402
+from blocks import BlockComputer  # noqa: E402
+from emulator import KBD, load_rom  # noqa: E402
+from hdl import HDLError  # noqa: E402
+from machine import VirtualMachine  # noqa: E402
+from simulator import Chip  # noqa: E402
+from translator import VMTranslator  # noqa: E402
+
+from script import ScriptError  # noqa: E402
+
+__all__ = [
+    "CPUEmulator",
+    "HardwareSimulator",
+    "Unsupported",
+    "VMEmulator",
+    "simulator",
+]
+
+
+class Unsupported(Exception):
+    """A script for a simulator that is not available."""
+
+
+class Simulator:
+    """The clock of the simulators, `time` counts the cycles and ends with
+    '+' between a tick and its tock."""
+
+    def __init__(self):
+        self.cycles = 0
+        self.high = False
+
+    @property
+    def time(self):
+        return f"{self.cycles}+" if self.high else str(self.cycles)
+
+    def get(self, name, index):
+        if name == "time" and index is None:
+            return self.time
+        raise ScriptError(f"unknown variable {variable(name, index)}")
+
+    def set(self, name, index, value):
+        raise ScriptError(f"cannot set {variable(name, index)}")
+
+    def step(self, command, count=1):
+        raise ScriptError(f"unknown command {command!r}")
+
+    def load(self, part, path):
+        raise ScriptError(f"cannot load {path.name} into {part}")
+
+    def press(self, key):
+        """Holds the key down, as the scripts that wait for a key ask."""
+        raise Unsupported("no keyboard")
+
+
+def variable(name, index):
+    if index is None:
+        return name
+    return f"{name}[{'' if index < 0 else index}]"
+
+
+def vm_files(directory):
+    return [
+        (path.stem, path.read_text())
+        for path in sorted(directory.iterdir())
+        if path.suffix == ".vm"
+    ]
+
+
+class CPUEmulator(Simulator):
+    """The Hack computer, with a program from a .hack file, or a .asm file
+    that is assembled, or, as the tests of projects 7 and 8 expect the .asm
+    file the vm translator writes, from the .vm files of its directory."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.computer = BlockComputer(self.rom(path))
+
+    @staticmethod
+    def rom(path):
+        if path.exists() and path.suffix == ".hack":
+            return load_rom(path)
+        source = path.with_suffix(".asm")
+        if source.exists():
+            lines = source.read_text().splitlines()
+        else:
+            files = vm_files(path.parent)
+            if not files:
+                raise ScriptError(f"no program for {path.name}")
+            bootstrap = any(name == "Sys" for name, _ in files)
+            lines = VMTranslator().translate(files, bootstrap)
+        return [int(code, 2) for code in assembler.assemble(lines)]
+
+    def get(self, name, index):
+        computer = self.computer
+        if name == "RAM" and index is not None:
+            return computer.ram[index]
+        if name == "ROM" and index is not None:
+            return computer.rom[index]
+        if index is None and name in ("PC", "A", "D"):
+            return getattr(computer, name.lower() if name == "PC" else name)
+        return super().get(name, index)
+
+    def set(self, name, index, value):
+        computer = self.computer
+        if name == "RAM" and index is not None:
+            computer.ram[index] = value
+        elif index is None and name in ("PC", "A", "D"):
+            setattr(computer, name.lower() if name == "PC" else name, value)
+        else:
+            super().set(name, index, value)
+
+    def step(self, command, count=1):
+        if command != "ticktock":
+            super().step(command, count)
+        self.computer.run(count)
+        self.cycles += count
+
+    def press(self, key):
+        self.computer.ram[KBD] = key
+
+
+SEGMENTS = {"sp": 0, "local": 1, "argument": 2, "this": 3, "that": 4}
+
+
+class VMEmulator(Simulator):
+    """The vm emulator, with the program of a .vm file or of the .vm files
+    of a directory."""
+
+    def __init__(self, path):
+        super().__init__()
+        if path.is_dir():
+            files = vm_files(path)
+        else:
+            files = [(path.stem, path.read_text())]
+        self.vm = VirtualMachine(files)
+
+    def address(self, name, index):
+        ram = self.vm.ram
+        if name == "RAM" and index is not None:
+            return index
+        if name in SEGMENTS:
+            if index is None:
+                return SEGMENTS[name]
+            return ram[SEGMENTS[name]] + index
+        if name == "temp" and index is not None:
+            return 5 + index
+        return None
+
+    def get(self, name, index):
+        address = self.address(name, index)
+        if address is None:
+            return super().get(name, index)
+        return self.vm.ram[address]
+
+    def set(self, name, index, value):
+        address = self.address(name, index)
+        if address is None:
+            super().set(name, index, value)
+        else:
+            self.vm.ram[address] = value
+
+    def step(self, command, count=1):
+        if command != "vmstep":
+            super().step(command, count)
+        self.vm.run(count)
+        self.cycles += count
+
+
+class HardwareSimulator(Simulator):
+    """The chip of a .hdl file, simulated gate by gate."""
+
+    def __init__(self, path):
+        super().__init__()
+        try:
+            self.chip = Chip(path)
+        except HDLError as error:
+            raise ScriptError(str(error)) from None
+
+    def get(self, name, index):
+        if name == "time":
+            return super().get(name, index)
+        try:
+            return self.chip.get(name, index)
+        except HDLError:
+            return super().get(name, index)
+
+    def set(self, name, index, value):
+        try:
+            self.chip.set(name, value, index)
+        except HDLError:
+            super().set(name, index, value)
+
+    def step(self, command, count=1):
+        chip = self.chip
+        for _ in range(count):
+            if command == "eval":
+                chip.eval()
+            elif command == "tick" and not self.high:
+                chip.tick()
+                self.high = True
+            elif command == "tock" and self.high:
+                chip.tock()
+                self.high = False
+                self.cycles += 1
+            elif command == "ticktock":
+                chip.tick()
+                chip.tock()
+                self.cycles += 1
+            elif command not in ("tick", "tock"):
+                super().step(command, count)
+
+    def load(self, part, path):
+        try:
+            self.chip.load(part, path)
+        except HDLError:
+            super().load(part, path)
+
+    def press(self, key):
+        self.chip.press(key)
+
+
+def simulator(directory, file_name):
+    """The simulator of the file of a `load` command, the directory for
+    none."""
+    path = directory / file_name if file_name else directory
+    if path.is_dir() or path.suffix == ".vm":
+        return VMEmulator(path)
+    if path.suffix in (".hack", ".asm"):
+        return CPUEmulator(path)
+    if path.suffix == ".hdl":
+        return HardwareSimulator(path)
+    raise Unsupported(f"no simulator for {path.name}")
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from runner import compare, run_script, run_scripts
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+SCRIPTS = sorted(ROOT_DIR.glob("0[1-8]/**/*.tst"))
+
+
+@pytest.mark.parametrize(
+    "script", SCRIPTS, ids=lambda script: str(script.relative_to(ROOT_DIR))
+)
+def test_scripts(script):
+    result = run_script(script)
+    assert result.status in ("passed", "skipped"), result.message
+
+
+def test_compare():
+    expected = ["| a | b |", "|  1 |*****|"]
+    assert compare(["| a | b |", "|  1 | -32 |"], expected) is None
+    assert compare(["| a | b |", "|  2 | -32 |"], expected) == (
+        "row 2, column 1: expected '1', got '2'"
+    )
+    assert compare(["| a | b |"], expected) == "2 rows expected, got 1"
+
+
+def test_failure(tmp_path):
+    directory = ROOT_DIR / "07" / "StackArithmetic" / "SimpleAdd"
+    (tmp_path / "SimpleAdd.vm").write_text((directory / "SimpleAdd.vm").read_text())
+    (tmp_path / "SimpleAdd.tst").write_text(
+        (directory / "SimpleAddVME.tst").read_text()
+    )
+    cmp = (directory / "SimpleAdd.cmp").read_text()
+    (tmp_path / "SimpleAdd.cmp").write_text(cmp.replace("15", "16"))
+    result = run_script(tmp_path / "SimpleAdd.tst")
+    assert result.status == "failed"
+    assert result.message == "row 2, column 2: expected '16', got '15'"
+
+
+def test_errors_are_reported(tmp_path):
+    script = tmp_path / "Broken.tst"
+    script.write_text("compare-to Broken.cmp, set RAM[0] 1;")
+    result = run_script(script)
+    assert result.status == "error"
+    assert result.message == "ScriptError: no program loaded"
+
+
+def test_process_pool():
+    scripts = [
+        script for script in SCRIPTS if script.relative_to(ROOT_DIR).parts[0] == "07"
+    ]
+    results = run_scripts(scripts, jobs=2)
+    assert [result.script for result in results] == scripts
+    assert {result.status for result in results} == {"passed"}
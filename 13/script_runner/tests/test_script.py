@@ -0,0 +1,51 @@
+import pytest
+
+from script import (
+    Command,
+    Repeat,
+    ScriptError,
+    While,
+    format_value,
+    parse,
+    parse_column,
+    parse_value,
+)
+
+
+def test_parse():
+    statements = parse("""// a comment
+load Add.hack, /* a block
+comment */ output-list RAM[0]%D2.6.2;
+repeat 3 { ticktock; }
+while out <> 75 { eval, }
+echo "two words";
+""")
+    assert statements == [
+        Command(["load", "Add.hack"], 2),
+        Command(["output-list", "RAM[0]%D2.6.2"], 3),
+        Repeat(3, [Command(["ticktock"], 4)], 4),
+        While(("out", "<>", "75"), [Command(["eval"], 5)], 5),
+        Command(["echo", "two words"], 6),
+    ]
+
+
+def test_missing_brace():
+    with pytest.raises(ScriptError):
+        parse("repeat 3 { ticktock;")
+
+
+def test_values():
+    assert parse_value("%B1111111111111111") == -1
+    assert parse_value("%X7FFF") == 32767
+    assert parse_value("%D-5") == parse_value("-5") == -5
+
+
+def test_columns():
+    column = parse_column("RAM[16]%D1.6.1")
+    assert (column.name, column.index, column.width) == ("RAM", 16, 8)
+    assert format_value(-42, column) == "    -42 "
+    assert column.header == "RAM[16] "
+    column = parse_column("DRegister[]%D1.6.1")
+    assert column.index == -1 and column.header == "DRegiste"
+    assert format_value(-1, parse_column("out%B1.16.1")) == " " + "1" * 16 + " "
+    assert format_value("1+", parse_column("time%S1.4.1")) == " 1+   "